@@ -12,6 +12,48 @@ class Settings(BaseSettings):
     # Spotify API credentials
     SPOTIFY_CLIENT_ID: str
     SPOTIFY_CLIENT_SECRET: str
+
+    # Streaming history extraction
+    HISTORY_CHUNK_SIZE: int = 10000  # rows flushed to staging at a time
+    HISTORY_WORKERS: int = 1  # worker processes used to ingest export files
+
+    # Spotify API fetching
+    SPOTIFY_MAX_IN_FLIGHT: int = 1  # concurrent API requests while staging items
+    SPOTIFY_REQUESTS_PER_SECOND: float = 10.0  # shared token bucket rate
+    SPOTIFY_CACHE_PATH: Optional[str] = None  # SQLite file for cached API responses, disabled if not set
+    SPOTIFY_CACHE_TTL_DAYS: int = 30
+    SPOTIFY_CACHE_MAX_MB: int = 512
+    FAILED_URI_BACKOFF_HOURS: int = 24  # first retry delay for failed URIs, doubled after every failed retry
+    NEW_ITEMS_ANTI_JOIN: bool = False  # find new URIs with an anti-join in the database instead of Python sets
+    STAGE_FULL_PAYLOADS: bool = False  # keep whole API payloads in staging for debugging instead of only the fields the transformer reads
+    PIPELINED_STAGING: bool = False  # fetch artists and podcasts while tracks and episodes are still being staged
+    FETCH_QUEUE_REDIS_URL: Optional[str] = None  # e.g. redis://localhost:6379/0, hands API fetching to scripts/fetch_worker.py processes
+    FETCH_QUEUE_NAME: str = "spotify_fetch"
+    FETCH_QUEUE_VISIBILITY_TIMEOUT: int = 300  # seconds a worker has to finish a claimed batch
+    FETCH_QUEUE_MAX_ATTEMPTS: int = 3
+    FETCH_QUEUE_DRAIN_TIMEOUT: float = 900.0  # seconds the coordinator waits for the queue to shrink before giving up, e.g. when no worker is running
+    FETCH_WORKER_IDLE_SECONDS: Optional[int] = None  # workers stop after this long without work, never by default
+
+    # Database connections
+    DB_POOL_SIZE: int = 1  # more than 1 enables a connection pool with one connection per thread
+    DB_CONNECT_RETRIES: int = 3
+    DB_CONNECT_RETRY_DELAY: float = 1.0  # seconds before the first retry, doubled after every failed attempt
+    DB_HEALTH_CHECK_INTERVAL: int = 30  # idle connections unused for longer are pinged before use
+    DB_POOL_TIMEOUT: float = 60.0  # seconds to wait for a free pooled connection before failing
+
+    # Transformation
+    TRANSFORM_STREAM_STAGED: bool = False  # read staged payloads through a server-side cursor instead of fetching them all at once
+    TRANSFORM_BATCH_SIZE: int = 50  # staged rows cleaned and inserted per batch
+    TRANSFORM_FAST_COMMIT: bool = False  # load each dimension in a single transaction instead of committing every batch
+    TRANSFORM_DIM_WORKERS: int = 1  # dimensions loaded in parallel, capped to DB_POOL_SIZE (half of it with TRANSFORM_STREAM_STAGED)
+    TRANSFORM_ENGINE: str = "python"  # `python` (clean rows in Python) or `sql` (INSERT ... SELECT over the staged jsonb)
+    DIM_LOAD_MODE: str = "insert"  # `insert` (keep the existing dimension rows) or `upsert` (overwrite rows whose content hash changed)
+    FACT_DERIVE_DIM_KEYS: bool = False  # compute fact date_fk/time_fk from the timestamp instead of joining dim_date/dim_time
+    FACT_LOAD_ENGINE: str = "sql"  # `sql` (INSERT ... SELECT joining the dims) or `python` (resolve keys from in-memory URI maps and COPY)
+
+    # Bulk loading
+    BULK_LOAD_METHOD: str = "insert"  # `insert` (execute_values) or `copy` (COPY FROM STDIN)
+    COPY_FORMAT: str = "text"  # `text` or `binary`
     
     @property
     def DATABASE_URL(self) -> str:
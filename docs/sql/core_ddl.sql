@@ -15,6 +15,7 @@ create table if not exists core.dim_track
     duration_ms        integer,
     duration_sec       integer,
     parent_track_id    integer,
+    content_hash       varchar(32),
     primary key (track_id),
     constraint unique_track_uri
         unique (spotify_track_uri)
@@ -26,7 +27,10 @@ create table if not exists core.dim_artist
     spotify_artist_uri varchar,
     cover_art_url      text,
     artist_name        text,
-    primary key (artist_id)
+    content_hash       varchar(32),
+    primary key (artist_id),
+    constraint unique_artist_uri
+        unique (spotify_artist_uri)
 );
 
 create table if not exists core.dim_reason
@@ -72,7 +76,10 @@ create table if not exists core.dim_episode
     podcast_name        varchar,
     spotify_podcast_uri varchar,
     release_date        date,
-    primary key (episode_id)
+    content_hash        varchar(32),
+    primary key (episode_id),
+    constraint unique_episode_uri
+        unique (spotify_episode_uri)
 );
 
 create table if not exists core.dim_podcast
@@ -82,13 +89,17 @@ create table if not exists core.dim_podcast
     podcast_name          varchar,
     description           text,
     podcast_cover_art_url varchar,
-    primary key (podcast_id)
+    content_hash          varchar(32),
+    primary key (podcast_id),
+    constraint unique_podcast_uri
+        unique (spotify_podcast_uri)
 );
 
+-- fact tables are partitioned by month on ts_msk, see etl_internal.ensure_monthly_partitions
 create table if not exists core.fact_podcasts_history
 (
     stream_id       serial,
-    ts_msk          timestamp,
+    ts_msk          timestamp not null,
     date_fk         integer,
     time_fk         integer,
     sec_played      integer,
@@ -96,7 +107,7 @@ create table if not exists core.fact_podcasts_history
     podcast_fk      integer,
     reason_start_fk integer,
     reason_end_fk   integer,
-    primary key (stream_id),
+    primary key (stream_id, ts_msk),
     foreign key (date_fk) references core.dim_date,
     foreign key (time_fk) references core.dim_time,
     foreign key (reason_start_fk) references core.dim_reason,
@@ -104,12 +115,12 @@ create table if not exists core.fact_podcasts_history
     foreign key (episode_fk) references core.dim_episode,
     constraint fact_podcasts_history_show_fk_fkey
         foreign key (podcast_fk) references core.dim_podcast
-);
+) partition by range (ts_msk);
 
 create table if not exists core.fact_tracks_history
 (
     stream_id               serial,
-    ts_msk                  timestamp,
+    ts_msk                  timestamp not null,
     date_fk                 integer,
     time_fk                 integer,
     ms_played               integer,
@@ -122,11 +133,11 @@ create table if not exists core.fact_tracks_history
     percent_played          float,
     offline                 boolean,
     offline_timestamp       bigint,
-    primary key (stream_id),
+    primary key (stream_id, ts_msk),
     foreign key (date_fk) references core.dim_date,
     foreign key (time_fk) references core.dim_time,
     foreign key (track_fk) references core.dim_track,
     foreign key (artist_fk) references core.dim_artist,
     foreign key (reason_start_fk) references core.dim_reason,
     foreign key (reason_end_fk) references core.dim_reason
-);
\ No newline at end of file
+) partition by range (ts_msk);
@@ -14,6 +14,9 @@ create table if not exists dm.parent_tracks
     foreign key (child_id) references core.dim_track
 );
 
+-- the aggregate views cover every year and month, so they read every partition whatever the join.
+-- Charts of a single period go through the functions below, which filter on ts_msk.
+
 -- yearly aggregations
 create or replace view dm.yearly_agg as
 select
@@ -59,6 +62,21 @@ select
 from core.fact_tracks_history fh
     join core.dim_date dd on fh.date_fk = dd.date_id;
 
+-- ts_msk range of a year, or of a month within it, or of the whole history without a year.
+-- The top_* functions filter the facts on it instead of dim_date, so the planner skips the partitions outside the period
+create or replace function dm.period_bounds(filter_year int, filter_month int, out ts_from timestamp, out ts_to timestamp)
+language sql
+immutable
+as $$
+    select
+        coalesce(make_date(filter_year, coalesce(filter_month, 1), 1)::timestamp, '-infinity'::timestamp),
+        case
+            when filter_year is null then 'infinity'::timestamp
+            when filter_month is null then make_date(filter_year, 1, 1) + interval '1 year'
+            else make_date(filter_year, filter_month, 1) + interval '1 month'
+        end;
+$$;
+
 -- albums function
 create or replace function dm.top_albums(filter_year int default null, filter_month int default null, return_limit int default 100, filter_artist varchar default null)
 returns table(album varchar, artist varchar, hours_played numeric, raw_play_count int, estimated_full_streams int, full_real_streams int, cover_art text)
@@ -76,10 +94,9 @@ as $$
                 max(dt.cover_art_url) cover_art -- since we don't have an album dim random track cover art should be good enough
             from core.fact_tracks_history h
                 join core.dim_track dt on dt.track_id = h.track_fk
-                join core.dim_date dd on h.date_fk = dd.date_id
                 left join dm.parent_tracks p on h.track_fk = p.child_id
-            where (filter_year is null or dd.year = filter_year)
-                and (filter_month is null or (filter_year is not null and dd.month_num = filter_month))
+            where h.ts_msk >= (dm.period_bounds(filter_year, filter_month)).ts_from
+                and h.ts_msk < (dm.period_bounds(filter_year, filter_month)).ts_to
                 and (filter_artist is null or dt.artist_name = filter_artist)
             group by album, album_artist
             order by hours_played desc
@@ -104,10 +121,9 @@ as $$
                 max(dt.cover_art_url) cover_art
             from core.fact_tracks_history h
                 join core.dim_track dt on dt.track_id = h.track_fk
-                join core.dim_date dd on h.date_fk = dd.date_id
                 left join dm.parent_tracks p on h.track_fk = p.child_id
-            where (filter_year is null or dd.year = filter_year)
-                and (filter_month is null or (filter_year is not null and dd.month_num = filter_month))
+            where h.ts_msk >= (dm.period_bounds(filter_year, filter_month)).ts_from
+                and h.ts_msk < (dm.period_bounds(filter_year, filter_month)).ts_to
                 and (filter_artist is null or dt.artist_name = filter_artist)
             group by track, track_artist
             order by hours_played desc
@@ -130,10 +146,9 @@ as $$
                 count(case when percent_played = 100 then stream_id end)::int full_real_streams,
                 max(da.cover_art_url) cover_art
             from core.fact_tracks_history h
-                join core.dim_date dd on h.date_fk = dd.date_id
                 join core.dim_artist da on h.artist_fk = da.artist_id
-            where (filter_year is null or dd.year = filter_year)
-                and (filter_month is null or (filter_year is not null and dd.month_num = filter_month))
+            where h.ts_msk >= (dm.period_bounds(filter_year, filter_month)).ts_from
+                and h.ts_msk < (dm.period_bounds(filter_year, filter_month)).ts_to
             group by artist
             order by hours_played desc
             limit return_limit;
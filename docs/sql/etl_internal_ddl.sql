@@ -8,4 +8,104 @@ create table if not exists etl_internal.failed_uris
     failed_at      timestamp default CURRENT_TIMESTAMP,
     retry_attempts integer   default 0,
     primary key (uri)
-);
\ No newline at end of file
+);
+
+create table if not exists etl_internal.ingested_files
+(
+    file_path    varchar not null,
+    file_size    bigint  not null,
+    file_mtime   double precision not null,
+    content_hash varchar(64) not null,
+    row_count    integer not null,
+    min_ts       timestamp with time zone,
+    max_ts       timestamp with time zone,
+    ingested_at  timestamp default CURRENT_TIMESTAMP,
+    primary key (file_path)
+);
+
+-- delta boundary of every fact load, moved forward in the same statement that inserts the facts
+create table if not exists etl_internal.load_watermarks
+(
+    target_table varchar not null,
+    max_ts       timestamp,
+    updated_at   timestamp default CURRENT_TIMESTAMP,
+    primary key (target_table)
+);
+
+-- versioned migrations from docs/sql/migrations applied by scripts/run_migrations.py
+create table if not exists etl_internal.schema_migrations
+(
+    version    integer     not null,
+    name       varchar     not null,
+    checksum   varchar(64) not null,
+    applied_at timestamp default CURRENT_TIMESTAMP,
+    primary key (version)
+);
+
+create table if not exists etl_internal.transform_errors
+(
+    entity_type  varchar not null,
+    record_id    integer not null,
+    spotify_uri  varchar,
+    error_reason text    not null,
+    raw_data     jsonb,
+    logged_at    timestamp default CURRENT_TIMESTAMP,
+    primary key (entity_type, record_id)
+);
+
+-- release date normalisation used by the SQL transform engine, same rules as DataTransformer._normalise_date.
+-- Returns NULL for dates that can't be parsed. The formats are matched explicitly instead of catching the cast error,
+-- since an exception block would open a subtransaction for every staged row.
+create or replace function etl_internal.normalise_release_date(release_date text, date_precision text)
+    returns date
+    language sql
+    immutable
+as
+$$
+select case
+           when release_date like '0000%' then date '1900-01-01'
+           -- YYYY, YYYY-MM and YYYY-MM-DD once the precision is applied
+           when full_date !~ '^\d{4}-\d{2}-\d{2}$' then null
+           when substr(full_date, 6, 2)::int not between 1 and 12 then null
+           when substr(full_date, 9, 2)::int not between 1 and
+                extract(day from make_date(substr(full_date, 1, 4)::int, substr(full_date, 6, 2)::int, 1) + interval '1 month - 1 day')
+               then null
+           else make_date(substr(full_date, 1, 4)::int, substr(full_date, 6, 2)::int, substr(full_date, 9, 2)::int)
+       end
+from (select case date_precision
+                 when 'year' then release_date || '-01-01'
+                 when 'month' then release_date || '-01'
+                 else release_date
+             end as full_date) as d;
+$$;
+
+-- creates the missing monthly partitions of a fact table (e.g. core.fact_tracks_history_2024_01) for a ts_msk range.
+-- Tables that aren't partitioned are left alone. Returns the number of partitions created.
+create or replace function etl_internal.ensure_monthly_partitions(parent_table text, from_ts timestamp, to_ts timestamp)
+    returns integer
+    language plpgsql
+as
+$$
+declare
+    month_start    timestamp := date_trunc('month', from_ts);
+    partition_name text;
+    created        integer   := 0;
+begin
+    if not exists (select 1 from pg_partitioned_table where partrelid = to_regclass(parent_table)) then
+        return 0;
+    end if;
+
+    while month_start <= to_ts
+        loop
+            partition_name := parent_table || '_' || to_char(month_start, 'YYYY_MM');
+            if to_regclass(partition_name) is null then
+                execute format('create table %s partition of %s for values from (%L) to (%L)',
+                               partition_name, parent_table, month_start, month_start + interval '1 month');
+                created := created + 1;
+            end if;
+            month_start := month_start + interval '1 month';
+        end loop;
+
+    return created;
+end;
+$$;
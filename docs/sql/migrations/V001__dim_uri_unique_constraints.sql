@@ -0,0 +1,75 @@
+-- unique Spotify URIs on dim_artist, dim_episode and dim_podcast, like unique_track_uri on dim_track.
+-- Duplicated URIs keep their lowest id, the facts pointing at the other rows are repointed to it before they are deleted.
+
+-- dim_artist
+with duplicates as (
+    select artist_id, min(artist_id) over (partition by spotify_artist_uri) as keep_id
+    from core.dim_artist
+    where spotify_artist_uri is not null
+)
+update core.fact_tracks_history f
+set artist_fk = d.keep_id
+from duplicates d
+where f.artist_fk = d.artist_id
+  and d.artist_id <> d.keep_id;
+
+delete from core.dim_artist a
+    using core.dim_artist b
+where a.spotify_artist_uri = b.spotify_artist_uri
+  and a.artist_id > b.artist_id;
+
+-- dim_episode
+with duplicates as (
+    select episode_id, min(episode_id) over (partition by spotify_episode_uri) as keep_id
+    from core.dim_episode
+    where spotify_episode_uri is not null
+)
+update core.fact_podcasts_history f
+set episode_fk = d.keep_id
+from duplicates d
+where f.episode_fk = d.episode_id
+  and d.episode_id <> d.keep_id;
+
+delete from core.dim_episode a
+    using core.dim_episode b
+where a.spotify_episode_uri = b.spotify_episode_uri
+  and a.episode_id > b.episode_id;
+
+-- dim_podcast
+with duplicates as (
+    select podcast_id, min(podcast_id) over (partition by spotify_podcast_uri) as keep_id
+    from core.dim_podcast
+    where spotify_podcast_uri is not null
+)
+update core.fact_podcasts_history f
+set podcast_fk = d.keep_id
+from duplicates d
+where f.podcast_fk = d.podcast_id
+  and d.podcast_id <> d.keep_id;
+
+delete from core.dim_podcast a
+    using core.dim_podcast b
+where a.spotify_podcast_uri = b.spotify_podcast_uri
+  and a.podcast_id > b.podcast_id;
+
+-- constraints, skipped when core_ddl.sql already created them
+do
+$$
+    begin
+        if not exists (select 1 from pg_constraint where conname = 'unique_artist_uri') then
+            alter table core.dim_artist add constraint unique_artist_uri unique (spotify_artist_uri);
+        end if;
+        if not exists (select 1 from pg_constraint where conname = 'unique_episode_uri') then
+            alter table core.dim_episode add constraint unique_episode_uri unique (spotify_episode_uri);
+        end if;
+        if not exists (select 1 from pg_constraint where conname = 'unique_podcast_uri') then
+            alter table core.dim_podcast add constraint unique_podcast_uri unique (spotify_podcast_uri);
+        end if;
+    end
+$$;
+
+-- plain URI indexes created by core_ddl.sql for the new URI anti-join (NEW_ITEMS_ANTI_JOIN) before this migration,
+-- the unique constraints above replace them
+drop index if exists core.dim_artist_uri_idx;
+drop index if exists core.dim_episode_uri_idx;
+drop index if exists core.dim_podcast_uri_idx;
@@ -0,0 +1,16 @@
+-- indexes for the lookups of the transform and delta paths.
+
+-- unprocessed rows read by DataTransformer.process_staged_batches and marked as processed by record_id
+create index if not exists spotify_tracks_data_unprocessed_idx on staging.spotify_tracks_data (record_id) where is_processed = false;
+create index if not exists spotify_episodes_data_unprocessed_idx on staging.spotify_episodes_data (record_id) where is_processed = false;
+create index if not exists spotify_artists_data_unprocessed_idx on staging.spotify_artists_data (record_id) where is_processed = false;
+create index if not exists spotify_podcasts_data_unprocessed_idx on staging.spotify_podcasts_data (record_id) where is_processed = false;
+
+-- staged URIs looked up by the new URI anti-join
+create index if not exists spotify_tracks_data_uri_idx on staging.spotify_tracks_data (spotify_track_uri);
+create index if not exists spotify_episodes_data_uri_idx on staging.spotify_episodes_data (spotify_episode_uri);
+create index if not exists spotify_artists_data_uri_idx on staging.spotify_artists_data (spotify_artist_uri);
+create index if not exists spotify_podcasts_data_uri_idx on staging.spotify_podcasts_data (spotify_podcast_uri);
+
+-- streams past the load watermark read by the fact loads
+create index if not exists streaming_history_ts_idx on staging.streaming_history (ts);
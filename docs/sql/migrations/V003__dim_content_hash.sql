@@ -0,0 +1,24 @@
+-- content hash of the cleaned row for the SCD1 upsert (DIM_LOAD_MODE=upsert).
+-- Existing rows are hashed with the same expression as the loads, so the first upsert only rewrites real changes.
+
+alter table core.dim_track add column if not exists content_hash varchar(32);
+alter table core.dim_artist add column if not exists content_hash varchar(32);
+alter table core.dim_episode add column if not exists content_hash varchar(32);
+alter table core.dim_podcast add column if not exists content_hash varchar(32);
+
+update core.dim_track
+set content_hash = md5(jsonb_build_array(spotify_track_uri, track_title, cover_art_url, album_name, album_spotify_id, album_type,
+                                         artist_name, spotify_artist_uri, release_date, duration_ms, duration_sec)::text)
+where content_hash is null;
+
+update core.dim_artist
+set content_hash = md5(jsonb_build_array(spotify_artist_uri, cover_art_url, artist_name)::text)
+where content_hash is null;
+
+update core.dim_episode
+set content_hash = md5(jsonb_build_array(spotify_episode_uri, duration_ms, duration_sec, podcast_name, spotify_podcast_uri, release_date)::text)
+where content_hash is null;
+
+update core.dim_podcast
+set content_hash = md5(jsonb_build_array(spotify_podcast_uri, podcast_name, description, podcast_cover_art_url)::text)
+where content_hash is null;
@@ -0,0 +1,72 @@
+-- converts fact tables created before partitioning into tables partitioned by month on ts_msk, like core_ddl.sql.
+-- Every table is rebuilt under its name: the old table is renamed, a partitioned copy is created with its partitions,
+-- the rows are moved and the old table is dropped. Tables that are already partitioned are skipped.
+-- Needs etl_internal.ensure_monthly_partitions, run etl_internal_ddl.sql first. The dm views read the old tables,
+-- they are dropped here and recreated by running dm_ddl.sql afterwards.
+
+drop view if exists dm.yearly_agg;
+drop view if exists dm.monthly_agg;
+drop view if exists dm.all_time_agg;
+
+-- fact_tracks_history
+do
+$$
+    begin
+        if exists (select 1 from pg_partitioned_table where partrelid = 'core.fact_tracks_history'::regclass) then
+            return;
+        end if;
+
+        alter table core.fact_tracks_history rename to fact_tracks_history_unpartitioned;
+        alter table core.fact_tracks_history_unpartitioned rename constraint fact_tracks_history_pkey to fact_tracks_history_unpartitioned_pkey;
+
+        -- including defaults keeps stream_id on the existing sequence
+        create table core.fact_tracks_history (like core.fact_tracks_history_unpartitioned including defaults) partition by range (ts_msk);
+        alter table core.fact_tracks_history
+            alter column ts_msk set not null,
+            add primary key (stream_id, ts_msk),
+            add foreign key (date_fk) references core.dim_date,
+            add foreign key (time_fk) references core.dim_time,
+            add foreign key (track_fk) references core.dim_track,
+            add foreign key (artist_fk) references core.dim_artist,
+            add foreign key (reason_start_fk) references core.dim_reason,
+            add foreign key (reason_end_fk) references core.dim_reason;
+        alter sequence core.fact_tracks_history_stream_id_seq owned by core.fact_tracks_history.stream_id;
+
+        perform etl_internal.ensure_monthly_partitions('core.fact_tracks_history', min(ts_msk), max(ts_msk))
+        from core.fact_tracks_history_unpartitioned;
+
+        insert into core.fact_tracks_history select * from core.fact_tracks_history_unpartitioned;
+        drop table core.fact_tracks_history_unpartitioned;
+    end
+$$;
+
+-- fact_podcasts_history
+do
+$$
+    begin
+        if exists (select 1 from pg_partitioned_table where partrelid = 'core.fact_podcasts_history'::regclass) then
+            return;
+        end if;
+
+        alter table core.fact_podcasts_history rename to fact_podcasts_history_unpartitioned;
+        alter table core.fact_podcasts_history_unpartitioned rename constraint fact_podcasts_history_pkey to fact_podcasts_history_unpartitioned_pkey;
+
+        create table core.fact_podcasts_history (like core.fact_podcasts_history_unpartitioned including defaults) partition by range (ts_msk);
+        alter table core.fact_podcasts_history
+            alter column ts_msk set not null,
+            add primary key (stream_id, ts_msk),
+            add foreign key (date_fk) references core.dim_date,
+            add foreign key (time_fk) references core.dim_time,
+            add foreign key (reason_start_fk) references core.dim_reason,
+            add foreign key (reason_end_fk) references core.dim_reason,
+            add foreign key (episode_fk) references core.dim_episode,
+            add constraint fact_podcasts_history_show_fk_fkey foreign key (podcast_fk) references core.dim_podcast;
+        alter sequence core.fact_podcasts_history_stream_id_seq owned by core.fact_podcasts_history.stream_id;
+
+        perform etl_internal.ensure_monthly_partitions('core.fact_podcasts_history', min(ts_msk), max(ts_msk))
+        from core.fact_podcasts_history_unpartitioned;
+
+        insert into core.fact_podcasts_history select * from core.fact_podcasts_history_unpartitioned;
+        drop table core.fact_podcasts_history_unpartitioned;
+    end
+$$;
@@ -57,3 +57,18 @@ create table staging.spotify_podcasts_data
     is_processed        boolean   default false
 );
 
+
+-- indexes used by the new URI anti-join in DatabaseManager.iter_new_uris
+create index if not exists spotify_tracks_data_uri_idx on staging.spotify_tracks_data (spotify_track_uri);
+create index if not exists spotify_episodes_data_uri_idx on staging.spotify_episodes_data (spotify_episode_uri);
+create index if not exists spotify_artists_data_uri_idx on staging.spotify_artists_data (spotify_artist_uri);
+create index if not exists spotify_podcasts_data_uri_idx on staging.spotify_podcasts_data (spotify_podcast_uri);
+
+-- unprocessed rows read by the transformer and marked as processed by record_id
+create index if not exists spotify_tracks_data_unprocessed_idx on staging.spotify_tracks_data (record_id) where is_processed = false;
+create index if not exists spotify_episodes_data_unprocessed_idx on staging.spotify_episodes_data (record_id) where is_processed = false;
+create index if not exists spotify_artists_data_unprocessed_idx on staging.spotify_artists_data (record_id) where is_processed = false;
+create index if not exists spotify_podcasts_data_unprocessed_idx on staging.spotify_podcasts_data (record_id) where is_processed = false;
+
+-- streams past the load watermark read by the fact loads
+create index if not exists streaming_history_ts_idx on staging.streaming_history (ts);
@@ -1,15 +1,48 @@
 import psycopg2
+import psycopg2.extensions
 from psycopg2.extras import execute_values, Json
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+import io
+import ipaddress
+import json
+import struct
+import threading
+import time
+import uuid
 from config.config import settings
 from logging import Logger
-from datetime import datetime, timezone
+from datetime import date, datetime, time as dt_time, timezone
 from contextlib import contextmanager
+from functools import wraps
+
+
+# fact tables whose delta loads are tracked in etl_internal.load_watermarks
+LOAD_WATERMARK_TABLES = ["core.fact_tracks_history", "core.fact_podcasts_history"]
+
+
+def with_connection(method):
+    """Runs the method on a checked out connection, see DatabaseManager.checkout."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.checkout():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DatabaseManager:
-    def __init__(self, logger:Logger):
-        self.connection = None
-        self.cursor = None
+    def __init__(self, logger:Logger, pool_size:int = None):
         self.logger = logger
+        # with more than one connection the manager runs in pooled mode and every thread checks out its own connection
+        self.pool_size = settings.DB_POOL_SIZE if pool_size is None else pool_size
+        self.pool = None
+        self._pool_slots = threading.BoundedSemaphore(self.pool_size)
+        self._connection = None
+        self._cursor = None
+        self._local = threading.local()
+        # connection id -> time of the last health check
+        self._checked_at = {}
+        # serializes use of the shared connection when the pipeline runs threads without a pool
+        self.lock = threading.RLock()
         self.connect()
 
     def __enter__(self): # for a context manager
@@ -18,14 +51,149 @@ class DatabaseManager:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    @property
+    def connection(self):
+        """The shared connection, or in pooled mode the connection checked out by the current thread."""
+        if self.pool is None:
+            return self._connection
+        return getattr(self._local, "connection", None)
+
+    @property
+    def cursor(self):
+        """The cursor of `connection`, reused by every statement run on it."""
+        if self.pool is None:
+            return self._cursor
+        return getattr(self._local, "cursor", None)
+
     def connect(self):
-        """Establish a database connection using DATABASE_URL."""
+        """
+        Establish a database connection using DATABASE_URL, or a connection pool in pooled mode.
+        Failed attempts are retried with an exponential backoff.
+
+        Raises:
+            psycopg2.OperationalError: if the database can't be reached after settings.DB_CONNECT_RETRIES attempts
+        """
+        for attempt in range(1, settings.DB_CONNECT_RETRIES + 1):
+            try:
+                if self.pool_size > 1:
+                    self.pool = ThreadedConnectionPool(1, self.pool_size, settings.DATABASE_URL)
+                else:
+                    self._connection = psycopg2.connect(settings.DATABASE_URL)
+                    self._cursor = self._connection.cursor()
+                return
+            except Exception as e:
+                self.logger.error(f"Error connecting to database on attempt {attempt}: {e.__str__()}")
+                if attempt < settings.DB_CONNECT_RETRIES:
+                    time.sleep(settings.DB_CONNECT_RETRY_DELAY * 2 ** (attempt - 1))
+
+        raise psycopg2.OperationalError(f"Could not connect to the database after {settings.DB_CONNECT_RETRIES} attempts")
+
+    @contextmanager
+    def checkout(self):
+        """
+        Binds a healthy connection and its cursor to the current thread for the duration of the block.
+        Nested checkouts reuse the outer connection. Without a pool the shared connection is used
+        under the manager's lock and reconnected if it was lost.
+
+        Yields:
+            connection: the checked out connection
+        """
+        if self.pool is None:
+            with self.lock:
+                if not self._is_healthy(self._connection):
+                    self._reconnect()
+                yield self._connection
+            return
+
+        if getattr(self._local, "connection", None) is not None:
+            yield self._local.connection
+            return
+
+        connection = self._getconn()
+        self._local.connection = connection
+        self._local.cursor = connection.cursor()
         try:
-            self.connection = psycopg2.connect(settings.DATABASE_URL)
-            self.cursor = self.connection.cursor()
-        except Exception as e:
-            self.logger.error(f"Error connecting to database: {e.__str__()}")
+            yield connection
+        finally:
+            if not connection.closed:
+                self._local.cursor.close()
+            self._local.connection = None
+            self._local.cursor = None
+            self._putconn(connection)
+
+    def _getconn(self):
+        """
+        Takes a healthy connection from the pool, waiting for a free one if all are checked out.
+
+        Raises:
+            PoolError: if no connection became free within settings.DB_POOL_TIMEOUT seconds
+        """
+        if not self._pool_slots.acquire(timeout=settings.DB_POOL_TIMEOUT):
+            message = f"No pooled connection became free within {settings.DB_POOL_TIMEOUT} seconds, all {self.pool_size} are checked out. Raise DB_POOL_SIZE or use fewer workers"
+            self.logger.error(message)
+            raise PoolError(message)
+        try:
+            for _ in range(settings.DB_CONNECT_RETRIES):
+                connection = self.pool.getconn()
+                if self._is_healthy(connection):
+                    return connection
+                self.logger.warning("Discarding a broken pooled connection")
+                self.pool.putconn(connection, close=True)
+        except Exception:
+            self._pool_slots.release()
+            raise
+
+        self._pool_slots.release()
+        raise psycopg2.OperationalError("Could not get a healthy connection from the pool")
+
+    def _putconn(self, connection):
+        self.pool.putconn(connection, close=bool(connection.closed))
+        self._pool_slots.release()
+
+    def _is_healthy(self, connection) -> bool:
+        """
+        Checks that a connection is open. An idle connection that was not checked for
+        settings.DB_HEALTH_CHECK_INTERVAL seconds is also pinged with SELECT 1.
+        """
+        if connection is None or connection.closed:
+            return False
+        # a connection inside a transaction is in use, pinging would end the transaction
+        if connection.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return True
+
+        now = time.monotonic()
+        if now - self._checked_at.get(id(connection), float("-inf")) < settings.DB_HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            connection.rollback()
+        except psycopg2.Error as e:
+            self.logger.warning(f"Database connection health check failed: {e}")
+            return False
+
+        self._checked_at[id(connection)] = now
+        return True
+
+    def _reconnect(self):
+        """Replaces the lost shared connection."""
+        self.logger.warning("Database connection lost, reconnecting")
+        try:
+            if self._connection is not None and not self._connection.closed:
+                self._connection.close()
+        except psycopg2.Error:
+            pass
+        self._connection = None
+        self._cursor = None
+        self.connect()
 
+    def _rollback(self):
+        """Rolls back the current transaction, unless the connection is already gone."""
+        connection = self.connection
+        if connection is not None and not connection.closed:
+            connection.rollback()
+
+    @with_connection
     def execute_query(self, query, params=None, manual_fetch:bool=False):
         """
         Execute a single query.
@@ -49,57 +217,136 @@ class DatabaseManager:
             
         except Exception as e:
             self.logger.error(f"Error executing query: {e}")
-            self.connection.rollback()
+            self._rollback()
             return None
 
-    def bulk_insert(self, table_name, columns, records, wrap_json:bool = False):
-        """Insert multiple rows using execute_values.
+    @with_connection
+    def bulk_insert(self, table_name, columns, records, wrap_json:bool = False) -> tuple[int, int]:
+        """Insert multiple rows using execute_values, or COPY if settings.BULK_LOAD_METHOD is 'copy'.
     
         Args:
             table_name (str): Target table name.
             columns (list): List of columns to insert into.
             records (list): List of record tuples.
             wrap_json (bool): If True, wrap dictionary values with psycopg2.extras.Json.
+
+        Returns:
+            tuple[int, int]: (number of inserted rows, number of rows skipped due to conflicts)
         """
         if not records:
             self.logger.warning("No records to insert.")
-            return
+            return 0, 0
+
+        if settings.BULK_LOAD_METHOD == "copy":
+            return self.copy_insert(table_name, columns, records, wrap_json=wrap_json, copy_format=settings.COPY_FORMAT)
         
         if wrap_json:
             # also include the item's uri as id
             records = [(item.get("uri"), Json(item),) for item in records]
 
-        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s ON CONFLICT DO NOTHING"
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s ON CONFLICT DO NOTHING RETURNING 1"
         try:
-            execute_values(self.cursor, query, records)
+            inserted = len(execute_values(self.cursor, query, records, fetch=True))
             self.connection.commit()
+            return inserted, len(records) - inserted
         except Exception as e:
             self.logger.error(f"Error in bulk insert: {e}")
-            self.connection.rollback()
+            self._rollback()
             raise
 
-    def close(self):
-        """Close the database connection."""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
+    @with_connection
+    def copy_insert(self, table_name, columns, records, wrap_json:bool = False, copy_format:str = "text", on_conflict:bool = True, commit:bool = True) -> tuple[int, int]:
+        """Insert rows with COPY FROM STDIN, streaming them from any iterable.
+
+        With `on_conflict` the rows are copied into a temp table first and moved with
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING, otherwise they are copied straight into the target.
+
+        Args:
+            table_name (str): Target table name.
+            columns (list): List of columns to insert into.
+            records (Iterable): Record tuples, or dictionaries if wrap_json is True.
+            wrap_json (bool): If True, store each dictionary as (uri, jsonb) like bulk_insert does.
+            copy_format (str): `text` or `binary`.
+            on_conflict (bool): If True, skip rows violating a unique constraint instead of failing.
+            commit (bool): If False, leave the transaction open, e.g. to finish it inside DatabaseManager.transaction.
+
+        Returns:
+            tuple[int, int]: (number of inserted rows, number of rows skipped due to conflicts)
+        """
+        if copy_format not in ["text", "binary"]:
+            raise ValueError(f"Invalid copy_format. Must be: text or binary. Instead {copy_format} passed")
+
+        if wrap_json:
+            records = ((item.get("uri"), item) for item in records)
 
-    @contextmanager
-    def transaction(self):
-        cursor = None
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("BEGIN;")
-            yield cursor
-            self.connection.commit()
+            if copy_format == "binary":
+                column_types = self._get_column_types(table_name, columns)
+                unsupported = sorted({column_type for column_type in column_types if not _supports_binary(column_type)})
+                if unsupported:
+                    # checked before any row is streamed, so nothing is half copied
+                    self.logger.warning(f"Binary COPY does not support {', '.join(unsupported)} columns of {table_name}, using the text format")
+                    copy_format = "text"
+
+            if copy_format == "binary":
+                stream = _CopyStream(records, lambda row: _encode_binary_row(row, column_types), header=_BINARY_HEADER, trailer=_BINARY_TRAILER)
+            else:
+                stream = _CopyStream(records, _encode_text_row)
+
+            copy_columns = ", ".join(columns)
+            if on_conflict:
+                temp_table = f"_copy_{table_name.replace('.', '_')}"
+                self.cursor.execute(f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS SELECT {copy_columns} FROM {table_name} WITH NO DATA;")
+                self.cursor.copy_expert(f"COPY {temp_table} ({copy_columns}) FROM STDIN WITH (FORMAT {copy_format})", stream)
+                self.cursor.execute(f"INSERT INTO {table_name} ({copy_columns}) SELECT {copy_columns} FROM {temp_table} ON CONFLICT DO NOTHING;")
+                inserted = self.cursor.rowcount
+            else:
+                self.cursor.copy_expert(f"COPY {table_name} ({copy_columns}) FROM STDIN WITH (FORMAT {copy_format})", stream)
+                inserted = stream.row_count
+            if commit:
+                self.connection.commit()
+
         except Exception as e:
-            self.connection.rollback()
-            self.logger.error(f"Transaction error: {e}")
+            self.logger.error(f"Error in copy insert: {e}")
+            self._rollback()
             raise
-        finally:
-            if cursor:
-                cursor.close()
+
+        skipped = stream.row_count - inserted
+        if stream.row_count == 0:
+            self.logger.warning("No records to insert.")
+        return inserted, skipped
+
+    def _get_column_types(self, table_name:str, columns:list) -> list:
+        """Returns the type names of the given columns, in the same order."""
+        self.cursor.execute(
+            "SELECT attname, format_type(atttypid, NULL) FROM pg_attribute WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped;",
+            (table_name,)
+        )
+        types = dict(self.cursor.fetchall())
+        return [types[column] for column in columns]
+
+    def close(self):
+        """Close the database connection, or every connection of the pool."""
+        if self.pool is not None:
+            self.pool.closeall()
+            return
+        if self._cursor and not self._cursor.closed:
+            self._cursor.close()
+        if self._connection:
+            self._connection.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.checkout():
+            try:
+                cursor = self.cursor
+                cursor.execute("BEGIN;")
+                yield cursor
+                self.connection.commit()
+            except Exception as e:
+                self._rollback()
+                self.logger.error(f"Transaction error: {e}")
+                raise
 
     def get_distinct_uri(self, uri_type:str, table:str):
         """
@@ -121,6 +368,123 @@ class DatabaseManager:
         
         return [row[0] for row in result if row[0] is not None]
     
+    def iter_query(self, query, params=None, batch_size:int = 1000):
+        """
+        Streams the result of a SELECT query through a named server-side cursor.
+
+        The cursor runs in a read-only transaction of its own on a dedicated connection, so rows are sent as they
+        are fetched and commits made by the consumer on other connections don't close it.
+
+        Args:
+            query (str): SQL query to execute
+            params (tuple): params to insert into the query, None by default
+            batch_size (int): Number of rows fetched per round trip
+
+        Yields:
+            list: the next batch of rows
+        """
+        with self._stream_connection() as connection:
+            cursor = connection.cursor(name=f"stream_{uuid.uuid4().hex}")
+            cursor.itersize = batch_size
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+            except Exception as e:
+                self.logger.error(f"Error executing query: {e}")
+                raise
+            finally:
+                if not connection.closed:
+                    cursor.close()
+                    # nothing was written, ending the transaction releases the snapshot
+                    connection.rollback()
+
+    @contextmanager
+    def _stream_connection(self):
+        """
+        Dedicated connection for a cursor that stays open while its consumer writes on other connections.
+        In pooled mode it is taken from the pool, otherwise a short-lived connection is opened next to the shared one.
+        """
+        if self.pool is None:
+            connection = psycopg2.connect(settings.DATABASE_URL)
+            try:
+                yield connection
+            finally:
+                connection.close()
+            return
+
+        connection = self._getconn()
+        try:
+            yield connection
+        finally:
+            self._putconn(connection)
+
+    def iter_new_uris(self, uri_type:str, batch_size:int = 1000):
+        """
+        Streams the URIs referenced by the staged data that are neither in the core dimension nor already staged.
+        The set difference runs in the database as an anti-join, so only the delta is transferred.
+
+        Params:
+            uri_type (str): Either 'track', 'artist', 'podcast' or 'episode'
+            batch_size (int): Number of rows fetched per round trip
+
+        Yields:
+            list: (uri, in_backoff) rows, in_backoff is True for failed URIs still waiting for their next retry
+        """
+        if uri_type in ["track", "episode"]:
+            source = f"SELECT DISTINCT spotify_{uri_type}_uri AS uri FROM staging.streaming_history"
+        elif uri_type == "artist":
+            source = "SELECT DISTINCT artists ->> 'uri' AS uri FROM staging.spotify_tracks_data t, jsonb_array_elements(raw_data -> 'artists') AS artists"
+        elif uri_type == "podcast":
+            source = "SELECT DISTINCT raw_data -> 'show' ->> 'uri' AS uri FROM staging.spotify_episodes_data"
+        else:
+            raise ValueError(f"Invalid uri_type. Must be: track, episode, artist, or podcast. Instead {uri_type} passed")
+
+        query = self._new_uri_query(uri_type, source)
+        yield from self.iter_query(query, (uri_type, settings.FAILED_URI_BACKOFF_HOURS), batch_size)
+
+    def filter_new_uris(self, uri_type:str, uris:list) -> list:
+        """
+        Keeps only the given URIs that are neither in the core dimension nor already staged,
+        and are not failed URIs waiting for their next retry.
+
+        Params:
+            uri_type (str): Either 'track', 'artist', 'podcast' or 'episode'
+            uris (list): URIs to check
+
+        Returns:
+            list: URIs that still need to be fetched
+        """
+        query = self._new_uri_query(uri_type, "SELECT DISTINCT unnest(%s::text[]) AS uri")
+        result = self.execute_query(query, (uri_type, settings.FAILED_URI_BACKOFF_HOURS, list(uris)))
+        return [uri for uri, in_backoff in result or [] if not in_backoff]
+
+    def _new_uri_query(self, uri_type:str, source:str) -> str:
+        """
+        Builds the anti-join that selects the URIs of `source` missing from the core dimension and staging.
+        The query takes the uri type and the failed URI backoff hours as its first two params.
+
+        Returns:
+            str: query returning (uri, in_backoff) rows
+        """
+        return f"""
+            SELECT
+                n.uri,
+                EXISTS (
+                    SELECT 1 FROM etl_internal.failed_uris f
+                    WHERE f.uri = n.uri
+                        AND f.entity_type = %s
+                        AND f.failed_at + make_interval(hours => %s) * power(2, LEAST(f.retry_attempts, 10)) > CURRENT_TIMESTAMP
+                ) AS in_backoff
+            FROM ({source}) n
+            WHERE n.uri IS NOT NULL
+                AND NOT EXISTS (SELECT 1 FROM core.dim_{uri_type} d WHERE d.spotify_{uri_type}_uri = n.uri)
+                AND NOT EXISTS (SELECT 1 FROM staging.spotify_{uri_type}s_data s WHERE s.spotify_{uri_type}_uri = n.uri);
+        """
+
     def get_staged_uri_from_json(self, uri_type:str):
         
         if uri_type == "artist":
@@ -136,13 +500,169 @@ class DatabaseManager:
 
         return [row[0] for row in result]
     
+    def log_failed_uris(self, records:list):
+        """
+        Records URIs the API failed to return. A URI that failed before gets its retry_attempts
+        incremented and its failed_at reset, which extends its backoff window.
+
+        Args:
+            records (list): (uri, entity_type, error_reason) tuples
+        """
+        if not records:
+            return
+
+        query = """
+            INSERT INTO etl_internal.failed_uris (uri, entity_type, error_reason) VALUES %s
+            ON CONFLICT (uri) DO UPDATE SET
+                error_reason = EXCLUDED.error_reason,
+                failed_at = CURRENT_TIMESTAMP,
+                retry_attempts = etl_internal.failed_uris.retry_attempts + 1;
+        """
+        with self.checkout():
+            try:
+                # the same URI can't be updated twice by one statement
+                execute_values(self.cursor, query, list({record[0]: record for record in records}.values()))
+                self.connection.commit()
+            except Exception as e:
+                self.logger.error(f"Error logging failed URIs: {e}")
+                self._rollback()
+                raise
+
+    def get_backoff_failed_uris(self, uri_type:str) -> list:
+        """
+        Fetches failed URIs that are still inside their retry backoff window. The window starts at
+        settings.FAILED_URI_BACKOFF_HOURS and doubles with every failed retry.
+
+        Params:
+            uri_type (str): Either 'track', 'artist', 'podcast' or 'episode'
+
+        Returns:
+            list: URIs that should not be requested in this run
+        """
+        result = self.execute_query(
+            """
+            SELECT uri FROM etl_internal.failed_uris
+            WHERE entity_type = %s
+                AND failed_at + make_interval(hours => %s) * power(2, LEAST(retry_attempts, 10)) > CURRENT_TIMESTAMP;
+            """,
+            (uri_type, settings.FAILED_URI_BACKOFF_HOURS)
+        )
+        return [row[0] for row in result or []]
+
+    def get_file_manifest(self) -> dict:
+        """
+        Returns the manifest of already ingested export files.
+
+        Returns:
+            dict: file path -> dict with file_size, file_mtime, content_hash, row_count, min_ts and max_ts
+        """
+        result = self.execute_query("SELECT file_path, file_size, file_mtime, content_hash, row_count, min_ts, max_ts FROM etl_internal.ingested_files;")
+        if result is None:
+            return {}
+
+        keys = ["file_size", "file_mtime", "content_hash", "row_count", "min_ts", "max_ts"]
+        return {row[0]: dict(zip(keys, row[1:])) for row in result}
+
+    def upsert_file_manifest(self, file_info:dict):
+        """
+        Records an ingested export file in the manifest, replacing the previous entry for the same path.
+
+        Args:
+            file_info (dict): file_path, file_size, file_mtime, content_hash, row_count, min_ts and max_ts of the file
+        """
+        self.execute_query(
+            """
+            INSERT INTO etl_internal.ingested_files (file_path, file_size, file_mtime, content_hash, row_count, min_ts, max_ts)
+            VALUES (%(file_path)s, %(file_size)s, %(file_mtime)s, %(content_hash)s, %(row_count)s, %(min_ts)s, %(max_ts)s)
+            ON CONFLICT (file_path) DO UPDATE SET
+                file_size = EXCLUDED.file_size,
+                file_mtime = EXCLUDED.file_mtime,
+                content_hash = EXCLUDED.content_hash,
+                row_count = EXCLUDED.row_count,
+                min_ts = EXCLUDED.min_ts,
+                max_ts = EXCLUDED.max_ts,
+                ingested_at = CURRENT_TIMESTAMP;
+            """,
+            file_info
+        )
+
+    def ensure_load_watermarks(self):
+        """Creates the load watermarks that don't exist yet from the fact tables, see rebuild_load_watermarks."""
+        self.rebuild_load_watermarks(only_missing=True)
+
+    def rebuild_load_watermarks(self, only_missing:bool = False):
+        """
+        Recomputes the load watermarks in etl_internal.load_watermarks from a full scan of the fact tables.
+        The fact loads keep them up to date, this is for the first run and for recovery.
+
+        Params:
+            only_missing (bool): Only create the watermarks of fact tables that don't have one, without scanning the others
+        """
+        with self.transaction() as cursor:
+            for table in LOAD_WATERMARK_TABLES:
+                cursor.execute(
+                    f"""
+                    INSERT INTO etl_internal.load_watermarks (target_table, max_ts)
+                    SELECT %(table)s, (SELECT MAX(ts_msk AT TIME ZONE 'Europe/Moscow' AT TIME ZONE 'UTC') FROM {table})
+                    {"WHERE NOT EXISTS (SELECT 1 FROM etl_internal.load_watermarks WHERE target_table = %(table)s)" if only_missing else ""}
+                    ON CONFLICT (target_table) DO UPDATE SET
+                        max_ts = EXCLUDED.max_ts,
+                        updated_at = CURRENT_TIMESTAMP;
+                    """,
+                    {"table": table}
+                )
+                if cursor.rowcount:
+                    self.logger.info(f"Rebuilt the load watermark of {table}")
+
+    def ensure_fact_partitions(self, target_table:str) -> int:
+        """
+        Creates the monthly partitions a fact table needs for the staged streams past its load watermark,
+        so the next fact load never hits a month without a partition.
+
+        Params:
+            target_table (str): One of LOAD_WATERMARK_TABLES
+
+        Returns:
+            int: Number of partitions created
+        """
+        if target_table not in LOAD_WATERMARK_TABLES:
+            raise ValueError(f"Invalid fact table. Must be one of {LOAD_WATERMARK_TABLES}. Instead {target_table} passed")
+
+        with self.transaction() as cursor:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass);", (target_table,))
+            if not cursor.fetchone()[0]:
+                self.logger.warning(f"{target_table} is not partitioned, it was created before partitioning. Run `python -m scripts.run_migrations` to convert it")
+                return 0
+
+            cursor.execute(
+                """
+                SELECT etl_internal.ensure_monthly_partitions(
+                    %(table)s,
+                    MIN(ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow'),
+                    MAX(ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow')
+                )
+                FROM staging.streaming_history
+                WHERE ts > COALESCE(
+                    (SELECT max_ts FROM etl_internal.load_watermarks WHERE target_table = %(table)s),
+                    '1900-01-01'::timestamp
+                );
+                """,
+                {"table": target_table}
+            )
+            created = cursor.fetchone()[0]
+
+        if created:
+            self.logger.info(f"Created {created} monthly partitions of {target_table}")
+        return created
+
     def get_max_history_ts(self):
-        """Returns the latest date from the core and staged streaming history"""
+        """Returns the latest date from the core load watermarks and staged streaming history"""
+        self.ensure_load_watermarks()
         max_ts = self.execute_query(
             """
             SELECT GREATEST(
-                (SELECT MAX(ts_msk AT TIME ZONE 'Europe/Moscow' AT TIME ZONE 'UTC') FROM core.fact_tracks_history),
-                (SELECT MAX(ts_msk AT TIME ZONE 'Europe/Moscow' AT TIME ZONE 'UTC') FROM core.fact_podcasts_history),
+                (SELECT max_ts FROM etl_internal.load_watermarks WHERE target_table = 'core.fact_tracks_history'),
+                (SELECT max_ts FROM etl_internal.load_watermarks WHERE target_table = 'core.fact_podcasts_history'),
                 (SELECT MAX(ts) FROM staging.streaming_history)
             ) AS max_msk_timestamp;
             """
@@ -150,4 +670,167 @@ class DatabaseManager:
         if max_ts == None:
             max_ts = datetime(1900, 1, 1, tzinfo=timezone.utc)
 
-        return max_ts
\ No newline at end of file
+        return max_ts
+
+
+# COPY helpers
+
+_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_BINARY_TRAILER = struct.pack("!h", -1)
+_END_OF_ROWS = object()
+
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _to_json(value) -> str:
+    return json.dumps(value.adapted if isinstance(value, Json) else value)
+
+
+def _encode_text_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list, Json)):
+        value = _to_json(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).translate(_TEXT_ESCAPES)
+
+
+def _encode_text_row(row) -> bytes:
+    return ("\t".join(_encode_text_value(value) for value in row) + "\n").encode("utf-8")
+
+
+# struct formats for fixed size binary types
+_BINARY_FORMATS = {
+    "smallint": "!h",
+    "integer": "!i",
+    "bigint": "!q",
+    "boolean": "!?",
+    "double precision": "!d",
+    "real": "!f",
+}
+
+
+# date and time types are stored relative to 2000-01-01
+_POSTGRES_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+_POSTGRES_EPOCH_DATE = date(2000, 1, 1)
+
+# address families of the inet binary format
+_PGSQL_AF_INET = 2
+_PGSQL_AF_INET6 = 3
+
+
+def _to_datetime(value) -> datetime:
+    # export timestamps are strings like 2021-01-01T00:00:00Z
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+
+def _microseconds(delta) -> int:
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _encode_timestamptz(value) -> bytes:
+    value = _to_datetime(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return struct.pack("!q", _microseconds(value - _POSTGRES_EPOCH))
+
+
+def _encode_timestamp(value) -> bytes:
+    value = _to_datetime(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return struct.pack("!q", _microseconds(value.replace(tzinfo=timezone.utc) - _POSTGRES_EPOCH))
+
+
+def _encode_date(value) -> bytes:
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    elif isinstance(value, datetime):
+        value = value.date()
+    return struct.pack("!i", (value - _POSTGRES_EPOCH_DATE).days)
+
+
+def _encode_time(value) -> bytes:
+    if isinstance(value, str):
+        value = dt_time.fromisoformat(value)
+    return struct.pack("!q", ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000 + value.microsecond)
+
+
+def _encode_inet(value) -> bytes:
+    interface = ipaddress.ip_interface(value)
+    family = _PGSQL_AF_INET if interface.version == 4 else _PGSQL_AF_INET6
+    address = interface.ip.packed
+    return struct.pack("!BBBB", family, interface.network.prefixlen, 0, len(address)) + address
+
+
+# encoders of the variable or structured binary types, by format_type name
+_BINARY_ENCODERS = {
+    # jsonb binary format is a version byte followed by the json text
+    "jsonb": lambda value: b"\x01" + _to_json(value).encode("utf-8"),
+    "json": lambda value: _to_json(value).encode("utf-8"),
+    "text": lambda value: str(value).encode("utf-8"),
+    "character varying": lambda value: str(value).encode("utf-8"),
+    "timestamp with time zone": _encode_timestamptz,
+    "timestamp without time zone": _encode_timestamp,
+    "date": _encode_date,
+    "time without time zone": _encode_time,
+    "inet": _encode_inet,
+}
+
+
+def _supports_binary(column_type:str) -> bool:
+    return column_type in _BINARY_FORMATS or column_type in _BINARY_ENCODERS
+
+
+def _encode_binary_value(value, column_type:str) -> bytes:
+    if column_type in _BINARY_FORMATS:
+        return struct.pack(_BINARY_FORMATS[column_type], value)
+    if column_type in _BINARY_ENCODERS:
+        return _BINARY_ENCODERS[column_type](value)
+    raise ValueError(f"Column type {column_type} is not supported by binary COPY, use the text format instead")
+
+
+def _encode_binary_row(row, column_types:list) -> bytes:
+    parts = [struct.pack("!h", len(row))]
+    for value, column_type in zip(row, column_types):
+        if value is None:
+            parts.append(struct.pack("!i", -1))
+        else:
+            data = _encode_binary_value(value, column_type)
+            parts.append(struct.pack("!i", len(data)) + data)
+    return b"".join(parts)
+
+
+class _CopyStream(io.RawIOBase):
+    """Read-only file object that encodes rows lazily as COPY reads from it."""
+
+    def __init__(self, records, encode_row, header:bytes = b"", trailer:bytes = b""):
+        self._rows = iter(records)
+        self._encode_row = encode_row
+        self._buffer = header
+        self._trailer = trailer
+        self._done = False
+        self.row_count = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while not self._done and (size < 0 or len(self._buffer) < size):
+            row = next(self._rows, _END_OF_ROWS)
+            if row is _END_OF_ROWS:
+                self._buffer += self._trailer
+                self._done = True
+            else:
+                self._buffer += self._encode_row(row)
+                self.row_count += 1
+
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
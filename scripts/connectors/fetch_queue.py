@@ -0,0 +1,199 @@
+import json
+import time
+import uuid
+import redis
+from typing import Callable
+
+
+class RedisFetchQueue:
+    """
+    Work queue of Spotify URI batches shared by several fetch workers through Redis.
+
+    A claimed batch moves from the pending list to the processing list and gets a deadline in the
+    in-flight sorted set. A batch that is not acknowledged before its deadline (e.g. its worker died)
+    is put back on the pending list, and after `max_attempts` claims it goes to the dead list instead.
+
+    Args:
+        client (redis.Redis): Redis connection
+        name (str): Prefix of the Redis keys used by the queue
+        visibility_timeout (int): Seconds a worker has to acknowledge a claimed batch
+        max_attempts (int): Number of claims before a batch is given up on
+        clock (Callable): Wall clock shared by all the machines, time.time by default
+    """
+
+    def __init__(self, client: redis.Redis, name: str = "spotify_fetch", visibility_timeout: int = 300, max_attempts: int = 3, clock: Callable[[], float] = time.time):
+        self.client = client
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.clock = clock
+
+        self.pending_key = f"{name}:pending"
+        self.processing_key = f"{name}:processing"
+        self.inflight_key = f"{name}:inflight"
+        self.jobs_key = f"{name}:jobs"
+        self.attempts_key = f"{name}:attempts"
+        self.dead_key = f"{name}:dead"
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisFetchQueue":
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def enqueue(self, item_type: str, batches) -> int:
+        """
+        Puts URI batches on the pending list.
+
+        Args:
+            item_type (str): `track`, `episode`, `artist` or `podcast`
+            batches (Iterable[list]): batches of URIs, 50 at most
+
+        Returns:
+            int: number of batches enqueued
+        """
+        count = 0
+        pipe = self.client.pipeline()
+        for batch in batches:
+            job_id = uuid.uuid4().hex
+            pipe.hset(self.jobs_key, job_id, json.dumps({"item_type": item_type, "batch": batch}))
+            pipe.rpush(self.pending_key, job_id)
+            count += 1
+        pipe.execute()
+        return count
+
+    def claim(self, block_timeout: int = 5) -> tuple[str, str, list] | None:
+        """
+        Claims the next pending batch, waiting up to `block_timeout` seconds for one.
+
+        Returns:
+            tuple[str, str, list] | None: (job id, item type, batch of URIs), None if nothing was pending
+        """
+        self.requeue_expired()
+
+        job_id = self.client.blmove(self.pending_key, self.processing_key, block_timeout, "LEFT", "RIGHT")
+        if job_id is None:
+            return None
+
+        pipe = self.client.pipeline()
+        pipe.zadd(self.inflight_key, {job_id: self.clock() + self.visibility_timeout})
+        pipe.hincrby(self.attempts_key, job_id, 1)
+        pipe.hget(self.jobs_key, job_id)
+        _, _, job = pipe.execute()
+
+        if job is None:
+            # acknowledged by the worker that held it before it timed out
+            self.ack(job_id)
+            return None
+
+        job = json.loads(job)
+        return self._decode(job_id), job["item_type"], job["batch"]
+
+    def ack(self, job_id: str):
+        """Removes a finished batch from the queue."""
+        pipe = self.client.pipeline()
+        pipe.lrem(self.processing_key, 0, job_id)
+        pipe.lrem(self.pending_key, 0, job_id)
+        pipe.zrem(self.inflight_key, job_id)
+        pipe.hdel(self.jobs_key, job_id)
+        pipe.hdel(self.attempts_key, job_id)
+        pipe.execute()
+
+    def nack(self, job_id: str) -> bool:
+        """
+        Gives a failed batch back to the queue right away.
+
+        Returns:
+            bool: True if the batch will be retried, False if it ran out of attempts and went to the dead list
+        """
+        if not self.client.lrem(self.processing_key, 0, job_id):
+            # already put back by requeue_expired
+            return True
+        return self._release(job_id)
+
+    def requeue_expired(self) -> int:
+        """
+        Puts back batches whose worker did not acknowledge them in time.
+
+        Returns:
+            int: number of batches released
+        """
+        now = self.clock()
+
+        # a batch claimed a moment ago might not have its deadline yet, give it a full timeout
+        for job_id in self.client.lrange(self.processing_key, 0, -1):
+            self.client.zadd(self.inflight_key, {job_id: now + self.visibility_timeout}, nx=True)
+
+        released = 0
+        for job_id in self.client.zrangebyscore(self.inflight_key, "-inf", now):
+            # whoever removes the batch from the processing list owns releasing it
+            if self.client.lrem(self.processing_key, 0, job_id):
+                self._release(job_id)
+                released += 1
+            else:
+                self.client.zrem(self.inflight_key, job_id)
+        return released
+
+    def _release(self, job_id: str) -> bool:
+        self.client.zrem(self.inflight_key, job_id)
+        attempts = int(self.client.hget(self.attempts_key, job_id) or 0)
+        if attempts >= self.max_attempts:
+            self.client.rpush(self.dead_key, job_id)
+            return False
+        self.client.rpush(self.pending_key, job_id)
+        return True
+
+    def pop_dead(self) -> list[tuple[str, list]]:
+        """
+        Removes the batches that ran out of attempts.
+
+        Returns:
+            list[tuple[str, list]]: (item type, batch of URIs) pairs
+        """
+        dead = []
+        while (job_id := self.client.lpop(self.dead_key)) is not None:
+            job = self.client.hget(self.jobs_key, job_id)
+            self.ack(job_id)
+            if job is not None:
+                job = json.loads(job)
+                dead.append((job["item_type"], job["batch"]))
+        return dead
+
+    def size(self) -> int:
+        """Number of batches that are pending or being processed."""
+        return self.client.llen(self.pending_key) + self.client.llen(self.processing_key)
+
+    def in_flight(self) -> int:
+        """Number of batches claimed by a worker and not acknowledged yet."""
+        return self.client.llen(self.processing_key)
+
+    def dead_size(self) -> int:
+        """Number of batches that ran out of attempts and weren't popped yet."""
+        return self.client.llen(self.dead_key)
+
+    def wait_until_drained(self, poll_interval: float = 1.0, timeout: float = None) -> bool:
+        """
+        Blocks until every batch is either acknowledged or dead. Expired batches are put back while waiting,
+        so the queue drains even if every worker that held them crashed.
+
+        Args:
+            poll_interval (float): Seconds between checks
+            timeout (float): Maximum seconds to wait without the queue shrinking, no limit by default
+
+        Returns:
+            bool: True if the queue drained, False on timeout
+        """
+        progress_at = time.monotonic()
+        last_size = None
+        while True:
+            self.requeue_expired()
+            size = self.size()
+            if size == 0:
+                return True
+            if last_size is None or size < last_size:
+                progress_at = time.monotonic()
+            last_size = size
+            if timeout is not None and time.monotonic() - progress_at >= timeout:
+                return False
+            time.sleep(poll_interval)
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode() if isinstance(value, bytes) else value
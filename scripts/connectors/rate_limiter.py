@@ -0,0 +1,46 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread that calls the Spotify API.
+
+    Each request takes one token; tokens refill at `rate` per second up to `burst`.
+    When any caller reports a 429, `pause` blocks all callers until the Retry-After period has passed.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a request is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait_time = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                    self._updated_at = now
+                    # take the token right away, going into debt if the bucket is empty
+                    self._tokens -= 1
+                    wait_time = -self._tokens / self.rate if self._tokens < 0 else 0
+                    break
+            time.sleep(wait_time)
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def pause(self, seconds: float):
+        """Stops all callers for the given number of seconds, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # the bucket starts empty after a pause so the workers don't all fire at once
+            self._tokens = min(self._tokens, 0.0)
+            self._updated_at = self._paused_until
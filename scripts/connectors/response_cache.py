@@ -0,0 +1,104 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    On-disk SQLite cache of Spotify API item payloads, keyed by URI.
+
+    Entries older than the TTL are treated as misses. When the stored payloads grow over `max_bytes`,
+    the oldest fetched entries are evicted first.
+
+    Args:
+        path (str): Path of the SQLite file.
+        ttl_seconds (int): How long a cached payload stays valid.
+        max_bytes (int): Maximum total size of the cached payloads.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS items (uri TEXT PRIMARY KEY, payload TEXT NOT NULL, size INTEGER NOT NULL, fetched_at REAL NOT NULL);")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS items_fetched_at ON items (fetched_at);")
+        self._connection.commit()
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM items;").fetchone()[0]
+
+    def get_many(self, uris: list) -> dict:
+        """
+        Looks up cached payloads.
+
+        Args:
+            uris (list): URIs to look up.
+
+        Returns:
+            dict: URI -> payload for the fresh cached entries. URIs not in the result are misses.
+        """
+        if not uris:
+            return {}
+
+        min_fetched_at = time.time() - self.ttl_seconds
+        placeholders = ", ".join("?" for _ in uris)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT uri, payload FROM items WHERE uri IN ({placeholders}) AND fetched_at >= ?;",
+                (*uris, min_fetched_at)
+            ).fetchall()
+
+            cached = {uri: json.loads(payload) for uri, payload in rows}
+            self.hits += len(cached)
+            self.misses += len(set(uris)) - len(cached)
+
+        return cached
+
+    def put_many(self, items: list):
+        """
+        Stores API payloads, replacing older entries for the same URIs.
+
+        Args:
+            items (list): Payload dictionaries, each with a `uri` key.
+        """
+        rows = []
+        for item in items:
+            payload = json.dumps(item)
+            rows.append((item["uri"], payload, len(payload), time.time()))
+        if not rows:
+            return
+
+        with self._lock:
+            replaced = self._connection.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM items WHERE uri IN ({', '.join('?' for _ in rows)});",
+                [row[0] for row in rows]
+            ).fetchone()[0]
+            self._connection.executemany("INSERT OR REPLACE INTO items (uri, payload, size, fetched_at) VALUES (?, ?, ?, ?);", rows)
+            self._total_bytes += sum(row[2] for row in rows) - replaced
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        """Deletes the oldest entries until the cache fits in max_bytes. Called with the lock held."""
+        cursor = self._connection.execute("SELECT uri, size FROM items ORDER BY fetched_at;")
+        evicted = []
+        for uri, size in cursor:
+            if self._total_bytes <= self.max_bytes:
+                break
+            evicted.append((uri,))
+            self._total_bytes -= size
+        self._connection.executemany("DELETE FROM items WHERE uri = ?;", evicted)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
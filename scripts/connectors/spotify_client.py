@@ -1,13 +1,18 @@
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
+from scripts.connectors.rate_limiter import RateLimiter
 from config.config import settings
 import logging
 
+# shared by all clients in the process, so concurrent workers respect one request budget
+rate_limiter = RateLimiter(rate=settings.SPOTIFY_REQUESTS_PER_SECOND, burst=settings.SPOTIFY_MAX_IN_FLIGHT)
+
 class SpotifyClient:
     def __init__(self, logger: logging.Logger):
         self.client_id = settings.SPOTIFY_CLIENT_ID
         self.client_secret = settings.SPOTIFY_CLIENT_SECRET
         self.logger = logger
+        self.rate_limiter = rate_limiter
         try:
             client_credentials_manager = SpotifyClientCredentials(
                 client_id=self.client_id,
@@ -30,6 +35,7 @@ class SpotifyClient:
             dict: JSON response containing track data.
         """
         try:
+            self.rate_limiter.acquire()
             response = self.sp.tracks(tracks)
             return response
         except Exception as e:
@@ -48,6 +54,7 @@ class SpotifyClient:
         """
 
         try:
+            self.rate_limiter.acquire()
             response = self.sp.artists(artists)
             return response
         except Exception as e:
@@ -66,6 +73,7 @@ class SpotifyClient:
         """
 
         try:
+            self.rate_limiter.acquire()
             response = self.sp.shows(podcasts)
             return response
         except Exception as e:
@@ -84,6 +92,7 @@ class SpotifyClient:
         """
 
         try:
+            self.rate_limiter.acquire()
             response = self.sp.episodes(episodes)
             return response
         except Exception as e:
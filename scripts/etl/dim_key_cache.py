@@ -0,0 +1,52 @@
+from threading import Lock
+from scripts.connectors.db_manager import DatabaseManager
+
+# per dimension: the Spotify URI column followed by the columns the Python fact load reads
+DIM_KEY_COLUMNS = {
+    "tracks": ("core.dim_track", ["spotify_track_uri", "track_id", "spotify_artist_uri", "duration_ms"]),
+    "artists": ("core.dim_artist", ["spotify_artist_uri", "artist_id"]),
+    "episodes": ("core.dim_episode", ["spotify_episode_uri", "episode_id", "spotify_podcast_uri"]),
+    "podcasts": ("core.dim_podcast", ["spotify_podcast_uri", "podcast_id"]),
+}
+
+
+class DimKeyCache:
+    """
+    In-memory URI -> surrogate key maps of the dimensions, used to build fact rows in Python.
+
+    A map is read from its dimension once, then kept up to date with the rows the transformer inserts,
+    so a run that loads the dimensions before the facts reads every dimension a single time.
+    """
+
+    def __init__(self):
+        self.maps: dict[str, dict[str, tuple]] = {}
+        self._lock = Lock()
+
+    def load(self, db:DatabaseManager, item_type:str) -> dict[str, tuple]:
+        """
+        Returns the map of a dimension, reading it from the database the first time.
+
+        Args:
+            db (DatabaseManager): DatabaseManager instance
+            item_type (str): "tracks", "artists", "podcasts" or "episodes"
+
+        Returns:
+            dict[str, tuple]: URI -> (surrogate key, other columns of DIM_KEY_COLUMNS)
+        """
+        with self._lock:
+            if item_type not in self.maps:
+                table, columns = DIM_KEY_COLUMNS[item_type]
+                rows = db.execute_query(f"SELECT {', '.join(columns)} FROM {table} WHERE {columns[0]} IS NOT NULL;") or []
+                self.maps[item_type] = {row[0]: tuple(row[1:]) for row in rows}
+            return self.maps[item_type]
+
+    def add(self, item_type:str, rows):
+        """Adds (URI, surrogate key, ...) rows to a map that was already loaded. Rows of maps not loaded yet are dropped."""
+        with self._lock:
+            if item_type in self.maps:
+                self.maps[item_type].update((row[0], tuple(row[1:])) for row in rows)
+
+    def discard(self, item_type:str):
+        """Forgets a map, e.g. after the dimension was changed in a way the cache didn't see."""
+        with self._lock:
+            self.maps.pop(item_type, None)
@@ -1,13 +1,23 @@
 from scripts.connectors.db_manager import DatabaseManager
 from scripts.connectors.spotify_client import SpotifyClient 
+from scripts.connectors.response_cache import ResponseCache
+from scripts.connectors.fetch_queue import RedisFetchQueue
+from scripts.etl.payload_projection import project_payload
+from scripts.etl.staging_pipeline import DEPENDENT_ENTITIES, UriQueue
+from scripts.etl.history_reader import HISTORY_COLUMNS, HashingReader, HistorySource, TimestampFilter, find_history_sources, history_record, iter_json_array
+from config.config import settings
 import json
-import glob
+import io
 import os
 import logging
+import math
 import time
-from datetime import datetime, timezone
+from datetime import datetime
 from spotipy.exceptions import SpotifyException
-from typing import Callable
+from typing import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from functools import partial
+from itertools import islice
 
 class DataExtractor:
     def __init__(self, db: DatabaseManager, logger: logging.Logger):
@@ -15,122 +25,202 @@ class DataExtractor:
         self.logger = logger
         self.spotify_client = SpotifyClient(logger)
 
-    def extract_streaming_history(self):
+        # API calls saved by not requesting recently failed URIs
+        self.avoided_api_calls = 0
+
+        # optional on-disk cache of API responses
+        self.response_cache = None
+        if settings.SPOTIFY_CACHE_PATH:
+            self.response_cache = ResponseCache(
+                settings.SPOTIFY_CACHE_PATH,
+                ttl_seconds=settings.SPOTIFY_CACHE_TTL_DAYS * 24 * 3600,
+                max_bytes=settings.SPOTIFY_CACHE_MAX_MB * 1024 * 1024
+            )
+
+        # queues of artist and podcast URIs fed by the track and episode fetchers in pipelined staging
+        self._dependent_queues = {}
+
+    def extract_streaming_history(self, chunk_size:int = None, workers:int = None):
         """
         Extracts streaming data from raw json files provided by Spotify and inserts them into the staging layer of db.
+        Besides plain `.json` files, `.json.gz`, `.json.zst` and the `.zip` archives Spotify delivers are read directly.
+
+        Files are parsed incrementally and records are flushed to staging in chunks, so peak memory
+        depends on the chunk size rather than on the size of the export files.
+        With more than one worker the files are spread across a process pool, each file being loaded
+        through a database connection of its own.
+
+        A file that fails partway through (e.g. a malformed element) is logged and left out of the manifest,
+        but the chunks flushed before the failure stay in staging, so the file ends up partly ingested.
+        Once the file is fixed the next run reads it again, but only inserts its rows above the watermark: rows
+        left behind the failure that other files already pushed the watermark past need the file's staged rows
+        to be deleted first.
+
+        Args:
+            chunk_size (int): Number of records inserted per bulk insert. Defaults to settings.HISTORY_CHUNK_SIZE
+            workers (int): Number of worker processes. Defaults to settings.HISTORY_WORKERS
         """
+        chunk_size = chunk_size or settings.HISTORY_CHUNK_SIZE
+        workers = workers or settings.HISTORY_WORKERS
+
         # metrics
         total_files = 0
         total_records = 0
         total_time = 0.0
+        wall_time_start = time.perf_counter()
 
         # get the latest timestamp 
         max_ts = self.db.get_max_history_ts()
+
+        # files ingested by previous runs
+        manifest = self.db.get_file_manifest()
         
-        # iterate over raw files
+        # iterate over raw files, leaving out the ones that have nothing new
         raw_data_path = os.path.join(os.getcwd(), "data/raw")
-        for json_file in glob.glob(os.path.join(raw_data_path, "*.json")):
-            filename = os.path.basename(json_file)
-            file_start_time = time.perf_counter()
-            self.logger.info(f"Started processing for file: {filename}")
-            
+        sources = []
+        for source in find_history_sources(raw_data_path):
+            entry = manifest.get(source.key)
+            if self._is_file_ingested(source, entry, max_ts):
+                continue
+            # pair each file with a flag telling if all of its rows are newer than the watermark
+            sources.append((source, self._is_file_all_new(source, entry, max_ts)))
+
+        if workers > 1 and len(sources) > 1:
+            self.logger.info(f"Processing {len(sources)} files with {workers} worker processes")
+            with ProcessPoolExecutor(max_workers=min(workers, len(sources))) as pool:
+                futures = {pool.submit(_load_history_file_in_worker, source, max_ts, chunk_size, all_new): source for source, all_new in sources}
+                file_results = ((futures[future], future.result) for future in as_completed(futures))
+                total_files, total_records, total_time = self._collect_file_results(file_results)
+        else:
+            file_results = ((source, partial(load_history_file, self.db, self.logger, source, max_ts, chunk_size, all_new)) for source, all_new in sources)
+            total_files, total_records, total_time = self._collect_file_results(file_results)
+
+        # Final log
+        if total_files == 0:
+            self.logger.warning("No files processed during extraction")
+        else:
+            wall_time = time.perf_counter() - wall_time_start
+            self.logger.info(f"Extraction complete. Processed {total_files} files, {total_records} total records. Total time: {total_time:.2f} seconds (wall time {wall_time:.2f} seconds)")
+
+    def _is_file_ingested(self, source:HistorySource, entry:dict, max_ts:datetime) -> bool:
+        """
+        Checks the file manifest to decide if an export file can be skipped without parsing it.
+
+        A file is skipped if it has the same size and modification time (or the same content hash)
+        as when it was ingested, and all of its rows are at or below the current watermark.
+
+        Args:
+            source (HistorySource): The export file.
+            entry (dict): Manifest entry of the file from DatabaseManager.get_file_manifest(), or None.
+            max_ts (datetime): Latest timestamp already loaded.
+        Returns:
+            bool: True if the file can be skipped.
+        """
+        if entry is None:
+            return False
+
+        if entry["max_ts"] is not None and entry["max_ts"] > max_ts:
+            return False
+
+        file_size, file_mtime = source.stat()
+        if file_size != entry["file_size"]:
+            return False
+
+        if file_mtime != entry["file_mtime"]:
+            # the file was touched, only its content tells if it changed
+            if source.sha256() != entry["content_hash"]:
+                return False
+            self.db.upsert_file_manifest({**entry, "file_path": source.key, "file_mtime": file_mtime})
+
+        self.logger.info(f"Skipping unchanged file: {source.key}")
+        return True
+
+    def _is_file_all_new(self, source:HistorySource, entry:dict, max_ts:datetime) -> bool:
+        """
+        Checks if every row of an unchanged export file is later than the watermark, according to the manifest.
+        In that case the per-row timestamp filter can be skipped.
+
+        Args:
+            source (HistorySource): The export file.
+            entry (dict): Manifest entry of the file, or None.
+            max_ts (datetime): Latest timestamp already loaded.
+        Returns:
+            bool: True if the whole file sits above the watermark.
+        """
+        if entry is None or entry["min_ts"] is None or entry["min_ts"] <= max_ts:
+            return False
+
+        return source.stat() == (entry["file_size"], entry["file_mtime"])
+
+    def _collect_file_results(self, file_results) -> tuple[int, int, float]:
+        """
+        Collects the per-file results of the history extraction, records the ingested files in the manifest and logs the failed files.
+
+        Args:
+            file_results (Iterable): Pairs of (HistorySource, callable returning (record count, processing time, file info))
+        Returns:
+            tuple[int, int, float]: (number of processed files, number of records, summed processing time)
+        """
+        total_files = 0
+        total_records = 0
+        total_time = 0.0
+
+        for source, get_result in file_results:
             try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                    columns = ["ts", "platform", "ms_played", "conn_country", "ip_addr", "master_metadata_track_name", "master_metadata_album_artist_name", "master_metadata_album_album_name", "spotify_track_uri", "episode_name", "episode_show_name", "spotify_episode_uri", "reason_start", "reason_end", "shuffle", "skipped", "offline", "offline_timestamp", "incognito_mode"]
-
-                    # create records to insert only if the timestamp is later than the max recorded one
-                    records = [
-                        (
-                            row["ts"],
-                            row["platform"],
-                            row["ms_played"],
-                            row["conn_country"],
-                            row["ip_addr"],
-                            row["master_metadata_track_name"],
-                            row["master_metadata_album_artist_name"],
-                            row["master_metadata_album_album_name"],
-                            row["spotify_track_uri"],
-                            row["episode_name"],
-                            row["episode_show_name"],
-                            row["spotify_episode_uri"],
-                            row["reason_start"],
-                            row["reason_end"],
-                            row["shuffle"],
-                            row["skipped"],
-                            row["offline"],
-                            row["offline_timestamp"],
-                            row["incognito_mode"]
-                        ) for row in data if datetime.strptime(row["ts"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc) > max_ts
-                    ]
-
-                    # empty file check
-                    if len(records) == 0:
-                        self.logger.info(f"Empty file or nothing to insert: {filename}")
-                    else:
-                        self.db.bulk_insert("staging.streaming_history", columns, records)
-            
-                # Log success
-                processing_time = time.perf_counter() - file_start_time
-                record_count = len(records)
-                self.logger.info(f"Successfully processed {filename}: {record_count} records in {processing_time:.2f} seconds")
-            
+                record_count, processing_time, file_info = get_result()
+                self.db.upsert_file_manifest({**file_info, "file_path": source.key})
+
                 total_files += 1
                 total_records += record_count
                 total_time += processing_time
 
             except json.JSONDecodeError as e:
-                self.logger.error(f"JSON error in {json_file}: {e}")
+                self.logger.error(f"JSON error in {source.key}: {e}")
             except IOError as e:
-                self.logger.error(f"Could not read {json_file}: {e}")
+                self.logger.error(f"Could not read {source.key}: {e}")
             except Exception as e:
-                self.logger.error(f"Unexpected error processing {json_file}: {str(e)}", exc_info=True)
+                self.logger.error(f"Unexpected error processing {source.key}: {str(e)}", exc_info=True)
 
-        # Final log
-        if total_files == 0:
-            self.logger.warning("No files processed during extraction")
-        else:
-            self.logger.info(f"Extraction complete. Processed {total_files} files, {total_records} total records. Total time: {total_time:.2f} seconds")
+        return total_files, total_records, total_time
 
-    def stage_spotify_items(self, item_type:str):
+    def stage_spotify_items(self, item_type:str, max_in_flight:int = None, uri_batches:Iterable[list] = None):
         """
         Stage unique Spotify entities from streaming history
 
+        With more than one request in flight the batches are fetched by a thread pool. All the threads share
+        the Spotify client's rate limiter, so a 429 received by any of them pauses every worker.
+
         Args:
             item_type (str): `track`, `episode`, `artist` or `podcast`
+            max_in_flight (int): Number of concurrent API requests. Defaults to settings.SPOTIFY_MAX_IN_FLIGHT
+            uri_batches (Iterable[list]): Batches of URIs to fetch instead of looking up the new items in the database
         """
+        max_in_flight = max_in_flight or settings.SPOTIFY_MAX_IN_FLIGHT
+
         total_time = 0.0
         total_items_processed = 0
         total_failed_items = 0
 
         # get new unique tracks or episodes to process
-        new_items = self._get_new_items(item_type)
-
-        # num of items in one batch (max = 50)
-        batch_size = 50
-
-        # main batch processing loop
-        for i in range(0, len(new_items), batch_size):
-            batch_number = i // batch_size + 1
-            batch = new_items[i:i+batch_size]
+        if uri_batches is None:
+            uri_batches = self._new_item_batches(item_type)
+        batches = enumerate(uri_batches, start=1)
 
+        def process_batch(batch_number:int, batch:list):
             self.logger.info(f"Started processing batch number: {batch_number} with type: {item_type}")
+            return batch_number, self._process_spotify_batch(batch=batch, 
+                                                             batch_number=batch_number,
+                                                             api_call=self._api_call(item_type),
+                                                             item_type = item_type
+                                                             )
 
-            # API call function for each type
-            api_calls = {
-                "track": self.spotify_client.get_tracks,
-                "episode": self.spotify_client.get_episodes,
-                "artist": self.spotify_client.get_artists,
-                "podcast": self.spotify_client.get_podcasts
-            }
-
-            success, batch_time, items_count, failed_items = self._process_spotify_batch(batch=batch, 
-                                                                            batch_number=batch_number,
-                                                                            api_call=api_calls[item_type],
-                                                                            item_type = item_type
-                                                                            )
+        # main batch processing loop
+        if max_in_flight > 1:
+            results = self._bounded_results(process_batch, batches, max_in_flight)
+        else:
+            results = (process_batch(batch_number, batch) for batch_number, batch in batches)
 
+        for batch_number, (success, batch_time, items_count, failed_items) in results:
             total_time += batch_time
             total_items_processed += items_count
             total_failed_items += failed_items
@@ -140,9 +230,197 @@ class DataExtractor:
 
         self.logger.info(f"All {item_type} batches processed. Total time: {total_time:.2f} seconds. Total {item_type}s: {total_items_processed} with {total_failed_items} {item_type}s failed")
 
+    @staticmethod
+    def _bounded_results(process_batch:Callable, batches:Iterable[tuple], max_in_flight:int) -> Iterator:
+        """
+        Runs the batches on a thread pool, yielding the results as they complete. Batches are only read
+        from the iterator when a request slot frees up, so at most `max_in_flight` of them are held at a time.
+
+        Args:
+            process_batch (Callable): function called with (batch number, batch)
+            batches (Iterable[tuple]): (batch number, batch) pairs
+            max_in_flight (int): number of concurrent requests
+        Yields:
+            the results of process_batch in completion order
+        """
+        batches = iter(batches)
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            in_flight = {pool.submit(process_batch, *numbered_batch) for numbered_batch in islice(batches, max_in_flight)}
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                in_flight |= {pool.submit(process_batch, *numbered_batch) for numbered_batch in islice(batches, len(done))}
+
+    def _new_item_batches(self, item_type:str, batch_size:int = 50) -> Iterable[list]:
+        """
+        Splits the new unique items of a type into API batches.
+
+        Args:
+            item_type (str): `track`, `episode`, `artist` or `podcast`
+            batch_size (int): num of items in one batch (max = 50)
+        Returns:
+            Iterable[list]: batches of URIs
+        """
+        if settings.NEW_ITEMS_ANTI_JOIN:
+            return self._iter_new_item_batches(item_type, batch_size)
+
+        new_items = self._get_new_items(item_type)
+        return [new_items[i:i+batch_size] for i in range(0, len(new_items), batch_size)]
+
+    def _api_call(self, item_type:str) -> Callable:
+        """Returns the Spotify client function that fetches the given type."""
+        # API call function for each type
+        api_calls = {
+            "track": self.spotify_client.get_tracks,
+            "episode": self.spotify_client.get_episodes,
+            "artist": self.spotify_client.get_artists,
+            "podcast": self.spotify_client.get_podcasts
+        }
+        return api_calls[item_type]
+
+    def stage_spotify_items_distributed(self, fetch_queue:RedisFetchQueue):
+        """
+        Puts the new items on a Redis work queue for fetch workers (scripts/fetch_worker.py) instead of calling the API,
+        and waits until the workers have staged everything. Tracks and episodes are drained before artists and podcasts
+        are looked up, since those come from the staged track and episode payloads.
+
+        If the queue doesn't shrink for settings.FETCH_QUEUE_DRAIN_TIMEOUT seconds, e.g. because no worker is running,
+        the remaining batches are left on the queue for workers started later and the staging stops there.
+
+        Args:
+            fetch_queue (RedisFetchQueue): queue shared with the workers
+        """
+        for item_types in [["track", "episode"], ["artist", "podcast"]]:
+            start_time = time.perf_counter()
+            for item_type in item_types:
+                batch_count = fetch_queue.enqueue(item_type, self._new_item_batches(item_type))
+                self.logger.info(f"Enqueued {batch_count} {item_type} batches for the fetch workers")
+
+            drained = fetch_queue.wait_until_drained(timeout=settings.FETCH_QUEUE_DRAIN_TIMEOUT)
+            if not drained:
+                in_flight = fetch_queue.in_flight()
+                pending = fetch_queue.size() - in_flight
+                self.logger.error(f"The fetch queue made no progress for {settings.FETCH_QUEUE_DRAIN_TIMEOUT} seconds: {pending} batches pending, {in_flight} in flight, {fetch_queue.dead_size()} dead. Are the fetch workers running?")
+
+            # batches that kept failing or timing out are retried in a later run with the failed URI backoff
+            for item_type, batch in fetch_queue.pop_dead():
+                self.logger.error(f"A {item_type} batch ran out of attempts in the fetch queue")
+                self._log_error_batch(batch, item_type)
+
+            if not drained:
+                return
+
+            self.logger.info(f"Fetch workers staged all {' and '.join(item_types)} batches in {time.perf_counter() - start_time:.2f} seconds")
+
+    def run_fetch_worker(self, fetch_queue:RedisFetchQueue, idle_timeout:float = None) -> int:
+        """
+        Claims URI batches from the work queue, fetches them with this worker's Spotify credentials and stages them.
+        A batch that raises is given back to the queue so another worker can retry it.
+
+        Args:
+            fetch_queue (RedisFetchQueue): queue shared with the coordinator and the other workers
+            idle_timeout (float): stop after this many seconds without work, run forever by default
+        Returns:
+            int: number of batches processed
+        """
+        processed_batches = 0
+        idle_since = time.monotonic()
+
+        while True:
+            job = fetch_queue.claim()
+            if job is None:
+                if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                    self.logger.info(f"Fetch worker idle for {idle_timeout} seconds, stopping after {processed_batches} batches")
+                    return processed_batches
+                continue
+
+            job_id, item_type, batch = job
+            processed_batches += 1
+            try:
+                # a batch that exceeds its API retries is recorded in failed_uris like in local staging
+                self._process_spotify_batch(batch=batch, batch_number=processed_batches, api_call=self._api_call(item_type), item_type=item_type)
+                fetch_queue.ack(job_id)
+            except Exception as e:
+                will_retry = fetch_queue.nack(job_id)
+                self.logger.error(f"Fetch worker failed on a {item_type} batch: {e}. {'Returned it to the queue' if will_retry else 'Giving up on it'}")
+
+            idle_since = time.monotonic()
+
+    def stage_spotify_items_pipelined(self):
+        """
+        Stages all four entity types at the same time. Tracks and episodes are fetched concurrently, and the artist
+        and show URIs found in every staged track and episode batch go straight to the artist and podcast fetchers,
+        so the extraction takes about as long as the slowest stream instead of the sum of all four.
+
+        A regular pass over artists and podcasts runs at the end to pick up anything the streams did not reference,
+        e.g. tracks staged by an earlier interrupted run.
+
+        With the anti-join every producer keeps a pooled connection for its stream of new URIs, so the pool needs
+        one more connection for the writes. A smaller pool stages the types one by one instead.
+        """
+        streams = len(DEPENDENT_ENTITIES)
+        if settings.NEW_ITEMS_ANTI_JOIN and self.db.pool is not None and self.db.pool_size < streams + 1:
+            self.logger.warning(f"Pipelined staging needs DB_POOL_SIZE of at least {streams + 1} with NEW_ITEMS_ANTI_JOIN, got {self.db.pool_size}. Staging the types one by one")
+            for item_type in ["track", "artist", "episode", "podcast"]:
+                self.stage_spotify_items(item_type)
+            return
+
+        self._dependent_queues = {dependent_type: UriQueue() for dependent_type, _ in DEPENDENT_ENTITIES.values()}
+
+        try:
+            with ThreadPoolExecutor(max_workers=2 * len(DEPENDENT_ENTITIES)) as pool:
+                consumers = [
+                    pool.submit(self.stage_spotify_items, dependent_type, uri_batches=uri_queue.iter_batches())
+                    for dependent_type, uri_queue in self._dependent_queues.items()
+                ]
+                producers = {item_type: pool.submit(self.stage_spotify_items, item_type) for item_type in DEPENDENT_ENTITIES}
+
+                # once a producer is done nothing else will be queued for its dependent fetcher
+                for item_type, producer in producers.items():
+                    dependent_type, _ = DEPENDENT_ENTITIES[item_type]
+                    try:
+                        producer.result()
+                    finally:
+                        self._dependent_queues[dependent_type].close()
+
+                for consumer in consumers:
+                    consumer.result()
+        finally:
+            self._dependent_queues = {}
+
+        for dependent_type, _ in DEPENDENT_ENTITIES.values():
+            self.stage_spotify_items(dependent_type)
+
+    def _stage_items(self, item_type:str, items:list):
+        """
+        Inserts fetched payloads into staging. Unless settings.STAGE_FULL_PAYLOADS is set, only the fields
+        declared in PAYLOAD_FIELDS are kept. In pipelined staging the URIs they reference
+        are then queued for the dependent entity fetcher.
+
+        Args:
+            item_type (str): `track`, `episode`, `artist` or `podcast`
+            items (list): API payloads
+        """
+        if not settings.STAGE_FULL_PAYLOADS:
+            items = [project_payload(item_type, item) for item in items]
+
+        self.db.bulk_insert(f"staging.spotify_{item_type}s_data", [f"spotify_{item_type}_uri", "raw_data"], items, wrap_json=True)
+
+        if item_type not in DEPENDENT_ENTITIES or not self._dependent_queues:
+            return
+
+        dependent_type, get_uris = DEPENDENT_ENTITIES[item_type]
+        uri_queue = self._dependent_queues[dependent_type]
+        uris = uri_queue.unseen(uri for item in items for uri in get_uris(item))
+        if uris:
+            # skip URIs that are already in the core, staged or waiting for their next retry
+            uri_queue.put_many(self.db.filter_new_uris(uri_type=dependent_type, uris=uris))
+
     def _process_spotify_batch(self, batch: list, batch_number:int, api_call:Callable, item_type:str, retry_limit:int = 2) -> tuple[bool, float, int, int]:
         """
         Process a single batch of tracks or episodes.
+        If the response cache is enabled, cached items are staged directly and only the misses are requested.
         Args:
             batch (list): a list of Spotify URIs to process
             batch_number (int): batch number for logging
@@ -153,81 +431,123 @@ class DataExtractor:
             tuple[bool, float, int, int]: (success flag, batch processing time, number of items processed, number of failed items)
 
         """
-        retry_counter = 0
-        failed_items_counter = 0
         batch_time_start = time.perf_counter()  
+
+        # stage what the response cache already has and only request the misses
+        cached_count = 0
+        if self.response_cache:
+            cached_data = self.response_cache.get_many(batch)
+            if cached_data:
+                self._stage_items(item_type, list(cached_data.values()))
+                cached_count = len(cached_data)
+                batch = [uri for uri in batch if uri not in cached_data]
+
+            if not batch:
+                batch_total_time = time.perf_counter() - batch_time_start
+                self.logger.info(f"Processed batch {batch_number} with {cached_count} cached items in {batch_total_time:.2f} seconds")
+                return True, batch_total_time, cached_count, 0
         
-        while retry_counter < retry_limit:
-            try:
-                # call Spotify API to get data
-                api_response = api_call(batch)
-                # from API we get a dict like: {'tracks': [tracks data]} so to insert into staging each track as individual row we select the list 
-                data_key = list(api_response.keys())[0]
-                data_items = api_response[data_key]
-                items_count = len(data_items)
-
-                # Extract IDs from the response to map URIs
-                fetched_data = {item.get("uri"): item for item in data_items if item}  # Filter out None values
-
-                # Identify URIs that returned null and log them into db
-                failed_uris = [(uri, item_type, "API returned null") for uri in batch if fetched_data.get(uri) is None]
-                failed_items_counter = len(failed_uris)
-                if failed_items_counter >= 1:
-                    self.logger.warning(f"{failed_items_counter} failed URIs detected")
-                    self.db.bulk_insert("etl_internal.failed_uris", ["uri", "entity_type", "error_reason"], failed_uris)
-
-                # Convert dict to list for insertion
-                valid_data = list(fetched_data.values())
-
-                # insert raw data into staging
-                self.db.bulk_insert(f"staging.spotify_{item_type}s_data", [f"spotify_{item_type}_uri", "raw_data"], valid_data, wrap_json=True)
-                
-                # track and log the time
+        try:
+            # call Spotify API to get data
+            api_response, attempts = self._call_spotify_api(api_call, batch, batch_number, retry_limit)
+
+            if api_response is None:
+                # if retries fail return False and log failed URIs
                 batch_total_time = time.perf_counter() - batch_time_start
-                self.logger.info(f"Processed batch {batch_number} with {items_count} items in {batch_total_time:.2f} seconds on attempt {retry_counter+1}")
+                self.logger.error(f"Exceeded retries for batch {batch_number}")
+                self._log_error_batch(batch, item_type)
 
-                return True, batch_total_time, items_count, failed_items_counter
+                return False, batch_total_time, cached_count, len(batch)
+
+            # from API we get a dict like: {'tracks': [tracks data]} so to insert into staging each track as individual row we select the list 
+            data_key = list(api_response.keys())[0]
+            data_items = api_response[data_key]
+            items_count = cached_count + len(data_items)
+
+            # Extract IDs from the response to map URIs
+            fetched_data = {item.get("uri"): item for item in data_items if item}  # Filter out None values
+            if self.response_cache:
+                self.response_cache.put_many(list(fetched_data.values()))
+
+            # Identify URIs that returned null and log them into db
+            failed_uris = [(uri, item_type, "API returned null") for uri in batch if fetched_data.get(uri) is None]
+            failed_items_counter = len(failed_uris)
+            if failed_items_counter >= 1:
+                self.logger.warning(f"{failed_items_counter} failed URIs detected")
+                self.db.log_failed_uris(failed_uris)
+
+            # Convert dict to list for insertion
+            valid_data = list(fetched_data.values())
+
+            # insert raw data into staging
+            self._stage_items(item_type, valid_data)
             
-            except SpotifyException as e:
-                # catch a Spotify error: either a rate limit or something wrong with credentials 
+            # track and log the time
+            batch_total_time = time.perf_counter() - batch_time_start
+            self.logger.info(f"Processed batch {batch_number} with {items_count} items in {batch_total_time:.2f} seconds on attempt {attempts}")
+
+            return True, batch_total_time, items_count, failed_items_counter
+        
+        except SpotifyException as e:
+            # catch a Spotify error: either an invalid URI or something wrong with credentials 
+
+            if e.http_status == 400: # invalid uri
+                self.logger.error(f"Batch {batch_number} failed with HTTP 400. Bisecting the batch to isolate invalid URIs.")
+                items_count, failed_items_counter = self._retry_batch(batch, item_type, api_call)
+                items_count += cached_count
 
                 batch_total_time = time.perf_counter() - batch_time_start
+                self.logger.info(f"Processed batch {batch_number} with {items_count} successfully with {failed_items_counter} invalid URIs in {batch_total_time:.2f} seconds")
 
-                if e.http_status == 429:  # rate limit error
-                    wait_time = int(e.headers.get("Retry-After", 60))
-                    self.logger.warning(f"Batch {batch_number} exceeded rate limit. Attempt {retry_counter+1} took {batch_total_time:.2f} seconds. Waiting for {wait_time} seconds.")
-                    time.sleep(wait_time)
-                    
-                    retry_counter += 1
+                return True, batch_total_time, items_count, failed_items_counter
 
-                elif e.http_status == 400: # invalid uri
-                    self.logger.error(f"Batch {batch_number} failed with HTTP 400. Retrying items individually.")
-                    items_count, failed_items_counter = self._retry_batch(batch, item_type, api_call)
+            self.logger.error(f"Spotify error in batch {batch_number}: {e}")
+            raise
+        
+        except Exception as e:
+            batch_total_time = time.perf_counter() - batch_time_start
+            self.logger.error(f"Unexpected error in batch {batch_number} after {batch_total_time:.2f} seconds: {e}")
+            raise
 
-                    batch_total_time = time.perf_counter() - batch_time_start
-                    self.logger.info(f"Processed batch {batch_number} with {items_count} successfully with {failed_items_counter} invalid URIs in {batch_total_time:.2f} seconds on attempt {retry_counter+1}")
+    def _call_spotify_api(self, api_call:Callable, batch:list, batch_number:int, retry_limit:int = 2) -> tuple[dict | None, int]:
+        """
+        Calls the Spotify API for a batch. On HTTP 429 every worker is paused for the Retry-After period
+        through the shared rate limiter and the call is retried.
 
-                    return True, batch_total_time, items_count, failed_items_counter
+        Args:
+            api_call (Callable): Spotify client function to fetch data (e.g. get_tracks())
+            batch (list): a list of Spotify URIs
+            batch_number (int): batch number for logging
+            retry_limit (int): Number of attempts allowed. 2 by default
+        Returns:
+            tuple[dict | None, int]: (API response or None if the retries were exhausted, number of attempts)
+        Raises:
+            SpotifyException: For errors other than a rate limit.
+        """
+        attempt_start = time.perf_counter()
 
-                else:
-                    self.logger.error(f"Spotify error in batch {batch_number}: {e}")
+        for attempt in range(1, retry_limit + 1):
+            try:
+                return api_call(batch), attempt
+
+            except SpotifyException as e:
+                if e.http_status != 429:
                     raise
-            
-            except Exception as e:
-                batch_total_time = time.perf_counter() - batch_time_start
-                self.logger.error(f"Unexpected error in batch {batch_number} after {batch_total_time:.2f} seconds: {e}")
-                raise
-        
-        # if retries fail return False and log failed URIs
-        self.logger.error(f"Exceeded retries for batch {batch_number}")
-        self._log_error_batch(batch, item_type)
 
-        return False, batch_total_time, 0, len(batch)
+                attempt_time = time.perf_counter() - attempt_start
+                wait_time = int((e.headers or {}).get("Retry-After", 60))
+                self.logger.warning(f"Batch {batch_number} exceeded rate limit. Attempt {attempt} took {attempt_time:.2f} seconds. Waiting for {wait_time} seconds.")
+                # pause every worker sharing the client, the next request waits for the pause to end
+                self.spotify_client.rate_limiter.pause(wait_time)
+                attempt_start = time.perf_counter()
+
+        return None, retry_limit
 
     def _get_new_items(self, entity_type: str):
         """
         Returns a list of only the new unique items from the staged data, 
-        excluding those already in the core and previous staging history.
+        excluding those already in the core and previous staging history,
+        and the failed URIs that are still waiting for their next retry.
 
         Args:
             entity_type (str): `track`, `episode`, `artist`, `podcast`
@@ -247,9 +567,47 @@ class DataExtractor:
         staged_items = self.db.get_distinct_uri(uri_type=entity_type, table=f"staging.spotify_{entity_type}s_data")
 
         # Exclude already processed and previously staged URIs
-        new_items = list(set(staged_history_items) - set(existing_core_items) - set(staged_items))
+        new_items = set(staged_history_items) - set(existing_core_items) - set(staged_items)
+
+        # Exclude URIs that failed recently, they are retried with an exponential backoff
+        skipped_items = new_items & set(self.db.get_backoff_failed_uris(uri_type=entity_type))
+        if skipped_items:
+            avoided_calls = math.ceil(len(skipped_items) / 50)
+            self.avoided_api_calls += avoided_calls
+            self.logger.info(f"Skipping {len(skipped_items)} recently failed {entity_type} URIs, avoided {avoided_calls} API calls")
 
-        return new_items
+        return list(new_items - skipped_items)
+
+    def _iter_new_item_batches(self, entity_type: str, batch_size: int = 50):
+        """
+        Streams batches of new unique items, same as `_get_new_items` but the set difference
+        runs in the database, so only the new URIs are transferred and kept in memory.
+
+        Args:
+            entity_type (str): `track`, `episode`, `artist`, `podcast`
+            batch_size (int): Number of URIs in one batch.
+        Yields:
+            list: next batch of new items to process
+        """
+        batch = []
+        skipped_count = 0
+        for rows in self.db.iter_new_uris(uri_type=entity_type):
+            for uri, in_backoff in rows:
+                # failed URIs are retried with an exponential backoff
+                if in_backoff:
+                    skipped_count += 1
+                    continue
+                batch.append(uri)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+        if skipped_count:
+            avoided_calls = math.ceil(skipped_count / 50)
+            self.avoided_api_calls += avoided_calls
+            self.logger.info(f"Skipping {skipped_count} recently failed {entity_type} URIs, avoided {avoided_calls} API calls")
 
     def _log_error_batch(self, batch:list, item_type:str):
         """
@@ -262,11 +620,13 @@ class DataExtractor:
         
         self.logger.warning("Inserting failed batch into etl_internal.failed_uris")
         error_batch = [(uri, item_type, "Failed batch") for uri in batch]
-        self.db.bulk_insert("etl_internal.failed_uris", ["uri", "entity_type", "error_reason"], error_batch)
+        self.db.log_failed_uris(error_batch)
   
     def _retry_batch(self, batch:list, item_type:str, api_call:Callable):
         """
-        Retries the failed batch of items.
+        Retries a batch that failed with HTTP 400 by splitting it in half until the invalid URIs are isolated,
+        so a single bad URI costs about 2 * log2(batch size) calls instead of one call per URI.
+        The calls go through the same rate limiter and 429 retry policy as regular batches.
 
         Args:
             batch (list): List of items to retry.
@@ -278,28 +638,67 @@ class DataExtractor:
         invalid_uris = []
         valid_data = []
 
-        for item in batch:
-            try:
-                item_data = api_call(item)
-                # append item uri and the data
-                valid_data.append((item, item_data))
-
-            except SpotifyException as single_e:
-                if single_e.http_status == 400:
-                    self.logger.warning(f"Invalid URI detected: {item}")
-                    invalid_uris.append((item, item_type, "Invalid URI"))
-                else:
-                    raise  # If another error occurs, let it bubble up
-            
+        # the whole batch already failed, so start from its halves
+        if len(batch) == 1:
+            self.logger.warning(f"Invalid URI detected: {batch[0]}")
+            invalid_uris.append((batch[0], item_type, "Invalid URI"))
+        else:
+            middle = len(batch) // 2
+            self._bisect_batch(batch[:middle], item_type, api_call, valid_data, invalid_uris)
+            self._bisect_batch(batch[middle:], item_type, api_call, valid_data, invalid_uris)
+
         if invalid_uris:
             self.logger.info(f"Logging {len(invalid_uris)} invalid URIs to etl_internal.failed_uris")
-            self.db.bulk_insert("etl_internal.failed_uris", ["uri", "entity_type", "error_reason"], invalid_uris)
+            self.db.log_failed_uris(invalid_uris)
 
         # Insert valid URIs
-        self.db.bulk_insert(f"staging.spotify_{item_type}s_data", [f"spotify_{item_type}_uri", "raw_data"], valid_data, wrap_json=True)
+        if self.response_cache:
+            self.response_cache.put_many(valid_data)
+        self._stage_items(item_type, valid_data)
 
         return len(valid_data), len(invalid_uris)
 
+    def _bisect_batch(self, batch:list, item_type:str, api_call:Callable, valid_data:list, invalid_uris:list):
+        """
+        Requests a batch and recursively splits it in half while the API answers HTTP 400.
+
+        Args:
+            batch (list): List of items to request.
+            item_type (str): Type of the item, can be `track`, `episode`, `artist` or `podcast`.
+            api_call (Callable): API call function
+            valid_data (list): Collects the fetched items.
+            invalid_uris (list): Collects (uri, item_type, error_reason) tuples of the failed URIs.
+        """
+        try:
+            api_response, _ = self._call_spotify_api(api_call, batch, batch_number=0)
+
+        except SpotifyException as e:
+            if e.http_status != 400:
+                raise  # If another error occurs, let it bubble up
+
+            if len(batch) == 1:
+                self.logger.warning(f"Invalid URI detected: {batch[0]}")
+                invalid_uris.append((batch[0], item_type, "Invalid URI"))
+                return
+
+            middle = len(batch) // 2
+            self._bisect_batch(batch[:middle], item_type, api_call, valid_data, invalid_uris)
+            self._bisect_batch(batch[middle:], item_type, api_call, valid_data, invalid_uris)
+            return
+
+        if api_response is None:
+            self.logger.error(f"Exceeded retries while bisecting {len(batch)} URIs")
+            invalid_uris.extend((uri, item_type, "Failed batch") for uri in batch)
+            return
+
+        # items come back in the order they were requested, with null for the ones not found
+        data_items = list(api_response.values())[0]
+        for uri, item in zip(batch, data_items):
+            if item:
+                valid_data.append(item)
+            else:
+                invalid_uris.append((uri, item_type, "API returned null"))
+
     def run(self):
         """
         Orchestrates the full data extraction process. 
@@ -314,11 +713,118 @@ class DataExtractor:
         self.extract_streaming_history()
         
         # fetch data from Spotify API
-        item_types = ["track", "artist", "episode", "podcast"] # ORDER IS IMPORTANT HERE: tracks before artists, episodes before podcasts
-        for item_type in item_types:
-            self.stage_spotify_items(item_type)
+        if settings.FETCH_QUEUE_REDIS_URL:
+            self.stage_spotify_items_distributed(fetch_queue_from_settings())
+        elif settings.PIPELINED_STAGING:
+            self.stage_spotify_items_pipelined()
+        else:
+            item_types = ["track", "artist", "episode", "podcast"] # ORDER IS IMPORTANT HERE: tracks before artists, episodes before podcasts
+            for item_type in item_types:
+                self.stage_spotify_items(item_type)
+
+        self.logger.info(f"Failed URI backoff avoided {self.avoided_api_calls} API calls")
+        if self.response_cache:
+            self.logger.info(f"Spotify response cache: {self.response_cache.hits} hits, {self.response_cache.misses} misses")
 
         total_time = round(time.perf_counter() - start_time, 2)
         self.logger.info(f"Data extraction finished, took {total_time} seconds")
 
-        return total_time
\ No newline at end of file
+        return total_time
+
+
+def fetch_queue_from_settings() -> RedisFetchQueue:
+    """Connects to the Redis work queue configured in settings."""
+    return RedisFetchQueue.from_url(
+        settings.FETCH_QUEUE_REDIS_URL,
+        name=settings.FETCH_QUEUE_NAME,
+        visibility_timeout=settings.FETCH_QUEUE_VISIBILITY_TIMEOUT,
+        max_attempts=settings.FETCH_QUEUE_MAX_ATTEMPTS
+    )
+
+
+def load_history_file(db: DatabaseManager, logger: logging.Logger, source:HistorySource, max_ts:datetime, chunk_size:int, all_new:bool = False) -> tuple[int, float, dict]:
+    """
+    Streams a single Spotify export file into staging.streaming_history.
+
+    Args:
+        db (DatabaseManager): Database connection used for the inserts.
+        logger (logging.Logger): Logger
+        source (HistorySource): The export file.
+        max_ts (datetime): Only records later than this timestamp are inserted.
+        chunk_size (int): Number of records inserted per bulk insert.
+        all_new (bool): If True, the file is known to be entirely above max_ts and rows are not filtered.
+    Returns:
+        tuple[int, float, dict]: (number of inserted records, processing time, file info for the manifest)
+    """
+    filename = source.key
+    file_start_time = time.perf_counter()
+    logger.info(f"Started processing for file: {filename}")
+
+    record_count = 0
+    records = []
+
+    ts_filter = TimestampFilter(max_ts)
+
+    # file stats for the manifest
+    row_count = 0
+    min_ts = None
+    max_file_ts = None
+
+    file_size, file_mtime = source.stat()
+
+    with source.open() as raw_file:
+        reader = HashingReader(raw_file)
+        f = io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8")
+
+        for row in iter_json_array(f):
+            # timestamps have a fixed format, so they can be compared as strings
+            row_count += 1
+            if min_ts is None or row["ts"] < min_ts:
+                min_ts = row["ts"]
+            if max_file_ts is None or row["ts"] > max_file_ts:
+                max_file_ts = row["ts"]
+
+            # keep the record only if the timestamp is later than the max recorded one
+            if not all_new and not ts_filter.is_newer(row["ts"]):
+                continue
+
+            records.append(history_record(row))
+
+            # flush a full chunk
+            if len(records) >= chunk_size:
+                db.bulk_insert("staging.streaming_history", HISTORY_COLUMNS, records)
+                record_count += len(records)
+                records = []
+
+        # read whatever follows the array so the hash covers the whole file
+        f.read()
+
+    # flush the remainder
+    if records:
+        db.bulk_insert("staging.streaming_history", HISTORY_COLUMNS, records)
+        record_count += len(records)
+
+    # empty file check
+    if record_count == 0:
+        logger.info(f"Empty file or nothing to insert: {filename}")
+
+    # Log success
+    processing_time = time.perf_counter() - file_start_time
+    logger.info(f"Successfully processed {filename}: {record_count} records in {processing_time:.2f} seconds")
+
+    file_info = {
+        "file_size": file_size,
+        "file_mtime": file_mtime,
+        "content_hash": reader.hexdigest(),
+        "row_count": row_count,
+        "min_ts": min_ts,
+        "max_ts": max_file_ts,
+    }
+    return record_count, processing_time, file_info
+
+
+def _load_history_file_in_worker(source:HistorySource, max_ts:datetime, chunk_size:int, all_new:bool) -> tuple[int, float, dict]:
+    # a connection per file, closed before the worker takes the next one, so none is left open when the pool shuts down
+    logger = logging.getLogger("etl_pipeline")
+    with DatabaseManager(logger, pool_size=1) as db:
+        return load_history_file(db, logger, source, max_ts, chunk_size, all_new)
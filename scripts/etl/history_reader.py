@@ -0,0 +1,264 @@
+import glob
+import gzip
+import hashlib
+import io
+import json
+import os
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import IO, Iterator
+
+# columns of staging.streaming_history in the order they are stored in the export files
+HISTORY_COLUMNS = ["ts", "platform", "ms_played", "conn_country", "ip_addr", "master_metadata_track_name", "master_metadata_album_artist_name", "master_metadata_album_album_name", "spotify_track_uri", "episode_name", "episode_show_name", "spotify_episode_uri", "reason_start", "reason_end", "shuffle", "skipped", "offline", "offline_timestamp", "incognito_mode"]
+
+# timestamp format used by the export files, e.g. 2021-01-01T00:00:00Z
+HISTORY_TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+_WHITESPACE = " \t\n\r"
+# characters that can follow a scalar array element
+_SCALAR_END = _WHITESPACE + ",]"
+
+
+def history_record(row: dict) -> tuple:
+    """
+    Builds a staging.streaming_history record from a single export row.
+
+    Args:
+        row (dict): One element of the Spotify export array.
+
+    Returns:
+        tuple: Values in the order of HISTORY_COLUMNS.
+    """
+    return tuple(row[column] for column in HISTORY_COLUMNS)
+
+
+class TimestampFilter:
+    """
+    Tells if an export timestamp is later than a watermark.
+
+    Timestamps in the export format are compared as strings against the pre-formatted watermark,
+    which avoids parsing every row. Anything in another format falls back to a full parse.
+    """
+
+    def __init__(self, max_ts: datetime):
+        self.max_ts = max_ts
+        # export timestamps have whole seconds, so truncating the watermark keeps the comparison exact
+        self.max_ts_str = max_ts.astimezone(timezone.utc).strftime(HISTORY_TS_FORMAT)
+
+    def is_newer(self, ts: str) -> bool:
+        if len(ts) == 20 and ts[4] == "-" and ts[7] == "-" and ts[10] == "T" and ts[13] == ":" and ts[16] == ":" and ts[19] == "Z":
+            return ts > self.max_ts_str
+
+        parsed_ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        if parsed_ts.tzinfo is None:
+            parsed_ts = parsed_ts.replace(tzinfo=timezone.utc)
+        return parsed_ts > self.max_ts
+
+
+def iter_json_array(f: IO[str], read_size: int = 64 * 1024, max_element_size: int = 256 * 1024) -> Iterator[dict]:
+    """
+    Lazily yields the elements of a top level JSON array, one at a time.
+
+    Only a window of the file (roughly `read_size` characters plus one element) is kept in memory,
+    so memory use does not depend on the size of the file.
+
+    Args:
+        f (IO[str]): File opened in text mode.
+        read_size (int): Number of characters read from the file at a time.
+        max_element_size (int): Largest element, in characters, the reader waits for. An element that still
+            doesn't decode once this much of it is buffered is treated as malformed instead of reading on.
+
+    Yields:
+        dict: Decoded array elements.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a valid JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = f.read(read_size)
+        if not chunk:
+            eof = True
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            read_more()
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise json.JSONDecodeError("Expecting '['", buffer, pos)
+    pos += 1
+
+    expect_value = True
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == "]":
+        return
+
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise json.JSONDecodeError("Unterminated array", buffer, pos)
+
+        if not expect_value:
+            # between elements: either a separator or the end of the array
+            if buffer[pos] == "]":
+                return
+            if buffer[pos] != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_value = True
+            continue
+
+        if buffer[pos] not in "{[\"" and len(buffer) - pos <= max_element_size:
+            # a number cut off by the window can still decode (1.5 out of 1.5e10, 0 out of 0.25),
+            # so a scalar is only decoded once the character ending it is in the window
+            scalar_end = pos
+            while scalar_end < len(buffer) and buffer[scalar_end] not in _SCALAR_END:
+                scalar_end += 1
+            if scalar_end == len(buffer) and not eof:
+                read_more()
+                continue
+
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # the element may be cut off at the end of the window, read more and try again,
+            # unless it's already too large to be a cut off element
+            if eof or len(buffer) - pos > max_element_size:
+                raise
+            read_more()
+            continue
+
+        pos = end
+        expect_value = False
+        yield element
+
+        # drop the consumed part of the window
+        if pos > read_size:
+            buffer, pos = buffer[pos:], 0
+
+
+class HashingReader(io.RawIOBase):
+    """Binary reader that computes the SHA-256 of everything read through it."""
+
+    def __init__(self, raw: IO[bytes]):
+        self._raw = raw
+        self._hash = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = self._raw.readinto(b)
+        if n:
+            self._hash.update(memoryview(b)[:n])
+        return n
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+# zip members that are part of the export but are not audio streaming history
+ZIP_MEMBER_EXCLUDE = ("Streaming_History_Video",)
+
+
+class HistorySource:
+    """
+    A Spotify export file in the raw data directory: a plain `.json`, a compressed `.json.gz` / `.json.zst`,
+    or a JSON member of a `.zip` archive. Compressed sources are decompressed as a stream when opened.
+
+    Args:
+        path (str): Path to the file on disk.
+        key (str): Path relative to the raw data directory, used as the manifest key.
+        member (str): Name of the member inside a zip archive, None for other files.
+    """
+
+    def __init__(self, path: str, key: str, member: str = None):
+        self.path = path
+        self.key = key
+        self.member = member
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.member) if self.member else os.path.basename(self.path)
+
+    def stat(self) -> tuple[int, float]:
+        """
+        Returns:
+            tuple[int, float]: (size, modification time) of the source. Zip members report their
+            uncompressed size and the modification time of the archive.
+        """
+        file_stat = os.stat(self.path)
+        if self.member:
+            with zipfile.ZipFile(self.path) as archive:
+                return archive.getinfo(self.member).file_size, file_stat.st_mtime
+        return file_stat.st_size, file_stat.st_mtime
+
+    @contextmanager
+    def open(self) -> Iterator[IO[bytes]]:
+        """Opens the source as a binary stream of decompressed JSON."""
+        if self.member:
+            with zipfile.ZipFile(self.path) as archive, archive.open(self.member) as f:
+                yield f
+        elif self.path.endswith(".gz"):
+            with gzip.open(self.path, "rb") as f:
+                yield f
+        elif self.path.endswith(".zst"):
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError(f"The zstandard package is required to read {self.key}")
+            with open(self.path, "rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as f:
+                yield f
+        else:
+            with open(self.path, "rb") as f:
+                yield f
+
+    def sha256(self, read_size: int = 1024 * 1024) -> str:
+        """Returns the SHA-256 of the decompressed content without parsing it."""
+        content_hash = hashlib.sha256()
+        with self.open() as f:
+            while chunk := f.read(read_size):
+                content_hash.update(chunk)
+        return content_hash.hexdigest()
+
+    def __repr__(self):
+        return f"HistorySource({self.key!r})"
+
+
+def find_history_sources(raw_data_path: str) -> list[HistorySource]:
+    """
+    Lists the export sources in the raw data directory.
+
+    Args:
+        raw_data_path (str): Directory with the Spotify export files.
+
+    Returns:
+        list[HistorySource]: `.json`, `.json.gz` and `.json.zst` files, and the JSON members of `.zip` archives.
+    """
+    sources = []
+    for pattern in ["*.json", "*.json.gz", "*.json.zst"]:
+        for path in sorted(glob.glob(os.path.join(raw_data_path, pattern))):
+            sources.append(HistorySource(path, os.path.relpath(path, raw_data_path)))
+
+    for path in sorted(glob.glob(os.path.join(raw_data_path, "*.zip"))):
+        archive_key = os.path.relpath(path, raw_data_path)
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if not member.endswith(".json") or os.path.basename(member).startswith(ZIP_MEMBER_EXCLUDE):
+                    continue
+                sources.append(HistorySource(path, f"{archive_key}/{member}", member))
+
+    return sources
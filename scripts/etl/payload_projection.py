@@ -0,0 +1,78 @@
+class First:
+    """Field spec for a list of which only the first element is kept, e.g. the largest image."""
+
+    def __init__(self, spec):
+        self.spec = spec
+
+
+# fields of the Spotify API payloads that are staged. Besides what DataTransformer reads, this keeps every
+# artist of a track and the show of an episode, since artist and podcast URIs are looked up from staging.
+# True keeps the value as is, a dict keeps the listed keys of an object (or of every object in a list)
+PAYLOAD_FIELDS = {
+    "track": {
+        "uri": True,
+        "name": True,
+        "duration_ms": True,
+        "album": {
+            "id": True,
+            "name": True,
+            "album_type": True,
+            "release_date": True,
+            "release_date_precision": True,
+            "images": First({"url": True}),
+        },
+        "artists": {"uri": True, "name": True},
+    },
+    "artist": {
+        "uri": True,
+        "name": True,
+        "images": First({"url": True}),
+    },
+    "episode": {
+        "uri": True,
+        "duration_ms": True,
+        "release_date": True,
+        "release_date_precision": True,
+        "show": {"uri": True, "name": True},
+    },
+    "podcast": {
+        "uri": True,
+        "name": True,
+        "description": True,
+        "images": First({"url": True}),
+    },
+}
+
+
+def project(value, spec):
+    """
+    Keeps only the parts of a JSON value described by a field spec.
+
+    Args:
+        value: decoded JSON value
+        spec: True, a dict of key -> spec, or First(spec)
+
+    Returns:
+        The projected value. Keys missing from the value stay missing.
+    """
+    if spec is True or value is None:
+        return value
+    if isinstance(spec, First):
+        return [project(value[0], spec.spec)] if value else value
+    if isinstance(value, list):
+        return [project(element, spec) for element in value]
+    return {key: project(value[key], field_spec) for key, field_spec in spec.items() if key in value}
+
+
+def project_payload(item_type: str, payload: dict) -> dict:
+    """
+    Slims down a Spotify API payload to the fields declared in PAYLOAD_FIELDS.
+
+    Args:
+        item_type (str): `track`, `episode`, `artist` or `podcast`
+        payload (dict): object returned by the API
+
+    Returns:
+        dict: the projected payload, or the payload as is for types without declared fields
+    """
+    return project(payload, PAYLOAD_FIELDS.get(item_type, True))
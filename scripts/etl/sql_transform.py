@@ -0,0 +1,221 @@
+"""
+Set-based dimension loads: the same cleaning as the DataTransformer._clean_* functions, written as
+INSERT ... SELECT over the staged jsonb so the rows never leave Postgres.
+"""
+
+# cover art is the first image, like `raw["images"][0]["url"] if raw.get("images") else None`
+_HAS_IMAGES = "(jsonb_typeof({obj} -> 'images') = 'array' AND jsonb_array_length({obj} -> 'images') > 0)"
+_COVER_ART_URL = "CASE WHEN " + _HAS_IMAGES + " THEN {obj} -> 'images' -> 0 ->> 'url' END"
+_IMAGES_VALID = "(NOT " + _HAS_IMAGES + " OR {obj} -> 'images' -> 0 ? 'url')"
+
+# duration_ms is stored as is and duration_sec is `int(round(duration_ms / 1000, 0))`, round() on float8 also rounds half to even
+_DURATION_MS = "(raw_data ->> 'duration_ms')::numeric::integer"
+_DURATION_SEC = "round((raw_data ->> 'duration_ms')::float8 / 1000)::integer"
+
+
+def _cover_art_url(obj: str) -> str:
+    return _COVER_ART_URL.format(obj=obj)
+
+
+def _images_valid(obj: str) -> str:
+    return _IMAGES_VALID.format(obj=obj)
+
+
+# per staging table: target table, target columns with their expressions, the checks a row must pass
+# to be cleaned without an error in Python, and the release date expression for entities that have one
+DIMENSION_SPECS = {
+    "tracks": {
+        "target_table": "core.dim_track",
+        "columns": {
+            "spotify_track_uri": "raw_data ->> 'uri'",
+            "track_title": "raw_data ->> 'name'",
+            "cover_art_url": _cover_art_url("raw_data -> 'album'"),
+            "album_name": "raw_data -> 'album' ->> 'name'",
+            "album_spotify_id": "raw_data -> 'album' ->> 'id'",
+            "album_type": "raw_data -> 'album' ->> 'album_type'",
+            "artist_name": "raw_data -> 'artists' -> 0 ->> 'name'",
+            "spotify_artist_uri": "raw_data -> 'artists' -> 0 ->> 'uri'",
+            "release_date": "release_date",
+            "duration_ms": _DURATION_MS,
+            "duration_sec": _DURATION_SEC,
+        },
+        "checks": [
+            "raw_data ?& array['uri', 'name']",
+            "jsonb_typeof(raw_data -> 'duration_ms') = 'number'",
+            "jsonb_typeof(raw_data -> 'album') = 'object'",
+            "raw_data -> 'album' ?& array['name', 'id', 'album_type', 'release_date_precision']",
+            "jsonb_typeof(raw_data -> 'album' -> 'release_date') = 'string'",
+            _images_valid("raw_data -> 'album'"),
+            "jsonb_typeof(raw_data -> 'artists' -> 0) = 'object'",
+            "raw_data -> 'artists' -> 0 ?& array['name', 'uri']",
+        ],
+        "release_date": "etl_internal.normalise_release_date(raw_data -> 'album' ->> 'release_date', raw_data -> 'album' ->> 'release_date_precision')",
+    },
+    "artists": {
+        "target_table": "core.dim_artist",
+        "columns": {
+            "spotify_artist_uri": "raw_data ->> 'uri'",
+            "cover_art_url": _cover_art_url("raw_data"),
+            "artist_name": "raw_data ->> 'name'",
+        },
+        "checks": [
+            "raw_data ?& array['uri', 'name']",
+            _images_valid("raw_data"),
+        ],
+    },
+    "podcasts": {
+        "target_table": "core.dim_podcast",
+        "columns": {
+            "spotify_podcast_uri": "raw_data ->> 'uri'",
+            "podcast_name": "raw_data ->> 'name'",
+            "description": "raw_data ->> 'description'",
+            "podcast_cover_art_url": _cover_art_url("raw_data"),
+        },
+        "checks": [
+            "raw_data ?& array['uri', 'name', 'description']",
+            _images_valid("raw_data"),
+        ],
+    },
+    "episodes": {
+        "target_table": "core.dim_episode",
+        "columns": {
+            "spotify_episode_uri": "raw_data ->> 'uri'",
+            "duration_ms": _DURATION_MS,
+            "duration_sec": _DURATION_SEC,
+            "podcast_name": "raw_data -> 'show' ->> 'name'",
+            "spotify_podcast_uri": "raw_data -> 'show' ->> 'uri'",
+            "release_date": "release_date",
+        },
+        "checks": [
+            "raw_data ?& array['uri', 'release_date_precision']",
+            "jsonb_typeof(raw_data -> 'duration_ms') = 'number'",
+            "jsonb_typeof(raw_data -> 'release_date') = 'string'",
+            "jsonb_typeof(raw_data -> 'show') = 'object'",
+            "raw_data -> 'show' ?& array['name', 'uri']",
+        ],
+        "release_date": "etl_internal.normalise_release_date(raw_data ->> 'release_date', raw_data ->> 'release_date_precision')",
+    },
+}
+
+
+def content_hash_expression(values: list[str]) -> str:
+    """
+    Builds the content_hash of a cleaned dimension row. Values are hashed as a jsonb array, so the hash is the same
+    whether the row was cleaned in Python (and sent as parameters) or in SQL.
+
+    Args:
+        values (list[str]): SQL expressions of the dimension columns, in DIMENSION_SPECS order
+
+    Returns:
+        str: md5 expression
+    """
+    return f"md5(jsonb_build_array({', '.join(values)})::text)"
+
+
+def build_upsert_clause(item_type: str) -> str:
+    """
+    Builds the ON CONFLICT clause of the SCD1 upsert: rows with a known URI are overwritten only when their
+    content hash changed, so unchanged rows don't get a new tuple version. Expects the target table aliased as `target`.
+
+    Args:
+        item_type (str): "tracks", "artists", "podcasts" or "episodes"
+
+    Returns:
+        str: ON CONFLICT ... DO UPDATE clause
+    """
+    uri_column, *columns = DIMENSION_SPECS[item_type]["columns"]
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns + ["content_hash"])
+    return f"ON CONFLICT ({uri_column}) DO UPDATE SET {updates} WHERE target.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+
+
+def build_dimension_load_query(item_type: str, upsert: bool = False) -> str:
+    """
+    Builds a single statement that loads every unprocessed staged row of a type into its dimension.
+
+    Rows the Python cleaning would reject, and rows whose release date does not parse, are written to
+    etl_internal.transform_errors and stay unprocessed. The other rows are inserted with ON CONFLICT DO NOTHING
+    and marked as processed.
+
+    Args:
+        item_type (str): "tracks", "artists", "podcasts" or "episodes"
+        upsert (bool): If True, update the rows whose content hash changed instead of skipping known URIs.
+            Only the latest staged row of every URI is loaded.
+
+    Returns:
+        str: query returning one (inserted or updated rows, error rows) tuple
+    """
+    spec = DIMENSION_SPECS[item_type]
+    checks = " AND ".join(f"({check})" for check in spec["checks"])
+    release_date = spec.get("release_date", "NULL::date")
+    date_check = "WHEN release_date IS NULL THEN 'Unparseable release date'" if "release_date" in spec else ""
+    columns = ", ".join(spec["columns"])
+    expressions = ",\n                ".join(spec["columns"].values())
+
+    if upsert:
+        uri_expression = next(iter(spec["columns"].values()))
+        aliased = ",\n                    ".join(f"{expression} AS {column}" for column, expression in spec["columns"].items())
+        load = f"""INSERT INTO {spec["target_table"]} AS target ({columns}, content_hash)
+            SELECT v.*, {content_hash_expression([f"v.{column}" for column in spec["columns"]])}
+            FROM (
+                SELECT DISTINCT ON ({uri_expression})
+                    {aliased}
+                FROM classified
+                WHERE error_reason IS NULL
+                ORDER BY {uri_expression}, record_id DESC
+            ) v
+            {build_upsert_clause(item_type)}"""
+    else:
+        load = f"""INSERT INTO {spec["target_table"]} ({columns})
+            SELECT
+                {expressions}
+            FROM classified
+            WHERE error_reason IS NULL
+            ORDER BY record_id
+            ON CONFLICT DO NOTHING"""
+
+    return f"""
+        WITH staged AS (
+            SELECT record_id, raw_data, COALESCE({checks}, FALSE) AS is_valid
+            FROM staging.spotify_{item_type}_data
+            WHERE is_processed = FALSE
+            FOR UPDATE
+        ),
+        checked AS (
+            SELECT
+                record_id,
+                raw_data,
+                CASE WHEN is_valid THEN {release_date} END AS release_date,
+                is_valid
+            FROM staged
+        ),
+        classified AS (
+            SELECT
+                *,
+                CASE
+                    WHEN NOT is_valid THEN 'Missing or invalid fields'
+                    {date_check}
+                END AS error_reason
+            FROM checked
+        ),
+        errors AS (
+            INSERT INTO etl_internal.transform_errors (entity_type, record_id, spotify_uri, error_reason, raw_data)
+            SELECT '{item_type}', record_id, raw_data ->> 'uri', error_reason, raw_data
+            FROM classified
+            WHERE error_reason IS NOT NULL
+            ON CONFLICT (entity_type, record_id) DO UPDATE SET
+                error_reason = EXCLUDED.error_reason,
+                logged_at = CURRENT_TIMESTAMP
+            RETURNING 1
+        ),
+        inserted AS (
+            {load}
+            RETURNING 1
+        ),
+        processed AS (
+            UPDATE staging.spotify_{item_type}_data s
+            SET is_processed = TRUE
+            FROM classified c
+            WHERE s.record_id = c.record_id AND c.error_reason IS NULL
+        )
+        SELECT (SELECT count(*) FROM inserted), (SELECT count(*) FROM errors);
+    """
@@ -0,0 +1,70 @@
+import queue
+import threading
+from typing import Iterable, Iterator
+
+# entity types whose payloads reference other entities: dependent entity type and how to read the referenced URIs
+DEPENDENT_ENTITIES = {
+    "track": ("artist", lambda item: [artist.get("uri") for artist in item.get("artists") or []]),
+    "episode": ("podcast", lambda item: [(item.get("show") or {}).get("uri")]),
+}
+
+
+class UriQueue:
+    """
+    Thread-safe queue of URIs for a dependent entity fetcher.
+
+    Producers put the URIs referenced by freshly staged payloads, a consumer reads them back
+    in API-sized batches. Every URI is handed out at most once.
+    """
+
+    _DONE = object()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def unseen(self, uris: Iterable[str]) -> list[str]:
+        """
+        Marks the URIs as seen and returns the ones that were not seen before.
+
+        Args:
+            uris (Iterable[str]): URIs referenced by a batch of payloads, may contain duplicates and None.
+
+        Returns:
+            list[str]: URIs not seen before, in their original order.
+        """
+        with self._lock:
+            new_uris = [uri for uri in dict.fromkeys(uris) if uri and uri not in self._seen]
+            self._seen.update(new_uris)
+        return new_uris
+
+    def put_many(self, uris: Iterable[str]):
+        for uri in uris:
+            self._queue.put(uri)
+
+    def close(self):
+        """Tells the consumer that no more URIs will be put."""
+        self._queue.put(self._DONE)
+
+    def iter_batches(self, batch_size: int = 50) -> Iterator[list[str]]:
+        """
+        Yields full batches as soon as they fill up, and the remainder once the queue is closed.
+
+        Args:
+            batch_size (int): Number of URIs in one batch.
+
+        Yields:
+            list[str]: next batch of URIs
+        """
+        batch = []
+        while True:
+            uri = self._queue.get()
+            if uri is self._DONE:
+                break
+            batch.append(uri)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
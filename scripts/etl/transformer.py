@@ -1,14 +1,46 @@
 from scripts.connectors.db_manager import DatabaseManager 
+from scripts.etl.sql_transform import DIMENSION_SPECS, build_dimension_load_query, build_upsert_clause, content_hash_expression
+from scripts.etl.dim_key_cache import DIM_KEY_COLUMNS, DimKeyCache
+from config.config import settings
 from psycopg2.extras import execute_values
 import logging
 import time
+from decimal import Decimal, ROUND_HALF_UP
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+# staged streams past the load watermark, with the local timestamp as it will be stored in ts_msk
+_FACT_SOURCE_QUERY = """
+    SELECT (s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow')::timestamp, s.ms_played, s.{uri_column},
+        s.reason_start, s.reason_end, s.shuffle, s.offline, s.offline_timestamp
+    FROM staging.streaming_history s
+    WHERE
+        s.{uri_column} IS NOT NULL
+        AND
+        s.ts > COALESCE(
+            (SELECT max_ts FROM etl_internal.load_watermarks WHERE target_table = %s),
+            '1900-01-01'::timestamp
+        );
+"""
+
+_FACT_COLUMNS = {
+    "track": ["ts_msk", "date_fk", "time_fk", "ms_played", "sec_played", "track_fk", "artist_fk", "reason_start_fk", "reason_end_fk", "shuffle", "percent_played", "offline", "offline_timestamp"],
+    "podcast": ["ts_msk", "date_fk", "time_fk", "sec_played", "episode_fk", "podcast_fk", "reason_start_fk", "reason_end_fk"],
+}
+
 
 class DataTransformer:
     def __init__(self, db: DatabaseManager, logger: logging.Logger):
         self.db = db
         self.logger = logger
         
-        self.BATCH_SIZE = 50
+        self.BATCH_SIZE = settings.TRANSFORM_BATCH_SIZE
+
+        # date range of dim_date once the dimension keys are validated, empty if they can't be derived
+        self._dim_key_range = None
+
+        # URI -> key maps for settings.FACT_LOAD_ENGINE == "python"
+        self.dim_keys = DimKeyCache()
 
     def _clean_track(self, raw_track:dict) -> (tuple[str, str, str, str, str, str, str, str, int, int] | None):
         """
@@ -160,12 +192,16 @@ class DataTransformer:
         
     def process_staged_batches(self, item_type:str) -> float:
         """
-        Transforms and loads staged Spotify dimension data into the core dimension tables.        
+        Transforms and loads staged Spotify dimension data into the core dimension tables.
+        With settings.DIM_LOAD_MODE == "upsert" rows of known URIs are overwritten when their content hash changed.
         Args:
             item_type (str): The type of item to process. Accepted values are "tracks", "artists", "podcasts", or "episodes".            
         Returns:
             float: The total time taken to process all batches for the given item type.
         """
+        if settings.TRANSFORM_ENGINE == "sql":
+            return self.process_staged_sql(item_type)
+
         # metrics
         time_start = time.perf_counter()
         total_items_count = 0
@@ -202,50 +238,145 @@ class DataTransformer:
             raise ValueError(f"Invalid item type passed. Expected 'tracks', 'artists', 'episodes' or 'podcasts', got: {item_type}")
     
         # query the staging layer for raw data and IDs
-        staged_items = self.db.execute_query(f"SELECT record_id, raw_data FROM staging.spotify_{item_type}_data WHERE is_processed = FALSE;")
-        if not staged_items:
+        select_query = f"SELECT record_id, raw_data FROM staging.spotify_{item_type}_data WHERE is_processed = FALSE;"
+        if settings.DIM_LOAD_MODE == "upsert":
+            # later fetches of the same URI win
+            select_query = select_query.replace(";", " ORDER BY record_id;")
+        if settings.TRANSFORM_STREAM_STAGED:
+            # rows arrive from a server-side cursor one batch at a time
+            batches = self.db.iter_query(select_query, batch_size=self.BATCH_SIZE)
+        else:
+            staged_items = self.db.execute_query(select_query) or []
+            batches = (staged_items[i:i+self.BATCH_SIZE] for i in range(0, len(staged_items), self.BATCH_SIZE))
+
+        if settings.FACT_LOAD_ENGINE == "python":
+            # read the keys already in the dimension now, the batches add the keys they insert
+            self.dim_keys.load(self.db, item_type)
+
+        load_batch = partial(self._load_dimension_batch, cleaning_func=cleaning_func, columns=columns, target_table=target_table, item_type=item_type)
+        batch_number = 0
+
+        if settings.TRANSFORM_FAST_COMMIT:
+            # one transaction and one commit for the whole item type
+            with self.db.transaction() as tx_cursor:
+                for batch_number, batch in enumerate(batches, start=1):
+                    total_items_count += load_batch(tx_cursor, batch, batch_number)
+        else:
+            for batch_number, batch in enumerate(batches, start=1):
+                # insert the batch inside a transaction
+                with self.db.transaction() as tx_cursor:
+                    total_items_count += load_batch(tx_cursor, batch, batch_number)
+        
+        if batch_number == 0:
             self.logger.warning("No unprocessed staged items found")
             total_time = round(time.perf_counter() - time_start, 2)
             return total_time
 
-        for i in range(0, len(staged_items), self.BATCH_SIZE):
-            batch_number = i // self.BATCH_SIZE + 1
-            # get the batch
-            batch = staged_items[i:i+self.BATCH_SIZE]
-            
-            # batch ids to later delete
-            batch_ids = []
-            # clean rows to insert
-            clean_rows = []
+        total_time = round(time.perf_counter() - time_start, 2)
+        self.logger.info(f"All batches processed successfully in {total_time} seconds. Inserted {total_items_count} {item_type}")
+        return total_time
 
-            for record_id, raw_data in batch:
-                clean_data = cleaning_func(raw_data)
-                # if there was an error while cleaning the json, skip over that record
-                if not clean_data:
-                    continue
+    def _load_dimension_batch(self, tx_cursor, batch:list, batch_number:int, cleaning_func, columns:list, target_table:str, item_type:str) -> int:
+        """
+        Cleans a batch of staged rows, inserts it into the dimension table and marks the cleaned rows as processed.
+        Args:
+            tx_cursor: cursor of the open transaction
+            batch (list): (record_id, raw_data) rows
+            batch_number (int): batch number for logging
+            cleaning_func (Callable): _clean_* function for the item type
+            columns (list): target columns
+            target_table (str): dimension table
+            item_type (str): "tracks", "artists", "podcasts" or "episodes"
+        Returns:
+            int: number of inserted rows
+        """
+        # batch ids to mark as processed
+        batch_ids = []
+        # clean rows to insert
+        clean_rows = []
 
-                batch_ids.append(record_id)
-                clean_rows.append(clean_data)
+        for record_id, raw_data in batch:
+            clean_data = cleaning_func(raw_data)
+            # if there was an error while cleaning the json, skip over that record
+            if not clean_data:
+                continue
 
-            # insert the batch inside a transaction
-            with self.db.transaction() as tx_cursor:
-                try:
-                    query = f"INSERT INTO {target_table} ({', '.join(columns)}) VALUES %s ON CONFLICT DO NOTHING"
-                    execute_values(tx_cursor, query, clean_rows)
-                    inserted = tx_cursor.rowcount
+            batch_ids.append(record_id)
+            clean_rows.append(clean_data)
 
-                    # mark processed rows
-                    tx_cursor.execute(f"UPDATE staging.spotify_{item_type}_data SET is_processed = TRUE WHERE record_id IN %s;", (tuple(batch_ids),))
+        if not clean_rows:
+            self.logger.warning(f"Batch {batch_number} has no rows that could be cleaned")
+            return 0
+
+        try:
+            query = f"INSERT INTO {target_table} ({', '.join(columns)}) VALUES %s ON CONFLICT DO NOTHING"
+            template = None
+            if settings.DIM_LOAD_MODE == "upsert":
+                # an upsert can't touch the same row twice, keep the latest staged row of every URI
+                clean_rows = [dict(zip(columns, row)) for row in {row[0]: row for row in clean_rows}.values()]
+                placeholders = [f"%({column})s" for column in columns]
+                template = f"({', '.join(placeholders)}, {content_hash_expression(placeholders)})"
+                query = f"INSERT INTO {target_table} AS target ({', '.join(columns)}, content_hash) VALUES %s {build_upsert_clause(item_type)}"
+
+            if settings.FACT_LOAD_ENGINE == "python":
+                # hand the keys of the new rows to the cache for the fact load
+                query += f" RETURNING {', '.join(DIM_KEY_COLUMNS[item_type][1])}"
+                new_keys = execute_values(tx_cursor, query, clean_rows, template=template, page_size=len(clean_rows), fetch=True)
+                self.dim_keys.add(item_type, new_keys)
+                inserted = len(new_keys)
+            else:
+                # a single page, so rowcount covers the whole batch
+                execute_values(tx_cursor, query, clean_rows, template=template, page_size=len(clean_rows))
+                inserted = tx_cursor.rowcount
+
+            # mark processed rows with one join against the array of ids
+            tx_cursor.execute(
+                f"UPDATE staging.spotify_{item_type}_data s SET is_processed = TRUE FROM unnest(%s::integer[]) AS p(record_id) WHERE s.record_id = p.record_id;",
+                (batch_ids,)
+            )
+
+            action = "Inserted or updated" if settings.DIM_LOAD_MODE == "upsert" else "Inserted"
+            self.logger.info(f"Batch {batch_number} done. {action} {inserted} rows into {target_table}")
+            return inserted
+
+        except Exception as e:
+            self.logger.error(f"Error while inserting and updating batch number {batch_number}: {e}")
+            raise # raise so the transaction rolls back
+
+    def process_staged_sql(self, item_type:str) -> float:
+        """
+        Loads staged Spotify dimension data into the core dimension tables with a single INSERT ... SELECT over the
+        staged jsonb. Produces the same rows as process_staged_batches, rows that can't be cleaned are captured
+        in etl_internal.transform_errors and stay unprocessed.
+        Args:
+            item_type (str): The type of item to process. Accepted values are "tracks", "artists", "podcasts", or "episodes".
+        Returns:
+            float: The total time taken to load the given item type.
+        """
+        time_start = time.perf_counter()
+        self.logger.info(f"Started processing staged {item_type} in the database")
+
+        if item_type not in DIMENSION_SPECS:
+            self.logger.error(f"Invalid item type passed. Expected 'tracks', 'artists', 'episodes' or 'podcasts', got: {item_type}")
+            raise ValueError(f"Invalid item type passed. Expected 'tracks', 'artists', 'episodes' or 'podcasts', got: {item_type}")
+
+        with self.db.transaction() as tx_cursor:
+            try:
+                tx_cursor.execute(build_dimension_load_query(item_type, upsert=settings.DIM_LOAD_MODE == "upsert"))
+                inserted, errors = tx_cursor.fetchone()
+            except Exception as e:
+                self.logger.error(f"Error while loading staged {item_type}: {e}")
+                raise # raise so the transaction rolls back
+
+        if errors:
+            self.logger.warning(f"{errors} staged {item_type} could not be cleaned, see etl_internal.transform_errors")
+
+        # the new rows never left the database, read the keys again for the Python fact load
+        self.dim_keys.discard(item_type)
 
-                    self.logger.info(f"Batch {batch_number} done. Inserted {inserted} rows into {target_table}")
-                    total_items_count += inserted
-                
-                except Exception as e:
-                    self.logger.error(f"Error while inserting and updating batch number {batch_number}: {e}")
-                    raise # raise so the transaction rolls back
-        
         total_time = round(time.perf_counter() - time_start, 2)
-        self.logger.info(f"All batches processed successfully in {total_time} seconds. Inserted {total_items_count} {item_type}")
+        action = "Inserted or updated" if settings.DIM_LOAD_MODE == "upsert" else "Inserted"
+        self.logger.info(f"Loaded staged {item_type} in {total_time} seconds. {action} {inserted} rows into {DIMENSION_SPECS[item_type]['target_table']}")
         return total_time
 
     def insert_core_facts(self, item_type:str) -> float:
@@ -254,7 +385,10 @@ class DataTransformer:
         
         For item_type "track" or "podcast", this function executes an INSERT query that
         joins the staging table with the appropriate dimension tables to generate fully transformed fact rows. It uses a delta load
-        approach based on the maximum timestamp already present in the fact table.        
+        approach based on the load watermark of the fact table in etl_internal.load_watermarks, which the same
+        statement moves forward. The monthly partitions the new rows fall into are created beforehand. With settings.FACT_DERIVE_DIM_KEYS
+        the date and time keys are computed from the local timestamp instead of joining dim_date and dim_time.
+        With settings.FACT_LOAD_ENGINE == "python" the rows are built by insert_core_facts_copy instead.
         Args:
             item_type (str): The type of fact to load, either "track" or "podcast".            
         Returns:
@@ -262,6 +396,9 @@ class DataTransformer:
         Raises:
             ValueError: If an invalid item type is provided.
         """
+        if settings.FACT_LOAD_ENGINE == "python":
+            return self.insert_core_facts_copy(item_type)
+
         # metrics
         time_start = time.perf_counter()
         row_count = 0
@@ -276,9 +413,9 @@ class DataTransformer:
             shuffle, percent_played, offline, offline_timestamp
             )
             SELECT
-                s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow' AS ts_msk,
-                d.date_id,
-                t.time_id,
+                l.ts_msk,
+                {date_fk},
+                {time_fk},
                 s.ms_played,
                 s.ms_played / 1000,
                 dt.track_id,
@@ -290,8 +427,8 @@ class DataTransformer:
                 s.offline,
                 s.offline_timestamp
             FROM staging.streaming_history s
-            LEFT JOIN core.dim_date d ON d.date = (s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow')::date
-            LEFT JOIN core.dim_time t ON t.time = date_trunc('minute', s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow')::time
+            CROSS JOIN LATERAL (SELECT s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow' AS ts_msk) l
+            {date_time_joins}
             LEFT JOIN core.dim_track dt ON s.spotify_track_uri = dt.spotify_track_uri
             LEFT JOIN core.dim_artist da ON dt.spotify_artist_uri = da.spotify_artist_uri
             LEFT JOIN core.dim_reason rs ON s.reason_start = rs.reason_type AND rs.reason_group = 'start'
@@ -299,26 +436,26 @@ class DataTransformer:
             WHERE 
                 s.spotify_track_uri IS NOT NULL 
                 AND 
-                s.ts > (
-                SELECT COALESCE(MAX(ts_msk AT TIME ZONE 'Europe/Moscow' AT TIME ZONE 'UTC'), '1900-01-01'::timestamp)
-                FROM core.fact_tracks_history
-            );
+                s.ts > COALESCE(
+                    (SELECT max_ts FROM etl_internal.load_watermarks WHERE target_table = 'core.fact_tracks_history'),
+                    '1900-01-01'::timestamp
+                )
             """
         elif item_type == "podcast":
             query = """
             INSERT INTO core.fact_podcasts_history (ts_msk, date_fk, time_fk, sec_played, episode_fk, podcast_fk, reason_start_fk, reason_end_fk)
             SELECT
-                s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow' AS ts_msk,
-                d.date_id,
-                t.time_id,
+                l.ts_msk,
+                {date_fk},
+                {time_fk},
                 s.ms_played / 1000,
                 COALESCE(de.episode_id, 0),
                 COALESCE(dp.podcast_id, 0),
                 rs.reason_id,
                 re.reason_id
             FROM staging.streaming_history s
-            LEFT JOIN core.dim_date d ON d.date = (s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow')::date
-            LEFT JOIN core.dim_time t ON t.time = date_trunc('minute', s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow')::time
+            CROSS JOIN LATERAL (SELECT s.ts AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow' AS ts_msk) l
+            {date_time_joins}
             LEFT JOIN core.dim_episode de ON s.spotify_episode_uri = de.spotify_episode_uri
             LEFT JOIN core.dim_podcast dp ON de.spotify_podcast_uri = dp.spotify_podcast_uri
             LEFT JOIN core.dim_reason rs ON s.reason_start = rs.reason_type AND rs.reason_group = 'start'
@@ -326,21 +463,60 @@ class DataTransformer:
             WHERE
                 s.spotify_episode_uri IS NOT NULL
                 AND
-                s.ts > (
-                    SELECT COALESCE(MAX(ts_msk AT TIME ZONE 'Europe/Moscow' AT TIME ZONE 'UTC'), '1900-01-01'::timestamp)
-                    FROM core.fact_podcasts_history
-            );
+                s.ts > COALESCE(
+                    (SELECT max_ts FROM etl_internal.load_watermarks WHERE target_table = 'core.fact_podcasts_history'),
+                    '1900-01-01'::timestamp
+                )
             """
         else:
             self.logger.error(f"Invalid item type passed. Expected 'track' or 'podcast', got: {item_type}")
             raise ValueError(f"Invalid item type passed. Expected 'track' or 'podcast', got: {item_type}")
         
+        # date and time keys: derived from the local timestamp, or looked up in dim_date and dim_time
+        params = None
+        key_range = self._get_dim_key_range() if settings.FACT_DERIVE_DIM_KEYS else None
+        if key_range:
+            query = query.format(
+                date_fk="CASE WHEN l.ts_msk::date BETWEEN %(min_date)s AND %(max_date)s THEN to_char(l.ts_msk, 'YYYYMMDD')::integer END",
+                time_fk="(EXTRACT(HOUR FROM l.ts_msk) * 60 + EXTRACT(MINUTE FROM l.ts_msk))::integer",
+                date_time_joins=""
+            )
+            params = key_range
+        else:
+            query = query.format(
+                date_fk="d.date_id",
+                time_fk="t.time_id",
+                date_time_joins="""LEFT JOIN core.dim_date d ON d.date = l.ts_msk::date
+            LEFT JOIN core.dim_time t ON t.time = date_trunc('minute', l.ts_msk)::time"""
+            )
+
+        # the watermark moves forward in the same statement, so it can't disagree with the fact table
+        target_table = f"core.fact_{item_type}s_history"
+        query = f"""
+            WITH inserted AS (
+                {query.strip()}
+                RETURNING ts_msk
+            ),
+            watermark AS (
+                INSERT INTO etl_internal.load_watermarks (target_table, max_ts)
+                SELECT '{target_table}', MAX(ts_msk AT TIME ZONE 'Europe/Moscow' AT TIME ZONE 'UTC') FROM inserted
+                HAVING count(*) > 0
+                ON CONFLICT (target_table) DO UPDATE SET
+                    max_ts = GREATEST(etl_internal.load_watermarks.max_ts, EXCLUDED.max_ts),
+                    updated_at = CURRENT_TIMESTAMP
+            )
+            SELECT count(*) FROM inserted;
+        """
+
         try:
-            self.db.execute_query(query)
+            self.db.ensure_load_watermarks()
+            self.db.ensure_fact_partitions(target_table)
+            with self.db.transaction() as tx_cursor:
+                tx_cursor.execute(query, params)
+                row_count = tx_cursor.fetchone()[0]
 
             total_time = round(time.perf_counter() - time_start, 2)
-            row_count = self.db.cursor.rowcount
-            self.logger.info(f"Inserted {row_count} rows into fact_tracks_history in {total_time} seconds")
+            self.logger.info(f"Inserted {row_count} rows into fact_{item_type}s_history in {total_time} seconds")
 
             return total_time
         
@@ -348,6 +524,143 @@ class DataTransformer:
             self.logger.error(f"Error while inserting data into fact_{item_type}s_history: {e}")
             raise
 
+    def insert_core_facts_copy(self, item_type:str) -> float:
+        """
+        Loads new fact records like insert_core_facts, but resolves the foreign keys in Python from the in-memory
+        URI -> key maps of self.dim_keys and bulk loads the rows with COPY. The staged history is read in one pass
+        and the dimensions are never joined on their text URIs.
+
+        Unknown episodes and podcasts get the `0` fallback rows like in insert_core_facts, unknown tracks and
+        artists are left NULL. The load watermark moves forward in the same transaction as the COPY.
+        Args:
+            item_type (str): The type of fact to load, either "track" or "podcast".
+        Returns:
+            float: The time taken to execute the insertion.
+        Raises:
+            ValueError: If an invalid item type is provided.
+        """
+        time_start = time.perf_counter()
+
+        if item_type not in _FACT_COLUMNS:
+            self.logger.error(f"Invalid item type passed. Expected 'track' or 'podcast', got: {item_type}")
+            raise ValueError(f"Invalid item type passed. Expected 'track' or 'podcast', got: {item_type}")
+
+        self.logger.info(f"Started copying data into fact_{item_type}s_history")
+        target_table = f"core.fact_{item_type}s_history"
+
+        # small lookups of the shared dims
+        dates = dict(self.db.execute_query("SELECT date, date_id FROM core.dim_date;") or [])
+        times = dict(self.db.execute_query("SELECT time, time_id FROM core.dim_time;") or [])
+        # the SQL load joins on reason_type = reason_start, which never matches NULL, so the NULL reasons of dim_reason are left out
+        reasons = {(reason_type, reason_group): reason_id for reason_type, reason_group, reason_id in self.db.execute_query("SELECT reason_type, reason_group, reason_id FROM core.dim_reason;") or [] if reason_type is not None}
+
+        if item_type == "track":
+            tracks = self.dim_keys.load(self.db, "tracks")
+            artists = self.dim_keys.load(self.db, "artists")
+
+            def fact_keys(uri, ms_played):
+                track_id, artist_uri, duration_ms = tracks.get(uri, (None, None, None))
+                artist_id = artists[artist_uri][0] if artist_uri in artists else None
+                percent_played = (Decimal(ms_played) / duration_ms * 100).quantize(Decimal("0.1"), ROUND_HALF_UP) if duration_ms else None
+                return track_id, artist_id, percent_played
+        else:
+            episodes = self.dim_keys.load(self.db, "episodes")
+            podcasts = self.dim_keys.load(self.db, "podcasts")
+
+            def fact_keys(uri, ms_played):
+                episode_id, podcast_uri = episodes.get(uri, (0, None))
+                podcast_id = podcasts[podcast_uri][0] if podcast_uri in podcasts else 0
+                return episode_id, podcast_id
+
+        self.db.ensure_load_watermarks()
+        self.db.ensure_fact_partitions(target_table)
+
+        select_query = _FACT_SOURCE_QUERY.format(uri_column=f"spotify_{'track' if item_type == 'track' else 'episode'}_uri")
+        if settings.TRANSFORM_STREAM_STAGED:
+            # the stream has a connection of its own, so it can be read while the COPY runs
+            batches = self.db.iter_query(select_query, (target_table,), batch_size=10000)
+        else:
+            batches = [self.db.execute_query(select_query, (target_table,)) or []]
+
+        max_ts_msk = None
+
+        def fact_rows():
+            nonlocal max_ts_msk
+            for batch in batches:
+                for ts_msk, ms_played, uri, reason_start, reason_end, shuffle, offline, offline_timestamp in batch:
+                    if max_ts_msk is None or ts_msk > max_ts_msk:
+                        max_ts_msk = ts_msk
+
+                    date_fk = dates.get(ts_msk.date())
+                    time_fk = times.get(ts_msk.time().replace(second=0, microsecond=0))
+                    reason_start_fk = reasons.get((reason_start, "start"))
+                    reason_end_fk = reasons.get((reason_end, "end"))
+
+                    if item_type == "track":
+                        track_fk, artist_fk, percent_played = fact_keys(uri, ms_played)
+                        yield (ts_msk, date_fk, time_fk, ms_played, ms_played // 1000, track_fk, artist_fk, reason_start_fk, reason_end_fk,
+                               shuffle, percent_played, offline, offline_timestamp)
+                    else:
+                        episode_fk, podcast_fk = fact_keys(uri, ms_played)
+                        yield (ts_msk, date_fk, time_fk, ms_played // 1000, episode_fk, podcast_fk, reason_start_fk, reason_end_fk)
+
+        try:
+            with self.db.transaction() as tx_cursor:
+                row_count, _ = self.db.copy_insert(target_table, _FACT_COLUMNS[item_type], fact_rows(), copy_format="text", on_conflict=False, commit=False)
+                if max_ts_msk is not None:
+                    tx_cursor.execute(
+                        """
+                        INSERT INTO etl_internal.load_watermarks (target_table, max_ts)
+                        VALUES (%s, %s::timestamp AT TIME ZONE 'Europe/Moscow' AT TIME ZONE 'UTC')
+                        ON CONFLICT (target_table) DO UPDATE SET
+                            max_ts = GREATEST(etl_internal.load_watermarks.max_ts, EXCLUDED.max_ts),
+                            updated_at = CURRENT_TIMESTAMP;
+                        """,
+                        (target_table, max_ts_msk)
+                    )
+
+            total_time = round(time.perf_counter() - time_start, 2)
+            self.logger.info(f"Copied {row_count} rows into fact_{item_type}s_history in {total_time} seconds")
+            return total_time
+
+        except Exception as e:
+            self.logger.error(f"Error while copying data into fact_{item_type}s_history: {e}")
+            raise
+
+    def _get_dim_key_range(self) -> dict | None:
+        """
+        Checks once per run that the dim_date and dim_time keys follow the formulas of dim_date_populate.sql
+        and dim_time_populate.sql (YYYYMMDD and minute of the day), so fact keys can be computed instead of joined.
+        Returns:
+            dict | None: min_date and max_date of the contiguous dim_date calendar, None if the keys can't be derived
+        """
+        if self._dim_key_range is not None:
+            return self._dim_key_range or None
+
+        result = self.db.execute_query(
+            """
+            SELECT
+                (SELECT count(*) FROM core.dim_date
+                 WHERE date_id <> EXTRACT(YEAR FROM date) * 10000 + EXTRACT(MONTH FROM date) * 100 + EXTRACT(DAY FROM date)),
+                (SELECT count(*) FROM core.dim_date),
+                (SELECT min(date) FROM core.dim_date),
+                (SELECT max(date) FROM core.dim_date),
+                (SELECT count(*) FROM core.dim_time
+                 WHERE time_id <> EXTRACT(HOUR FROM time) * 60 + EXTRACT(MINUTE FROM time) OR EXTRACT(SECOND FROM time) <> 0),
+                (SELECT count(DISTINCT time_id) FROM core.dim_time);
+            """
+        )
+        bad_dates, date_count, min_date, max_date, bad_times, time_count = result[0] if result else (None,) * 6
+
+        if bad_dates == 0 and min_date is not None and date_count == (max_date - min_date).days + 1 and bad_times == 0 and time_count == 1440:
+            self._dim_key_range = {"min_date": min_date, "max_date": max_date}
+            self.logger.info(f"Deriving fact date and time keys, dim_date covers {min_date} to {max_date}")
+        else:
+            self._dim_key_range = {}
+            self.logger.warning("dim_date or dim_time keys don't follow the generated layout, joining the dimensions for fact keys")
+
+        return self._dim_key_range or None
+
     def populate_dim_reason(self) -> float:
         """
         Repopulates dim_reason in case there are new reasons added
@@ -400,6 +713,63 @@ class DataTransformer:
                 self.logger.error(f"Error during staging cleanup: {e}", exc_info=True)
                 raise
 
+    def process_dims_concurrently(self, dim_item_types:list, workers:int) -> float:
+        """
+        Loads the dimension types in parallel, each on its own pooled connection, and waits for all of them.
+        The dimension loads share no data, so the order does not matter.
+        Args:
+            dim_item_types (list): item types accepted by process_staged_batches
+            workers (int): number of dimensions loaded at the same time
+        Returns:
+            float: wall time of the parallel load
+        Raises:
+            Exception: the first error raised by a dimension load, after every load has finished
+        """
+        start_time = time.perf_counter()
+
+        def process_on_own_connection(item_type:str) -> float:
+            with self.db.checkout():
+                return self.process_staged_batches(item_type)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {item_type: pool.submit(process_on_own_connection, item_type) for item_type in dim_item_types}
+
+        errors = []
+        for item_type, future in futures.items():
+            try:
+                self.logger.info(f"Loading {item_type} took {future.result()} seconds")
+            except Exception as e:
+                self.logger.error(f"Error while loading {item_type}: {e}")
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+        total_time = round(time.perf_counter() - start_time, 2)
+        self.logger.info(f"Finished loading {len(dim_item_types)} dimensions concurrently in {total_time} seconds")
+        return total_time
+
+    def _dim_workers(self) -> int:
+        """
+        Number of dimensions to load in parallel: settings.TRANSFORM_DIM_WORKERS, capped so that every worker
+        gets its connections from the pool at once. With TRANSFORM_STREAM_STAGED a worker needs a second
+        connection for the stream of staged rows.
+        Returns:
+            int: 1 to load the dimensions one by one
+        """
+        workers = settings.TRANSFORM_DIM_WORKERS
+        if workers <= 1:
+            return 1
+        if self.db.pool is None:
+            self.logger.warning("Concurrent dimension loading needs a connection pool (DB_POOL_SIZE > 1), loading dimensions one by one")
+            return 1
+
+        connections_per_worker = 2 if settings.TRANSFORM_STREAM_STAGED else 1
+        available = max(self.db.pool_size // connections_per_worker, 1)
+        if workers > available:
+            self.logger.warning(f"TRANSFORM_DIM_WORKERS={workers} needs {workers * connections_per_worker} pooled connections but DB_POOL_SIZE is {self.db.pool_size}, using {available} workers")
+            workers = available
+        return workers
+
     def run(self, debug_disable_cleanup:bool=None) -> int:
         """
         Orchestrates the full data transformation and loading process.
@@ -420,9 +790,13 @@ class DataTransformer:
         total_time = 0.0
 
         # populate dims
-        for item_type in dim_item_types:
-            process_time = self.process_staged_batches(item_type)
-            total_time += process_time
+        workers = self._dim_workers()
+        if workers > 1:
+            total_time += self.process_dims_concurrently(dim_item_types, workers)
+        else:
+            for item_type in dim_item_types:
+                process_time = self.process_staged_batches(item_type)
+                total_time += process_time
 
         # populate dim_reason
         process_time = self.populate_dim_reason()
@@ -0,0 +1,17 @@
+from config.config import settings
+from config.logging_config import setup_logging
+from scripts.connectors.db_manager import DatabaseManager
+from scripts.etl.extractor import DataExtractor, fetch_queue_from_settings
+
+def main():
+    logger = setup_logging()
+
+    if not settings.FETCH_QUEUE_REDIS_URL:
+        raise ValueError("FETCH_QUEUE_REDIS_URL must be set to run a fetch worker")
+
+    with DatabaseManager(logger) as db:
+        extractor = DataExtractor(db, logger)
+        extractor.run_fetch_worker(fetch_queue_from_settings(), idle_timeout=settings.FETCH_WORKER_IDLE_SECONDS)
+
+if __name__ == "__main__":
+    main()
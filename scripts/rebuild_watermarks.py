@@ -0,0 +1,12 @@
+from config.logging_config import setup_logging
+from scripts.connectors.db_manager import DatabaseManager
+
+def main():
+    """Recomputes the fact load watermarks from the fact tables, e.g. after facts were deleted or restored by hand."""
+    logger = setup_logging()
+
+    with DatabaseManager(logger) as db:
+        db.rebuild_load_watermarks()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import re
+from logging import Logger
+from config.logging_config import setup_logging
+from scripts.connectors.db_manager import DatabaseManager
+
+# docs/sql/migrations/V001__some_name.sql
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docs", "sql", "migrations")
+MIGRATION_FILE_PATTERN = re.compile(r"^V(\d+)__(\w+)\.sql$")
+
+# same definition as in docs/sql/etl_internal_ddl.sql
+SCHEMA_MIGRATIONS_DDL = """
+    CREATE SCHEMA IF NOT EXISTS etl_internal;
+    CREATE TABLE IF NOT EXISTS etl_internal.schema_migrations
+    (
+        version    integer     not null,
+        name       varchar     not null,
+        checksum   varchar(64) not null,
+        applied_at timestamp default CURRENT_TIMESTAMP,
+        primary key (version)
+    );
+"""
+
+
+def discover_migrations(path:str = MIGRATIONS_DIR) -> list[tuple[int, str, str]]:
+    """
+    Lists the migration files of a directory in version order.
+
+    Args:
+        path (str): Directory with V<version>__<name>.sql files
+
+    Returns:
+        list[tuple[int, str, str]]: (version, name, file path) of every migration
+    """
+    migrations = []
+    for file_name in os.listdir(path):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(path, file_name)))
+
+    versions = [version for version, _, _ in migrations]
+    duplicates = sorted({version for version in versions if versions.count(version) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicated migration versions in {path}: {duplicates}")
+
+    return sorted(migrations)
+
+
+def apply_migrations(db:DatabaseManager, logger:Logger, path:str = MIGRATIONS_DIR) -> list[int]:
+    """
+    Applies the migrations not yet recorded in etl_internal.schema_migrations, each in its own transaction.
+    The migrations table is created first if the database doesn't have it. Applied migrations whose file
+    changed since are logged and left alone.
+
+    Args:
+        db (DatabaseManager): DatabaseManager instance
+        logger (Logger): Logger instance
+        path (str): Directory with the migration files
+
+    Returns:
+        list[int]: Versions applied by this run
+
+    Raises:
+        RuntimeError: If the applied migrations can't be read
+    """
+    # databases created from older DDLs don't have the migrations table yet
+    with db.transaction() as tx_cursor:
+        tx_cursor.execute(SCHEMA_MIGRATIONS_DDL)
+
+    rows = db.execute_query("SELECT version, checksum FROM etl_internal.schema_migrations;")
+    if rows is None:
+        raise RuntimeError("Could not read etl_internal.schema_migrations, no migrations were applied")
+    applied = {version: checksum for version, checksum in rows}
+    newly_applied = []
+
+    for version, name, file_path in discover_migrations(path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            script = f.read()
+        checksum = hashlib.sha256(script.encode("utf-8")).hexdigest()
+
+        if version in applied:
+            if applied[version] != checksum:
+                logger.warning(f"Migration V{version:03d}__{name} changed since it was applied, it won't be applied again")
+            continue
+
+        logger.info(f"Applying migration V{version:03d}__{name}")
+        with db.transaction() as tx_cursor:
+            tx_cursor.execute(script)
+            tx_cursor.execute(
+                "INSERT INTO etl_internal.schema_migrations (version, name, checksum) VALUES (%s, %s, %s);",
+                (version, name, checksum)
+            )
+        newly_applied.append(version)
+
+    logger.info(f"Applied {len(newly_applied)} migrations, {len(applied)} were already applied")
+    return newly_applied
+
+
+def main():
+    logger = setup_logging()
+
+    with DatabaseManager(logger) as db:
+        apply_migrations(db, logger)
+
+if __name__ == "__main__":
+    main()
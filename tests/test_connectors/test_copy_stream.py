@@ -0,0 +1,103 @@
+import struct
+from psycopg2.extras import Json
+from scripts.connectors.db_manager import _CopyStream, _encode_text_row, _encode_binary_row, _BINARY_HEADER, _BINARY_TRAILER
+
+
+def test_encode_text_row_escapes_values():
+    row = ("a\tb\nc\\d", None, True, 3, {"uri": "x"}, Json({"k": 1}))
+
+    line = _encode_text_row(row)
+
+    assert line == b'a\\tb\\nc\\\\d\t\\N\tt\t3\t{"uri": "x"}\t{"k": 1}\n'
+
+
+def test_encode_binary_row():
+    row = ("uri", 7, None, {"a": 1})
+    data = _encode_binary_row(row, ["character varying", "integer", "bigint", "jsonb"])
+
+    expected = (
+        struct.pack("!h", 4)
+        + struct.pack("!i", 3) + b"uri"
+        + struct.pack("!i", 4) + struct.pack("!i", 7)
+        + struct.pack("!i", -1)
+        + struct.pack("!i", 9) + b'\x01{"a": 1}'
+    )
+    assert data == expected
+
+
+def test_copy_stream_reads_lazily_and_counts_rows():
+    consumed = []
+
+    def rows():
+        for i in range(3):
+            consumed.append(i)
+            yield (i,)
+
+    stream = _CopyStream(rows(), _encode_text_row, header=_BINARY_HEADER, trailer=_BINARY_TRAILER)
+
+    first = stream.read(len(_BINARY_HEADER) + 1)
+    assert first.startswith(_BINARY_HEADER)
+    assert consumed == [0]
+
+    rest = stream.read()
+    assert rest.endswith(_BINARY_TRAILER)
+    assert stream.row_count == 3
+    assert stream.read(10) == b""
+
+
+# format_type names of the staging.streaming_history columns, in HISTORY_COLUMNS order
+STREAMING_HISTORY_TYPES = [
+    "timestamp with time zone", "text", "integer", "character varying", "inet", "text", "text", "text", "text", "text",
+    "text", "text", "text", "text", "boolean", "boolean", "boolean", "bigint", "boolean",
+]
+
+
+def decode_binary_row(data, column_types):
+    """Reads a binary COPY row back the way Postgres would."""
+    from datetime import datetime, timedelta, timezone
+    import ipaddress
+
+    (field_count,), offset, values = struct.unpack_from("!h", data), 2, []
+    assert field_count == len(column_types)
+    for column_type in column_types:
+        (length,) = struct.unpack_from("!i", data, offset)
+        offset += 4
+        if length == -1:
+            values.append(None)
+            continue
+        raw = data[offset:offset + length]
+        offset += length
+        if column_type == "timestamp with time zone":
+            values.append(datetime(2000, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=struct.unpack("!q", raw)[0]))
+        elif column_type == "inet":
+            family, bits, is_cidr, size = struct.unpack_from("!BBBB", raw)
+            assert (family, is_cidr, size) == (2, 0, 4)
+            values.append(str(ipaddress.ip_interface((raw[4:], bits)).ip))
+        elif column_type == "integer":
+            values.append(struct.unpack("!i", raw)[0])
+        elif column_type == "bigint":
+            values.append(struct.unpack("!q", raw)[0])
+        elif column_type == "boolean":
+            values.append(struct.unpack("!?", raw)[0])
+        else:
+            values.append(raw.decode("utf-8"))
+    assert offset == len(data)
+    return tuple(values)
+
+
+def test_binary_round_trip_of_streaming_history_row():
+    from datetime import datetime, timezone
+    from scripts.etl.history_reader import HISTORY_COLUMNS, history_record
+
+    export_row = {column: None for column in HISTORY_COLUMNS}
+    export_row.update({
+        "ts": "2021-03-04T05:06:07Z", "platform": "android", "ms_played": 180000, "conn_country": "RU", "ip_addr": "10.1.2.3",
+        "master_metadata_track_name": "Song", "spotify_track_uri": "spotify:track:a", "reason_start": "clickrow", "reason_end": "trackdone",
+        "shuffle": True, "skipped": False, "offline": False, "offline_timestamp": 1614834367000, "incognito_mode": False,
+    })
+    record = history_record(export_row)
+
+    decoded = decode_binary_row(_encode_binary_row(record, STREAMING_HISTORY_TYPES), STREAMING_HISTORY_TYPES)
+
+    assert decoded[0] == datetime(2021, 3, 4, 5, 6, 7, tzinfo=timezone.utc)
+    assert decoded[1:] == record[1:]
@@ -0,0 +1,178 @@
+import threading
+import psycopg2
+import psycopg2.extensions
+import pytest
+from scripts.connectors.db_manager import DatabaseManager
+
+
+def make_connection(mocker, closed=0):
+    connection = mocker.MagicMock()
+    connection.closed = closed
+    connection.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    return connection
+
+
+@pytest.fixture
+def fake_pool(mocker):
+    pool = mocker.MagicMock()
+    mocker.patch("scripts.connectors.db_manager.ThreadedConnectionPool", return_value=pool)
+    return pool
+
+
+def test_pooled_checkout_gives_each_thread_its_own_connection(mocker, fake_logger, fake_pool):
+    connections = [make_connection(mocker), make_connection(mocker)]
+    fake_pool.getconn.side_effect = list(connections)
+    db = DatabaseManager(fake_logger, pool_size=2)
+
+    both_checked_out = threading.Barrier(2)
+    used = {}
+
+    def worker(name):
+        with db.checkout():
+            both_checked_out.wait()
+            db.execute_query("UPDATE t SET x = 1;")
+            used[name] = db.connection
+
+    threads = [threading.Thread(target=worker, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {id(connection) for connection in used.values()} == {id(connection) for connection in connections}
+    for connection in connections:
+        connection.cursor.return_value.execute.assert_called_with("UPDATE t SET x = 1;")
+        fake_pool.putconn.assert_any_call(connection, close=False)
+    # nothing stays bound to the threads after the checkout
+    assert db.connection is None
+
+
+def test_pooled_checkout_discards_broken_connections(mocker, fake_logger, fake_pool):
+    broken = make_connection(mocker, closed=2)
+    healthy = make_connection(mocker)
+    fake_pool.getconn.side_effect = [broken, healthy]
+    db = DatabaseManager(fake_logger, pool_size=2)
+
+    with db.checkout() as connection:
+        assert connection is healthy
+
+    fake_pool.putconn.assert_any_call(broken, close=True)
+
+
+def test_lost_connection_is_reconnected(mocker, fake_logger):
+    lost = make_connection(mocker)
+    fresh = make_connection(mocker)
+    connect = mocker.patch("scripts.connectors.db_manager.psycopg2.connect", side_effect=[lost, fresh])
+    db = DatabaseManager(fake_logger, pool_size=1)
+
+    lost.closed = 2
+    db.execute_query("UPDATE t SET x = 1;")
+
+    assert connect.call_count == 2
+    fresh.cursor.return_value.execute.assert_called_with("UPDATE t SET x = 1;")
+
+
+def test_connect_retries_then_raises(mocker, fake_logger):
+    mocker.patch("scripts.connectors.db_manager.time.sleep")
+    connect = mocker.patch("scripts.connectors.db_manager.psycopg2.connect", side_effect=psycopg2.OperationalError("refused"))
+
+    with pytest.raises(psycopg2.OperationalError):
+        DatabaseManager(fake_logger, pool_size=1)
+
+    assert connect.call_count == 3
+
+
+@pytest.mark.parametrize("only_missing", [False, True])
+def test_rebuild_load_watermarks(mocker, fake_logger, only_missing):
+    connection = make_connection(mocker)
+    mocker.patch("scripts.connectors.db_manager.psycopg2.connect", return_value=connection)
+    db = DatabaseManager(fake_logger, pool_size=1)
+
+    db.rebuild_load_watermarks(only_missing=only_missing)
+
+    calls = [call for call in connection.cursor.return_value.execute.call_args_list if call.args[0] != "BEGIN;"]
+    assert [call.args[1] for call in calls] == [{"table": "core.fact_tracks_history"}, {"table": "core.fact_podcasts_history"}]
+    assert all(("WHERE NOT EXISTS" in call.args[0]) == only_missing for call in calls)
+    connection.commit.assert_called_once()
+
+
+def test_ensure_fact_partitions(mocker, fake_logger):
+    connection = make_connection(mocker)
+    connection.cursor.return_value.fetchone.side_effect = [(True,), (2,)]
+    mocker.patch("scripts.connectors.db_manager.psycopg2.connect", return_value=connection)
+    db = DatabaseManager(fake_logger, pool_size=1)
+
+    assert db.ensure_fact_partitions("core.fact_tracks_history") == 2
+
+    query, params = connection.cursor.return_value.execute.call_args.args
+    assert "etl_internal.ensure_monthly_partitions" in query
+    assert params == {"table": "core.fact_tracks_history"}
+    connection.commit.assert_called_once()
+
+    with pytest.raises(ValueError):
+        db.ensure_fact_partitions("core.dim_track")
+
+
+@pytest.mark.parametrize("pool_size", [1, 2])
+def test_iter_query_streams_without_hold_or_commit(mocker, fake_logger, fake_pool, pool_size):
+    shared = make_connection(mocker)
+    stream = make_connection(mocker)
+    mocker.patch("scripts.connectors.db_manager.psycopg2.connect", side_effect=[shared, stream])
+    fake_pool.getconn.return_value = stream
+    db = DatabaseManager(fake_logger, pool_size=pool_size)
+    named_cursor = stream.cursor.return_value
+    named_cursor.fetchmany.side_effect = [[(1,)], [(2,)], []]
+
+    batches = db.iter_query("SELECT 1;", batch_size=1)
+    assert next(batches) == [(1,)]
+
+    assert "withhold" not in stream.cursor.call_args.kwargs
+    assert stream.cursor.call_args.kwargs["name"].startswith("stream_")
+    # the first batch arrives before anything is committed
+    stream.commit.assert_not_called()
+    shared.commit.assert_not_called()
+
+    assert list(batches) == [[(2,)]]
+    stream.commit.assert_not_called()
+    named_cursor.close.assert_called_once()
+
+
+def test_binary_copy_falls_back_to_text_for_unsupported_columns(mocker, fake_logger):
+    connection = make_connection(mocker)
+    cursor = connection.cursor.return_value
+    cursor.fetchall.return_value = [("amount", "numeric"), ("uri", "text")]
+    mocker.patch("scripts.connectors.db_manager.psycopg2.connect", return_value=connection)
+    db = DatabaseManager(fake_logger, pool_size=1)
+
+    db.copy_insert("t", ["amount", "uri"], [(1, "a")], copy_format="binary", on_conflict=False)
+
+    assert "FORMAT text" in cursor.copy_expert.call_args.args[0]
+    fake_logger.warning.assert_any_call("Binary COPY does not support numeric columns of t, using the text format")
+
+
+def test_getconn_fails_when_the_pool_stays_exhausted(mocker, fake_logger, fake_pool):
+    mocker.patch("scripts.connectors.db_manager.settings.DB_POOL_TIMEOUT", 0.01)
+    fake_pool.getconn.side_effect = [make_connection(mocker), make_connection(mocker)]
+    db = DatabaseManager(fake_logger, pool_size=2)
+
+    with db.checkout():
+        # every worker holds one connection and the stream needs another
+        with pytest.raises(psycopg2.pool.PoolError):
+            with db._stream_connection():
+                with db._stream_connection():
+                    pass
+
+    fake_logger.error.assert_called_once()
+
+
+def test_ensure_fact_partitions_warns_about_unpartitioned_tables(mocker, fake_logger):
+    connection = make_connection(mocker)
+    connection.cursor.return_value.fetchone.return_value = (False,)
+    mocker.patch("scripts.connectors.db_manager.psycopg2.connect", return_value=connection)
+    db = DatabaseManager(fake_logger, pool_size=1)
+
+    assert db.ensure_fact_partitions("core.fact_podcasts_history") == 0
+
+    queries = [call.args[0] for call in connection.cursor.return_value.execute.call_args_list]
+    assert not any("ensure_monthly_partitions" in query for query in queries)
+    assert "scripts.run_migrations" in fake_logger.warning.call_args.args[0]
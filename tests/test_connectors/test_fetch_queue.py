@@ -0,0 +1,76 @@
+import pytest
+from scripts.connectors.fetch_queue import RedisFetchQueue
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fetch_queue(clock):
+    return RedisFetchQueue(fakeredis.FakeRedis(), visibility_timeout=60, max_attempts=2, clock=clock)
+
+
+def test_fetch_queue_claim_and_ack(fetch_queue):
+    assert fetch_queue.enqueue("track", [["uri1", "uri2"], ["uri3"]]) == 2
+
+    job_id, item_type, batch = fetch_queue.claim(block_timeout=0.1)
+    assert (item_type, batch) == ("track", ["uri1", "uri2"])
+    assert fetch_queue.size() == 2
+    assert fetch_queue.in_flight() == 1
+
+    fetch_queue.ack(job_id)
+    assert fetch_queue.size() == 1
+    assert fetch_queue.claim(block_timeout=0.1)[2] == ["uri3"]
+
+
+def test_fetch_queue_requeues_expired_batches(fetch_queue, clock):
+    fetch_queue.enqueue("artist", [["uri1"]])
+    fetch_queue.claim(block_timeout=0.1)
+
+    # the worker that claimed the batch never acknowledges it
+    clock.now += 30
+    assert fetch_queue.requeue_expired() == 0
+    clock.now += 31
+    assert fetch_queue.requeue_expired() == 1
+
+    job_id, _, batch = fetch_queue.claim(block_timeout=0.1)
+    assert batch == ["uri1"]
+
+    # a late ack from the first worker must not resurrect the batch
+    fetch_queue.ack(job_id)
+    assert fetch_queue.size() == 0
+
+
+def test_fetch_queue_dead_letters_after_max_attempts(fetch_queue):
+    fetch_queue.enqueue("episode", [["uri1"]])
+
+    job_id, _, _ = fetch_queue.claim(block_timeout=0.1)
+    assert fetch_queue.nack(job_id) is True
+    job_id, _, _ = fetch_queue.claim(block_timeout=0.1)
+    assert fetch_queue.nack(job_id) is False
+
+    assert fetch_queue.claim(block_timeout=0.1) is None
+    assert fetch_queue.wait_until_drained(poll_interval=0, timeout=1) is True
+    assert fetch_queue.pop_dead() == [("episode", ["uri1"])]
+
+
+def test_fetch_queue_wait_times_out_without_progress(fetch_queue, mocker):
+    fetch_queue.enqueue("track", [["uri1"]])
+    sleep = mocker.patch("scripts.connectors.fetch_queue.time.sleep")
+    # the queue never shrinks: the first poll starts the clock, the second one reaches the timeout
+    mocker.patch("scripts.connectors.fetch_queue.time.monotonic", side_effect=[0.0, 0.0, 5.0, 10.0])
+
+    assert fetch_queue.wait_until_drained(timeout=10.0) is False
+    assert sleep.call_count == 1
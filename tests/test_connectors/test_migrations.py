@@ -0,0 +1,71 @@
+import hashlib
+import pytest
+from scripts.run_migrations import MIGRATIONS_DIR, apply_migrations, discover_migrations
+
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    (tmp_path / "V002__second.sql").write_text("SELECT 2;")
+    (tmp_path / "V001__first.sql").write_text("SELECT 1;")
+    (tmp_path / "notes.txt").write_text("not a migration")
+    return tmp_path
+
+
+def test_discover_migrations_orders_by_version(migrations_dir):
+    assert [(version, name) for version, name, _ in discover_migrations(str(migrations_dir))] == [(1, "first"), (2, "second")]
+
+
+def test_discover_migrations_rejects_duplicated_versions(migrations_dir):
+    (migrations_dir / "V02__other.sql").write_text("SELECT 3;")
+
+    with pytest.raises(ValueError):
+        discover_migrations(str(migrations_dir))
+
+
+def test_repo_migrations_are_discovered():
+    versions = [version for version, _, _ in discover_migrations(MIGRATIONS_DIR)]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_apply_migrations_skips_applied(fake_db, fake_logger, migrations_dir):
+    fake_db.execute_query.return_value = [(1, hashlib.sha256(b"SELECT 1;").hexdigest())]
+    tx_cursor = fake_db.transaction.return_value.__enter__.return_value
+
+    assert apply_migrations(fake_db, fake_logger, str(migrations_dir)) == [2]
+
+    executed = [call.args for call in tx_cursor.execute.call_args_list][1:]
+    assert executed[0] == ("SELECT 2;",)
+    assert executed[1][1] == (2, "second", hashlib.sha256(b"SELECT 2;").hexdigest())
+    fake_logger.warning.assert_not_called()
+
+
+def test_apply_migrations_warns_about_changed_files(fake_db, fake_logger, migrations_dir):
+    fake_db.execute_query.return_value = [(1, "old checksum"), (2, hashlib.sha256(b"SELECT 2;").hexdigest())]
+
+    assert apply_migrations(fake_db, fake_logger, str(migrations_dir)) == []
+
+    # only the migrations table check ran
+    assert fake_db.transaction.return_value.__enter__.return_value.execute.call_count == 1
+    fake_logger.warning.assert_called_once()
+
+
+def test_apply_migrations_creates_missing_migrations_table(fake_db, fake_logger, migrations_dir):
+    fake_db.execute_query.return_value = []
+    tx_cursor = fake_db.transaction.return_value.__enter__.return_value
+
+    assert apply_migrations(fake_db, fake_logger, str(migrations_dir)) == [1, 2]
+
+    create_table = tx_cursor.execute.call_args_list[0].args[0]
+    assert "CREATE SCHEMA IF NOT EXISTS etl_internal;" in create_table
+    assert "CREATE TABLE IF NOT EXISTS etl_internal.schema_migrations" in create_table
+
+
+def test_apply_migrations_fails_if_applied_versions_cant_be_read(fake_db, fake_logger, migrations_dir):
+    # execute_query logs and swallows errors
+    fake_db.execute_query.return_value = None
+    tx_cursor = fake_db.transaction.return_value.__enter__.return_value
+
+    with pytest.raises(RuntimeError):
+        apply_migrations(fake_db, fake_logger, str(migrations_dir))
+
+    assert tx_cursor.execute.call_count == 1
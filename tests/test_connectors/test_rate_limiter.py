@@ -0,0 +1,38 @@
+import time
+import pytest
+from scripts.connectors.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    # a clock that only moves when something sleeps
+    clock = {"now": 100.0, "slept": []}
+
+    def fake_sleep(seconds):
+        clock["slept"].append(seconds)
+        clock["now"] += seconds
+
+    monkeypatch.setattr(time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(time, "sleep", fake_sleep)
+    return clock
+
+
+def test_rate_limiter_allows_burst_then_throttles(fake_clock):
+    limiter = RateLimiter(rate=2, burst=3)
+
+    for _ in range(3):
+        limiter.acquire()
+    assert fake_clock["slept"] == []
+
+    limiter.acquire()
+    assert fake_clock["slept"] == [pytest.approx(0.5)]
+
+
+def test_rate_limiter_pause_blocks_callers(fake_clock):
+    limiter = RateLimiter(rate=10, burst=5)
+
+    limiter.pause(30)
+    limiter.acquire()
+
+    # waits out the pause and one token refill, the bucket is empty after a pause
+    assert sum(fake_clock["slept"]) == pytest.approx(30.1)
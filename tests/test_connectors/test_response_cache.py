@@ -0,0 +1,44 @@
+import time
+import pytest
+from scripts.connectors.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache" / "spotify.sqlite"), ttl_seconds=3600, max_bytes=10_000)
+    yield cache
+    cache.close()
+
+
+def test_response_cache_hits_and_misses(cache):
+    cache.put_many([{"uri": "uri1", "name": "one"}, {"uri": "uri2", "name": "two"}])
+
+    cached = cache.get_many(["uri1", "uri2", "uri3"])
+
+    assert cached == {"uri1": {"uri": "uri1", "name": "one"}, "uri2": {"uri": "uri2", "name": "two"}}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_response_cache_expires_entries(cache, monkeypatch):
+    cache.put_many([{"uri": "uri1"}])
+
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 7200)
+
+    assert cache.get_many(["uri1"]) == {}
+
+
+def test_response_cache_evicts_oldest_entries(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "spotify.sqlite"), ttl_seconds=3600, max_bytes=250)
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+
+    for i in range(5):
+        now[0] += 1
+        cache.put_many([{"uri": f"uri{i}", "data": "x" * 80}])
+
+    cached = cache.get_many([f"uri{i}" for i in range(5)])
+    cache.close()
+
+    # each payload is about 100 bytes, only the two newest fit
+    assert sorted(cached) == ["uri3", "uri4"]
@@ -3,4 +3,6 @@ from scripts.etl.extractor import DataExtractor
 
 @pytest.fixture
 def extractor(fake_db, fake_logger):
+    # no files ingested by previous runs
+    fake_db.get_file_manifest.return_value = {}
     return DataExtractor(fake_db, fake_logger)
\ No newline at end of file
@@ -0,0 +1,90 @@
+import io
+import json
+import pytest
+from datetime import datetime, timezone
+from scripts.etl.history_reader import TimestampFilter, iter_json_array
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 64 * 1024])
+def test_iter_json_array(read_size):
+    rows = [{"ts": f"2021-01-0{i}T00:00:00Z", "name": "a, ]b[ {c}"} for i in range(1, 6)]
+
+    assert list(iter_json_array(io.StringIO(json.dumps(rows, indent=2)), read_size)) == rows
+    assert list(iter_json_array(io.StringIO("[ ]"), read_size)) == []
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 4, 5])
+@pytest.mark.parametrize("indent", [None, 1])
+def test_iter_json_array_scalars(read_size, indent):
+    # numbers whose prefix is a number too (1.5 of 1.5e10, 0 of 0.25) must not be decoded before they end
+    rows = [0.25, 1.5e10, -3, True, None, "a b", 12345, -0.5e-3, [1, 2], {"a": 1}]
+
+    assert list(iter_json_array(io.StringIO(json.dumps(rows, indent=indent)), read_size)) == rows
+
+
+@pytest.mark.parametrize("content", ["this is not valid json", "{}", "[{\"a\": 1}", "[{\"a\": 1} {\"b\": 2}]"])
+def test_iter_json_array_invalid(content):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(content), 4))
+
+
+def test_iter_json_array_malformed_element_stops_reading():
+    rows = ",".join(json.dumps({"ts": "2021-01-01T00:00:00Z", "i": i}) for i in range(10000))
+    f = io.StringIO("[{\"a\": 1 oops}," + rows + "]")
+
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(f, read_size=64, max_element_size=256))
+
+    # gave up after a few windows instead of buffering the rest of the file
+    assert f.tell() <= 64 * 6
+
+
+@pytest.mark.parametrize("ts, expected", [
+    ("2022-01-01T00:00:00Z", False),  # equal to the watermark
+    ("2022-01-01T00:00:01Z", True),
+    ("2021-12-31T23:59:59Z", False),
+    ("2022-01-01T00:00:00.500Z", True),  # not in the export format, parsed
+    ("2022-01-01T03:00:00+03:00", False),
+])
+def test_timestamp_filter(ts, expected):
+    ts_filter = TimestampFilter(datetime(2022, 1, 1, tzinfo=timezone.utc))
+
+    assert ts_filter.is_newer(ts) is expected
+
+
+def test_timestamp_filter_fractional_watermark():
+    ts_filter = TimestampFilter(datetime(2022, 1, 1, 0, 0, 0, 500000, tzinfo=timezone.utc))
+
+    assert ts_filter.is_newer("2022-01-01T00:00:00Z") is False
+    assert ts_filter.is_newer("2022-01-01T00:00:01Z") is True
+
+
+def test_find_history_sources_reads_compressed_files(tmp_path):
+    import gzip
+    import zipfile
+    from scripts.etl.history_reader import find_history_sources
+
+    rows = [{"ts": "2021-01-01T00:00:00Z"}]
+    content = json.dumps(rows).encode("utf-8")
+
+    (tmp_path / "plain.json").write_bytes(content)
+    with gzip.open(tmp_path / "history.json.gz", "wb") as f:
+        f.write(content)
+    with zipfile.ZipFile(tmp_path / "my_spotify_data.zip", "w") as archive:
+        archive.writestr("Spotify Extended Streaming History/Streaming_History_Audio_2021.json", content)
+        archive.writestr("Spotify Extended Streaming History/Streaming_History_Video_2021.json", content)
+        archive.writestr("Spotify Extended Streaming History/ReadMeFirst.pdf", b"pdf")
+
+    sources = find_history_sources(str(tmp_path))
+
+    assert [source.key for source in sources] == [
+        "plain.json",
+        "history.json.gz",
+        "my_spotify_data.zip/Spotify Extended Streaming History/Streaming_History_Audio_2021.json",
+    ]
+    for source in sources:
+        with source.open() as f:
+            assert list(iter_json_array(io.TextIOWrapper(f, encoding="utf-8"))) == rows
+
+    # zip members report their uncompressed size
+    assert sources[2].stat()[0] == len(content)
@@ -1,4 +1,5 @@
 import os
+import hashlib
 import json
 import pytest
 from datetime import datetime, timezone
@@ -122,3 +123,105 @@ def test_extract_streaming_history_io_error(extractor, fake_db, fake_logger, tmp
     # Check that the logger captured an IOError message.
     error_messages = [call.args[0] for call in fake_logger.error.call_args_list]
     assert any("Could not read" in msg for msg in error_messages), "Expected an IOError log message."
+
+
+def test_extract_streaming_history_chunks(extractor, fake_db, create_test_file, monkeypatch):
+    monkeypatch.setattr(os, "getcwd", lambda: str(create_test_file))
+    fake_db.get_max_history_ts.return_value = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    extractor.extract_streaming_history(chunk_size=1)
+
+    # each record is flushed as its own chunk
+    assert fake_db.bulk_insert.call_count == 2
+    for call in fake_db.bulk_insert.call_args_list:
+        assert len(call.args[2]) == 1
+
+
+def test_extract_streaming_history_parallel(extractor, fake_db, fake_logger, create_test_file, monkeypatch, mocker):
+    from concurrent.futures import ThreadPoolExecutor
+    import scripts.etl.extractor as extractor_module
+
+    # a second export file so that the pool is used
+    raw_path = create_test_file / "data" / "raw"
+    (raw_path / "test_data_2.json").write_text((raw_path / "test_data.json").read_text(encoding="utf-8"), encoding="utf-8")
+
+    worker_db = mocker.MagicMock()
+    worker_db.__enter__.return_value = worker_db
+
+    # run the workers as threads with a separate fake connection
+    monkeypatch.setattr(extractor_module, "ProcessPoolExecutor", ThreadPoolExecutor)
+    database_manager = mocker.patch("scripts.etl.extractor.DatabaseManager", return_value=worker_db)
+    monkeypatch.setattr(os, "getcwd", lambda: str(create_test_file))
+    fake_db.get_max_history_ts.return_value = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+    extractor.extract_streaming_history(workers=2)
+
+    # the watermark is read once and the inserts go through the worker connection
+    fake_db.get_max_history_ts.assert_called_once()
+    fake_db.bulk_insert.assert_not_called()
+    assert worker_db.bulk_insert.call_count == 2
+    # every file opens a connection and closes it once loaded
+    assert database_manager.call_count == 2
+    assert worker_db.__exit__.call_count == 2
+
+    info_calls = [call.args[0] for call in fake_logger.info.call_args_list]
+    assert any("Processed 2 files, 2 total records" in message for message in info_calls)
+
+
+def test_extract_streaming_history_records_manifest(extractor, fake_db, create_test_file, monkeypatch):
+    monkeypatch.setattr(os, "getcwd", lambda: str(create_test_file))
+    fake_db.get_max_history_ts.return_value = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+    extractor.extract_streaming_history()
+
+    fake_db.upsert_file_manifest.assert_called_once()
+    file_info = fake_db.upsert_file_manifest.call_args.args[0]
+    test_file = create_test_file / "data" / "raw" / "test_data.json"
+
+    assert file_info["file_path"] == "test_data.json"
+    assert file_info["file_size"] == test_file.stat().st_size
+    assert file_info["content_hash"] == hashlib.sha256(test_file.read_bytes()).hexdigest()
+    assert file_info["row_count"] == 2
+    assert file_info["min_ts"] == "2021-01-01T00:00:00Z"
+    assert file_info["max_ts"] == "2023-01-01T00:00:00Z"
+
+
+@pytest.mark.parametrize("file_max_ts, touched, expect_skip", [
+    (datetime(2023, 1, 1, tzinfo=timezone.utc), False, True),   # unchanged and fully loaded
+    (datetime(2023, 1, 1, tzinfo=timezone.utc), True, True),    # touched but same content
+    (datetime(2024, 1, 1, tzinfo=timezone.utc), False, False),  # has rows above the watermark
+])
+def test_extract_streaming_history_skips_ingested_files(extractor, fake_db, create_test_file, monkeypatch, file_max_ts, touched, expect_skip):
+    monkeypatch.setattr(os, "getcwd", lambda: str(create_test_file))
+    fake_db.get_max_history_ts.return_value = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    test_file = create_test_file / "data" / "raw" / "test_data.json"
+    file_stat = test_file.stat()
+    fake_db.get_file_manifest.return_value = {
+        "test_data.json": {
+            "file_size": file_stat.st_size,
+            "file_mtime": file_stat.st_mtime - 10 if touched else file_stat.st_mtime,
+            "content_hash": hashlib.sha256(test_file.read_bytes()).hexdigest(),
+            "row_count": 2,
+            "min_ts": datetime(2021, 1, 1, tzinfo=timezone.utc),
+            "max_ts": file_max_ts,
+        }
+    }
+
+    opened = []
+    real_open = open
+    def tracking_open(path, *args, **kwargs):
+        opened.append(os.path.basename(str(path)))
+        return real_open(path, *args, **kwargs)
+    monkeypatch.setattr("builtins.open", tracking_open)
+
+    extractor.extract_streaming_history()
+
+    fake_db.bulk_insert.assert_not_called()
+    if expect_skip:
+        # touched files are only hashed, never parsed
+        assert opened == (["test_data.json"] if touched else [])
+        assert fake_db.upsert_file_manifest.call_count == (1 if touched else 0)
+    else:
+        assert opened == ["test_data.json"]
+        fake_db.upsert_file_manifest.assert_called_once()
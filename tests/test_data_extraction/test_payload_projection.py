@@ -0,0 +1,67 @@
+import pytest
+from scripts.etl.payload_projection import project_payload
+from scripts.etl.transformer import DataTransformer
+
+FULL_TRACK = {
+    "uri": "spotify:track:1",
+    "id": "1",
+    "name": "Song",
+    "duration_ms": 181500,
+    "available_markets": ["AD", "AE", "AR"],
+    "external_urls": {"spotify": "https://open.spotify.com/track/1"},
+    "popularity": 42,
+    "album": {
+        "id": "album1",
+        "name": "Album",
+        "album_type": "single",
+        "release_date": "2020-05",
+        "release_date_precision": "month",
+        "available_markets": ["AD", "AE", "AR"],
+        "images": [
+            {"url": "https://i.scdn.co/640", "height": 640, "width": 640},
+            {"url": "https://i.scdn.co/300", "height": 300, "width": 300},
+        ],
+    },
+    "artists": [
+        {"uri": "spotify:artist:1", "name": "First", "external_urls": {}},
+        {"uri": "spotify:artist:2", "name": "Second", "external_urls": {}},
+    ],
+}
+
+FULL_EPISODE = {
+    "uri": "spotify:episode:1",
+    "duration_ms": 3600400,
+    "release_date": "2021",
+    "release_date_precision": "year",
+    "description": "A very long description",
+    "audio_preview_url": "https://p.scdn.co/mp3-preview/1",
+    "show": {"uri": "spotify:show:1", "name": "Show", "available_markets": ["AD"], "description": "About the show"},
+}
+
+
+def test_project_track_payload():
+    track = project_payload("track", FULL_TRACK)
+
+    assert "available_markets" not in track and "available_markets" not in track["album"]
+    assert track["album"]["images"] == [{"url": "https://i.scdn.co/640"}]
+    # every artist is kept, artists are looked up from the staged tracks
+    assert track["artists"] == [{"uri": "spotify:artist:1", "name": "First"}, {"uri": "spotify:artist:2", "name": "Second"}]
+
+
+def test_project_payload_keeps_missing_and_empty_fields():
+    artist = project_payload("artist", {"uri": "spotify:artist:1", "name": "Artist", "images": [], "followers": {"total": 5}})
+    podcast = project_payload("podcast", {"uri": "spotify:show:1", "name": "Show", "description": "About"})
+
+    assert artist == {"uri": "spotify:artist:1", "name": "Artist", "images": []}
+    assert podcast == {"uri": "spotify:show:1", "name": "Show", "description": "About"}
+
+
+@pytest.mark.parametrize("item_type, payload, cleaning_func", [
+    ("track", FULL_TRACK, "_clean_track"),
+    ("episode", FULL_EPISODE, "_clean_episode"),
+])
+def test_transformer_reads_projected_payloads(fake_db, fake_logger, item_type, payload, cleaning_func):
+    transformer = DataTransformer(fake_db, fake_logger)
+    clean = getattr(transformer, cleaning_func)
+
+    assert clean(project_payload(item_type, payload)) == clean(payload)
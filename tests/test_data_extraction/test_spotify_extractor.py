@@ -13,11 +13,7 @@ def test_log_error_batch(extractor, fake_logger, fake_db):
 
     expected_error_batch = [(uri, item_type, "Failed batch") for uri in batch]
 
-    fake_db.bulk_insert.assert_called_with(
-        "etl_internal.failed_uris",
-        ["uri", "entity_type", "error_reason"],
-        expected_error_batch
-    )
+    fake_db.log_failed_uris.assert_called_with(expected_error_batch)
 
 
 @pytest.mark.parametrize("entity_type, staged_history, core_items, staged_items, expected_new_items",[
@@ -48,7 +44,47 @@ def test_get_new_items(extractor, fake_db, entity_type, staged_history, core_ite
     new_items = extractor._get_new_items(entity_type)
 
     assert sorted(new_items) == sorted(expected_new_items), f"For entity_type '{entity_type}', expected {expected_new_items} but got {new_items}"
-    
+
+
+def test_get_new_items_skips_failed_uris(extractor, fake_db, fake_logger):
+    fake_db.get_distinct_uri.side_effect = lambda uri_type, table: ["uri1", "uri2", "uri3"] if table == "staging.streaming_history" else []
+    fake_db.get_backoff_failed_uris.return_value = ["uri2", "uri9"]
+
+    new_items = extractor._get_new_items("track")
+
+    assert sorted(new_items) == ["uri1", "uri3"]
+    fake_db.get_backoff_failed_uris.assert_called_once_with(uri_type="track")
+    assert extractor.avoided_api_calls == 1
+
+
+def test_iter_new_item_batches(extractor, fake_db):
+    # the database streams (uri, in_backoff) rows in chunks that do not line up with the API batches
+    fake_db.iter_new_uris.return_value = iter([
+        [(f"uri{i}", False) for i in range(30)],
+        [(f"uri{i}", i == 40) for i in range(30, 60)],
+        [(f"uri{i}", False) for i in range(60, 75)],
+    ])
+
+    batches = list(extractor._iter_new_item_batches("artist", batch_size=50))
+
+    fake_db.iter_new_uris.assert_called_once_with(uri_type="artist")
+    assert [len(batch) for batch in batches] == [50, 24]
+    assert "uri40" not in batches[0] + batches[1]
+    assert extractor.avoided_api_calls == 1
+
+
+def test_stage_spotify_items_anti_join(extractor, fake_db, mocker):
+    mocker.patch("scripts.etl.extractor.settings.NEW_ITEMS_ANTI_JOIN", True)
+    fake_db.iter_new_uris.return_value = iter([[(f"uri{i}", False) for i in range(60)]])
+    extractor._get_new_items = mocker.MagicMock()
+    extractor._process_spotify_batch = mocker.MagicMock(return_value=(True, 0.1, 50, 0))
+
+    extractor.stage_spotify_items("track")
+
+    extractor._get_new_items.assert_not_called()
+    assert [call.kwargs["batch_number"] for call in extractor._process_spotify_batch.call_args_list] == [1, 2]
+    assert len(extractor._process_spotify_batch.call_args_list[1].kwargs["batch"]) == 10
+
 
 @pytest.mark.parametrize("batch, expected_valid_count, expected_invalid_count",[
     (["valid_uri", "valid_uri"], 2, 0), # all items are valid
@@ -56,11 +92,10 @@ def test_get_new_items(extractor, fake_db, entity_type, staged_history, core_ite
     (["invalid_uri", "invalid_uri"], 0, 2) # both invalid
 ])
 def test_retry_batch(extractor, fake_db, batch, expected_valid_count, expected_invalid_count):
-    def fake_api_call(item):
-        if item == "valid_uri":
-            return {"fake_data":"fake_data"}
-        else:
+    def fake_api_call(items):
+        if "invalid_uri" in items:
             raise SpotifyException(http_status=400, msg="Invalid URI", code=None)
+        return {"tracks": [{"uri": item} for item in items]}
         
     valid_count, invalid_count = extractor._retry_batch(batch, "fake_item_type", fake_api_call)
 
@@ -70,16 +105,50 @@ def test_retry_batch(extractor, fake_db, batch, expected_valid_count, expected_i
 
     # check the db calls
     if expected_invalid_count > 0:
-        fake_db.bulk_insert.assert_any_call("etl_internal.failed_uris", 
-                                               ["uri", "entity_type", "error_reason"], 
-                                               [("invalid_uri", "fake_item_type", "Invalid URI")] * expected_invalid_count
-                                               )
+        fake_db.log_failed_uris.assert_any_call([("invalid_uri", "fake_item_type", "Invalid URI")] * expected_invalid_count)
     
     fake_db.bulk_insert.assert_any_call("staging.spotify_fake_item_types_data", 
                                            ["spotify_fake_item_type_uri", "raw_data"], 
-                                           [("valid_uri", {"fake_data": "fake_data"})] * expected_valid_count, 
+                                           [{"uri": "valid_uri"}] * expected_valid_count, 
                                            wrap_json=True
                                            )
+
+
+def test_retry_batch_bisects_to_the_invalid_uri(extractor, fake_db, monkeypatch):
+    batch = [f"uri{i}" for i in range(50)]
+    calls = []
+
+    def fake_api_call(items):
+        calls.append(items)
+        if "uri17" in items:
+            raise SpotifyException(http_status=400, msg="Invalid URI", code=None)
+        # the API can also return null for a valid-looking URI
+        return {"tracks": [{"uri": item} if item != "uri40" else None for item in items]}
+
+    monkeypatch.setattr(time, "sleep", lambda x: None)
+
+    valid_count, invalid_count = extractor._retry_batch(batch, "track", fake_api_call)
+
+    assert (valid_count, invalid_count) == (48, 2)
+    # two requests per level of the split instead of one request per URI
+    assert len(calls) <= 2 * 6
+    fake_db.log_failed_uris.assert_any_call([("uri17", "track", "Invalid URI"), ("uri40", "track", "API returned null")])
+
+
+def test_retry_batch_waits_on_rate_limit(extractor, fake_logger):
+    calls = []
+
+    def fake_api_call(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise SpotifyException(http_status=429, msg="Rate limit exceeded", code=None, headers={"Retry-After": "5"})
+        return {"tracks": [{"uri": item} for item in items]}
+
+    valid_count, invalid_count = extractor._retry_batch(["uri1", "uri2"], "track", fake_api_call)
+
+    assert (valid_count, invalid_count) == (2, 0)
+    warning_calls = [call.args[0] for call in fake_logger.warning.call_args_list]
+    assert any("exceeded rate limit" in msg for msg in warning_calls)
     
 
 def test_process_spotify_batch_success(fake_db, fake_logger, extractor):
@@ -172,4 +241,148 @@ def test_process_spotify_batch_exhaust_retries(fake_db, fake_logger, extractor,
     extractor._log_error_batch.assert_called_once()
 
     error_calls = [call.args[0] for call in fake_logger.error.call_args_list]
-    assert any("Exceeded retries" in msg for msg in error_calls), "Expected an 'Exceeded retries' error log."
\ No newline at end of file
+    assert any("Exceeded retries" in msg for msg in error_calls), "Expected an 'Exceeded retries' error log."
+
+def test_stage_spotify_items_concurrent(extractor, fake_logger, mocker):
+    uris = [f"uri{i}" for i in range(120)]
+    extractor._get_new_items = mocker.MagicMock(return_value=uris)
+
+    def fake_get_tracks(batch):
+        # one URI of every batch comes back null
+        return {"tracks": [{"uri": uri} for uri in batch[1:]] + [None]}
+
+    extractor.spotify_client.get_tracks = fake_get_tracks
+    extractor.spotify_client.rate_limiter = mocker.MagicMock()
+
+    extractor.stage_spotify_items("track", max_in_flight=4)
+
+    info_calls = [call.args[0] for call in fake_logger.info.call_args_list]
+    assert any("Total tracks: 120 with 3 tracks failed" in msg for msg in info_calls)
+
+
+def test_stage_spotify_items_concurrent_reads_batches_lazily(extractor, mocker):
+    read = []
+    def uri_batches():
+        for i in range(20):
+            read.append(i)
+            yield [f"uri{i}"]
+
+    def fake_process_batch(batch, batch_number, api_call, item_type):
+        # never more batches read than are being fetched or were already fetched
+        assert len(read) <= batch_number + 3
+        return True, 0.0, 1, 0
+    extractor._process_spotify_batch = fake_process_batch
+
+    extractor.stage_spotify_items("track", max_in_flight=4, uri_batches=uri_batches())
+
+    assert len(read) == 20
+
+
+def test_process_spotify_batch_uses_response_cache(fake_db, extractor, mocker):
+    extractor.response_cache = mocker.MagicMock()
+    extractor.response_cache.get_many.return_value = {"uri1": {"uri": "uri1", "data": "cached"}}
+
+    requested = []
+    def fake_api_call(batch):
+        requested.extend(batch)
+        return {"tracks": [{"uri": uri, "data": "valid_data"} for uri in batch]}
+
+    success, _, items_count, failed_count = extractor._process_spotify_batch(["uri1", "uri2"], batch_number=1, api_call=fake_api_call, item_type="track")
+
+    assert success is True
+    assert (items_count, failed_count) == (2, 0)
+    # only the cache miss is requested, and its response is cached
+    assert requested == ["uri2"]
+    extractor.response_cache.put_many.assert_called_once_with([{"uri": "uri2", "data": "valid_data"}])
+    assert fake_db.bulk_insert.call_count == 2
+
+
+def test_stage_spotify_items_pipelined(extractor, fake_db, mocker):
+    new_items = {"track": ["track1", "track2"], "episode": ["episode1"], "artist": [], "podcast": []}
+    extractor._get_new_items = mocker.MagicMock(side_effect=lambda item_type: new_items[item_type])
+    # artist2 is already in the core
+    fake_db.filter_new_uris.side_effect = lambda uri_type, uris: [uri for uri in uris if uri != "artist2"]
+
+    extractor.spotify_client.get_tracks = lambda batch: {"tracks": [{"uri": uri, "artists": [{"uri": "artist1"}, {"uri": "artist2"}]} for uri in batch]}
+    extractor.spotify_client.get_episodes = lambda batch: {"episodes": [{"uri": uri, "show": {"uri": "show1"}} for uri in batch]}
+    extractor.spotify_client.get_artists = mocker.MagicMock(side_effect=lambda batch: {"artists": [{"uri": uri} for uri in batch]})
+    extractor.spotify_client.get_podcasts = mocker.MagicMock(side_effect=lambda batch: {"shows": [{"uri": uri} for uri in batch]})
+
+    extractor.stage_spotify_items_pipelined()
+
+    # each dependent URI is fetched once, even though both tracks reference artist1
+    extractor.spotify_client.get_artists.assert_called_once_with(["artist1"])
+    extractor.spotify_client.get_podcasts.assert_called_once_with(["show1"])
+    # the catch-up pass looks for artists and podcasts the streams did not reference
+    assert [call.args[0] for call in extractor._get_new_items.call_args_list][-2:] == ["artist", "podcast"]
+    assert extractor._dependent_queues == {}
+
+
+def test_fetch_worker_stages_queued_batches(extractor, fake_db, mocker):
+    fakeredis = pytest.importorskip("fakeredis")
+    from scripts.connectors.fetch_queue import RedisFetchQueue
+
+    fetch_queue = RedisFetchQueue(fakeredis.FakeRedis(), max_attempts=2)
+    fetch_queue.enqueue("track", [["uri1", "uri2"], ["uri3"]])
+
+    calls = []
+    def flaky_get_tracks(batch):
+        calls.append(batch)
+        # the first attempt at the second batch crashes and is returned to the queue
+        if batch == ["uri3"] and calls.count(["uri3"]) == 1:
+            raise ConnectionError("connection reset")
+        return {"tracks": [{"uri": uri} for uri in batch]}
+    extractor.spotify_client.get_tracks = flaky_get_tracks
+
+    processed = extractor.run_fetch_worker(fetch_queue, idle_timeout=0)
+
+    assert processed == 3
+    assert fetch_queue.size() == 0
+    staged = [item["uri"] for call in fake_db.bulk_insert.call_args_list for item in call.args[2]]
+    assert staged == ["uri1", "uri2", "uri3"]
+
+
+def test_stage_spotify_items_distributed(extractor, mocker):
+    fetch_queue = mocker.MagicMock()
+    fetch_queue.enqueue.side_effect = lambda item_type, batches: len(list(batches))
+    fetch_queue.pop_dead.side_effect = [[], [("artist", ["artist1"])]]
+    extractor._get_new_items = mocker.MagicMock(return_value=["uri1"])
+    extractor._log_error_batch = mocker.MagicMock()
+
+    extractor.stage_spotify_items_distributed(fetch_queue)
+
+    # artists and podcasts are only enqueued once the track and episode batches are drained
+    assert [call[0] for call in fetch_queue.method_calls if call[0] in ("enqueue", "wait_until_drained")] == ["enqueue", "enqueue", "wait_until_drained", "enqueue", "enqueue", "wait_until_drained"]
+    assert [call.args[0] for call in fetch_queue.enqueue.call_args_list] == ["track", "episode", "artist", "podcast"]
+    extractor._log_error_batch.assert_called_once_with(["artist1"], "artist")
+
+
+def test_stage_spotify_items_distributed_without_workers(extractor, fake_logger, mocker):
+    fakeredis = pytest.importorskip("fakeredis")
+    from scripts.connectors.fetch_queue import RedisFetchQueue
+
+    mocker.patch("scripts.etl.extractor.settings.FETCH_QUEUE_DRAIN_TIMEOUT", 0.0)
+    fetch_queue = RedisFetchQueue(fakeredis.FakeRedis())
+    extractor._get_new_items = mocker.MagicMock(return_value=["uri1"])
+
+    # no worker is running, so nothing ever claims the batches
+    extractor.stage_spotify_items_distributed(fetch_queue)
+
+    # artists and podcasts are not enqueued on top of an undrained queue
+    assert [call.args[0] for call in extractor._get_new_items.call_args_list] == ["track", "episode"]
+    assert fetch_queue.size() == 2
+    fake_logger.error.assert_called_once()
+    assert "2 batches pending, 0 in flight, 0 dead" in fake_logger.error.call_args.args[0]
+
+
+def test_stage_spotify_items_pipelined_needs_a_connection_per_stream(extractor, fake_db, fake_logger, mocker):
+    mocker.patch("scripts.etl.extractor.settings.NEW_ITEMS_ANTI_JOIN", True)
+    fake_db.pool_size = 2
+    staged = []
+    extractor.stage_spotify_items = mocker.MagicMock(side_effect=lambda item_type, **kwargs: staged.append((item_type, kwargs)))
+
+    extractor.stage_spotify_items_pipelined()
+
+    # two anti-join streams and the writes don't fit in two connections, the types are staged one by one
+    assert staged == [("track", {}), ("artist", {}), ("episode", {}), ("podcast", {})]
+    fake_logger.warning.assert_called_once()
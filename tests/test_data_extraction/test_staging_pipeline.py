@@ -0,0 +1,35 @@
+import threading
+from scripts.etl.staging_pipeline import DEPENDENT_ENTITIES, UriQueue
+
+
+def test_uri_queue_unseen_drops_duplicates_and_none():
+    uri_queue = UriQueue()
+
+    assert uri_queue.unseen(["a", "b", "a", None]) == ["a", "b"]
+    assert uri_queue.unseen(["b", "c"]) == ["c"]
+
+
+def test_uri_queue_batches_until_closed():
+    uri_queue = UriQueue()
+
+    def produce():
+        for i in range(0, 120, 10):
+            uri_queue.put_many([f"uri{j}" for j in range(i, i + 10)])
+        uri_queue.close()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    batches = list(uri_queue.iter_batches(batch_size=50))
+    producer.join()
+
+    assert [len(batch) for batch in batches] == [50, 50, 20]
+    assert [uri for batch in batches for uri in batch] == [f"uri{i}" for i in range(120)]
+
+
+def test_dependent_entities_read_referenced_uris():
+    _, track_artists = DEPENDENT_ENTITIES["track"]
+    _, episode_show = DEPENDENT_ENTITIES["episode"]
+
+    assert track_artists({"artists": [{"uri": "artist1"}, {"uri": "artist2"}]}) == ["artist1", "artist2"]
+    assert episode_show({"show": {"uri": "show1"}}) == ["show1"]
+    assert episode_show({"show": None}) == [None]
@@ -0,0 +1,6 @@
+import pytest
+from scripts.etl.transformer import DataTransformer
+
+@pytest.fixture
+def transformer(fake_db, fake_logger):
+    return DataTransformer(fake_db, fake_logger)
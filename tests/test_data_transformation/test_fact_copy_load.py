@@ -0,0 +1,99 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+import pytest
+
+DIMS = {
+    "FROM core.dim_date": [(date(2024, 3, 1), 20240301)],
+    "FROM core.dim_time": [(time(14, 5), 845)],
+    "FROM core.dim_reason": [("clickrow", "start", 1), ("trackdone", "end", 2)],
+    "FROM core.dim_track": [("spotify:track:a", 10, "spotify:artist:x", 200000)],
+    "FROM core.dim_artist": [("spotify:artist:x", 20)],
+    "FROM core.dim_episode": [("spotify:episode:e", 30, "spotify:show:s")],
+    "FROM core.dim_podcast": [("spotify:show:s", 40)],
+}
+
+
+@pytest.fixture
+def copied_rows(transformer, fake_db, mocker):
+    mocker.patch("scripts.etl.transformer.settings.FACT_LOAD_ENGINE", "python")
+    staged = {
+        "spotify_track_uri": [
+            (datetime(2024, 3, 1, 14, 5, 30), 100050, "spotify:track:a", "clickrow", "trackdone", True, False, None),
+            (datetime(2024, 3, 1, 14, 6, 0), 5000, "spotify:track:unknown", "fwdbtn", "trackdone", False, False, None),
+        ],
+        "spotify_episode_uri": [
+            (datetime(2024, 3, 1, 14, 5, 0), 61000, "spotify:episode:e", "clickrow", "trackdone", False, False, None),
+            (datetime(2024, 3, 1, 14, 7, 0), 1000, "spotify:episode:unknown", "clickrow", "trackdone", False, False, None),
+        ],
+    }
+
+    def execute_query(query, params=None):
+        if "FROM staging.streaming_history" in query:
+            return staged["spotify_track_uri" if "s.spotify_track_uri IS NOT NULL" in query else "spotify_episode_uri"]
+        return next(rows for table, rows in DIMS.items() if table in query)
+
+    fake_db.execute_query.side_effect = execute_query
+    rows = []
+    fake_db.copy_insert.side_effect = lambda table, columns, records, **kwargs: (rows.extend(records) or len(rows), 0)
+    return rows
+
+
+def test_copy_load_resolves_track_keys(transformer, fake_db, copied_rows):
+    transformer.insert_core_facts("track")
+
+    assert copied_rows == [
+        (datetime(2024, 3, 1, 14, 5, 30), 20240301, 845, 100050, 100, 10, 20, 1, 2, True, Decimal("50.0"), False, None),
+        # unknown tracks and reasons stay NULL like in the SQL load
+        (datetime(2024, 3, 1, 14, 6, 0), 20240301, None, 5000, 5, None, None, None, 2, False, None, False, None),
+    ]
+    assert fake_db.copy_insert.call_args.kwargs["commit"] is False
+    fake_db.ensure_fact_partitions.assert_called_once_with("core.fact_tracks_history")
+
+    tx_cursor = fake_db.transaction.return_value.__enter__.return_value
+    _, params = tx_cursor.execute.call_args.args
+    assert params == ("core.fact_tracks_history", datetime(2024, 3, 1, 14, 6, 0))
+
+
+def test_copy_load_maps_unknown_episodes_to_fallback(transformer, copied_rows):
+    transformer.insert_core_facts("podcast")
+
+    assert copied_rows == [
+        (datetime(2024, 3, 1, 14, 5, 0), 20240301, 845, 61, 30, 40, 1, 2),
+        (datetime(2024, 3, 1, 14, 7, 0), 20240301, None, 1, 0, 0, 1, 2),
+    ]
+
+
+def test_null_reasons_get_no_key_in_both_engines(transformer, fake_db, mocker, copied_rows):
+    # dim_reason_populate.sql stores the NULL reasons of the staged rows as well
+    dims = {**DIMS, "FROM core.dim_reason": DIMS["FROM core.dim_reason"] + [(None, "start", 3), (None, "end", 4)]}
+    query_dims = fake_db.execute_query.side_effect
+    fake_db.execute_query.side_effect = lambda query, params=None: (
+        [(datetime(2024, 3, 1, 14, 5, 30), 100050, "spotify:track:a", None, None, True, False, None)] if "FROM staging.streaming_history" in query
+        else next((rows for table, rows in dims.items() if table in query), None) or query_dims(query, params)
+    )
+
+    transformer.insert_core_facts("track")
+    assert copied_rows[0][7:9] == (None, None)
+
+    # the SQL load compares with =, which is never true for NULL, so the keys stay NULL there too
+    mocker.patch("scripts.etl.transformer.settings.FACT_LOAD_ENGINE", "sql")
+    transformer.insert_core_facts("track")
+    query = fake_db.transaction.return_value.__enter__.return_value.execute.call_args_list[-1].args[0]
+    assert "LEFT JOIN core.dim_reason rs ON s.reason_start = rs.reason_type AND rs.reason_group = 'start'" in query
+    assert "LEFT JOIN core.dim_reason re ON s.reason_end = re.reason_type AND re.reason_group = 'end'" in query
+
+
+def test_dimension_keys_are_read_once_and_kept_up_to_date(transformer, fake_db, mocker, copied_rows):
+    execute_values = mocker.patch("scripts.etl.transformer.execute_values", return_value=[("spotify:artist:y", 21)])
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_STREAM_STAGED", False)
+    staged_artist = (1, {"uri": "spotify:artist:y", "name": "Y", "images": []})
+    query_dims = fake_db.execute_query.side_effect
+    fake_db.execute_query.side_effect = lambda query, params=None: [staged_artist] if "staging.spotify_artists_data" in query else query_dims(query, params)
+
+    transformer.process_staged_batches("artists")
+    transformer.insert_core_facts("track")
+
+    assert "RETURNING spotify_artist_uri, artist_id" in execute_values.call_args.args[1]
+    assert transformer.dim_keys.maps["artists"] == {"spotify:artist:x": (20,), "spotify:artist:y": (21,)}
+    artist_reads = [call for call in fake_db.execute_query.call_args_list if "FROM core.dim_artist" in call.args[0]]
+    assert len(artist_reads) == 1
@@ -0,0 +1,85 @@
+from datetime import date
+import pytest
+
+VALID_LAYOUT = [(0, 4748, date(2018, 1, 1), date(2030, 12, 31), 0, 1440)]
+
+
+def fact_load(fake_db):
+    """Returns the (query, params) of the last fact load, which runs on the transaction cursor."""
+    return fake_db.transaction.return_value.__enter__.return_value.execute.call_args.args
+
+
+@pytest.mark.parametrize("item_type", ["track", "podcast"])
+def test_insert_core_facts_joins_date_and_time_dims(transformer, fake_db, item_type):
+    transformer.insert_core_facts(item_type)
+
+    query, params = fact_load(fake_db)
+    assert "LEFT JOIN core.dim_date d ON d.date = l.ts_msk::date" in query
+    assert "LEFT JOIN core.dim_time t" in query
+    # the local timestamp is computed once per row
+    assert query.count("AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow'") == 1
+    assert params is None
+
+
+@pytest.mark.parametrize("item_type", ["track", "podcast"])
+def test_insert_core_facts_derives_keys(transformer, fake_db, mocker, item_type):
+    mocker.patch("scripts.etl.transformer.settings.FACT_DERIVE_DIM_KEYS", True)
+    fake_db.execute_query.side_effect = lambda query, params=None: VALID_LAYOUT if "FROM core.dim_date" in query and "INSERT" not in query else None
+
+    transformer.insert_core_facts(item_type)
+    transformer.insert_core_facts(item_type)
+
+    # validated once for both fact loads
+    assert fake_db.execute_query.call_count == 1
+    assert fake_db.transaction.return_value.__enter__.return_value.execute.call_count == 2
+    query, params = fact_load(fake_db)
+    assert "core.dim_date" not in query and "core.dim_time" not in query
+    assert "to_char(l.ts_msk, 'YYYYMMDD')::integer" in query
+    assert params == {"min_date": date(2018, 1, 1), "max_date": date(2030, 12, 31)}
+
+
+@pytest.mark.parametrize("layout", [
+    [(3, 4748, date(2018, 1, 1), date(2030, 12, 31), 0, 1440)],  # date ids that don't follow YYYYMMDD
+    [(0, 4700, date(2018, 1, 1), date(2030, 12, 31), 0, 1440)],  # gaps in the calendar
+    [(0, 4748, date(2018, 1, 1), date(2030, 12, 31), 180, 1440)],  # time ids generated in another time zone
+    [(0, 0, None, None, 0, 0)],  # empty dims
+])
+def test_insert_core_facts_falls_back_to_joins(transformer, fake_db, fake_logger, mocker, layout):
+    mocker.patch("scripts.etl.transformer.settings.FACT_DERIVE_DIM_KEYS", True)
+    fake_db.execute_query.side_effect = lambda query, params=None: layout if "INSERT" not in query else None
+
+    transformer.insert_core_facts("track")
+
+    query, params = fact_load(fake_db)
+    assert "LEFT JOIN core.dim_date d" in query
+    assert params is None
+    assert any("joining the dimensions" in call.args[0] for call in fake_logger.warning.call_args_list)
+
+
+@pytest.mark.parametrize("item_type", ["track", "podcast"])
+def test_insert_core_facts_moves_watermark(transformer, fake_db, item_type):
+    tx_cursor = fake_db.transaction.return_value.__enter__.return_value
+    tx_cursor.fetchone.return_value = (3,)
+
+    transformer.insert_core_facts(item_type)
+
+    fake_db.ensure_load_watermarks.assert_called_once()
+    query, _ = fact_load(fake_db)
+    table = f"core.fact_{item_type}s_history"
+    # the delta reads the watermark instead of scanning the fact table
+    assert f"(SELECT max_ts FROM etl_internal.load_watermarks WHERE target_table = '{table}')" in query
+    assert f"MAX(ts_msk AT TIME ZONE 'Europe/Moscow' AT TIME ZONE 'UTC') FROM {table}" not in query
+    # and is moved forward by the same statement
+    assert "INSERT INTO etl_internal.load_watermarks" in query
+    assert "RETURNING ts_msk" in query
+
+
+def test_insert_core_facts_creates_partitions_first(transformer, fake_db, mocker):
+    calls = mocker.MagicMock()
+    calls.attach_mock(fake_db.ensure_fact_partitions, "ensure_fact_partitions")
+    calls.attach_mock(fake_db.transaction, "transaction")
+
+    transformer.insert_core_facts("podcast")
+
+    assert calls.mock_calls[0] == mocker.call.ensure_fact_partitions("core.fact_podcasts_history")
+    assert calls.mock_calls[1] == mocker.call.transaction()
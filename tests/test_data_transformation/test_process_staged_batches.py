@@ -0,0 +1,76 @@
+import pytest
+
+
+def staged_artists(start, count):
+    return [(record_id, {"uri": f"spotify:artist:{record_id}", "name": f"Artist {record_id}", "images": []}) for record_id in range(start, start + count)]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_process_staged_batches(transformer, fake_db, mocker, stream):
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_STREAM_STAGED", stream)
+    rows = staged_artists(1, 120)
+    fake_db.execute_query.return_value = rows
+    fake_db.iter_query.return_value = iter([rows[i:i+50] for i in range(0, 120, 50)])
+    execute_values = mocker.patch("scripts.etl.transformer.execute_values")
+
+    transformer.process_staged_batches("artists")
+
+    assert [len(call.args[2]) for call in execute_values.call_args_list] == [50, 50, 20]
+    if stream:
+        fake_db.iter_query.assert_called_once()
+        assert fake_db.iter_query.call_args.kwargs["batch_size"] == transformer.BATCH_SIZE
+        fake_db.execute_query.assert_not_called()
+    else:
+        fake_db.iter_query.assert_not_called()
+
+
+def test_process_staged_batches_streams_before_reading_everything(transformer, fake_db, mocker):
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_STREAM_STAGED", True)
+    execute_values = mocker.patch("scripts.etl.transformer.execute_values")
+    inserted_before_second_fetch = []
+
+    def stream(query, batch_size):
+        yield staged_artists(1, 50)
+        inserted_before_second_fetch.append(execute_values.call_count)
+        yield staged_artists(51, 10)
+
+    fake_db.iter_query.side_effect = stream
+
+    transformer.process_staged_batches("artists")
+
+    assert inserted_before_second_fetch == [1]
+
+
+def test_process_staged_batches_nothing_staged(transformer, fake_db, fake_logger, mocker):
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_STREAM_STAGED", True)
+    fake_db.iter_query.return_value = iter([])
+
+    transformer.process_staged_batches("artists")
+
+    fake_db.transaction.assert_not_called()
+    fake_logger.warning.assert_called_with("No unprocessed staged items found")
+
+
+def test_process_staged_batches_marks_processed_with_one_joined_update(transformer, fake_db, mocker):
+    fake_db.execute_query.return_value = staged_artists(1, 3) + [(4, {"uri": "spotify:artist:4"})]  # no name, can't be cleaned
+    mocker.patch("scripts.etl.transformer.execute_values")
+    tx_cursor = fake_db.transaction.return_value.__enter__.return_value
+
+    transformer.process_staged_batches("artists")
+
+    query, params = tx_cursor.execute.call_args.args
+    assert "FROM unnest(%s::integer[])" in query
+    assert params == ([1, 2, 3],)
+
+
+@pytest.mark.parametrize("fast_commit, expected_transactions", [(False, 3), (True, 1)])
+def test_process_staged_batches_fast_commit(transformer, fake_db, mocker, fast_commit, expected_transactions):
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_FAST_COMMIT", fast_commit)
+    transformer.BATCH_SIZE = 1000
+    fake_db.execute_query.return_value = staged_artists(1, 2500)
+    execute_values = mocker.patch("scripts.etl.transformer.execute_values")
+
+    transformer.process_staged_batches("artists")
+
+    assert fake_db.transaction.call_count == expected_transactions
+    assert [len(call.args[2]) for call in execute_values.call_args_list] == [1000, 1000, 500]
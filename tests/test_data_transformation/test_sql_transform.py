@@ -0,0 +1,85 @@
+import re
+import pytest
+from scripts.etl.sql_transform import DIMENSION_SPECS, build_dimension_load_query
+
+
+@pytest.mark.parametrize("item_type", ["tracks", "artists", "podcasts", "episodes"])
+def test_sql_engine_loads_the_same_columns_as_python(transformer, fake_db, mocker, item_type):
+    # the Python path builds its INSERT from the column list of process_staged_batches
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_ENGINE", "python")
+    fake_db.execute_query.return_value = [(1, {})]
+    execute_values = mocker.patch("scripts.etl.transformer.execute_values")
+    transformer._clean_track = transformer._clean_artist = transformer._clean_podcast = transformer._clean_episode = lambda raw: ("row",)
+
+    transformer.process_staged_batches(item_type)
+
+    python_insert = execute_values.call_args.args[1]
+    target_table, columns = re.match(r"INSERT INTO (\S+) \(([^)]*)\)", python_insert).groups()
+    assert DIMENSION_SPECS[item_type]["target_table"] == target_table
+    assert list(DIMENSION_SPECS[item_type]["columns"]) == columns.split(", ")
+
+
+@pytest.mark.parametrize("item_type, has_release_date", [("tracks", True), ("artists", False), ("podcasts", False), ("episodes", True)])
+def test_build_dimension_load_query(item_type, has_release_date):
+    query = build_dimension_load_query(item_type)
+
+    assert f"FROM staging.spotify_{item_type}_data" in query
+    assert f"UPDATE staging.spotify_{item_type}_data s" in query
+    assert "INSERT INTO etl_internal.transform_errors" in query
+    assert ("etl_internal.normalise_release_date" in query) == has_release_date
+    assert ("'Unparseable release date'" in query) == has_release_date
+
+
+def test_process_staged_batches_uses_sql_engine(transformer, fake_db, fake_logger, mocker):
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_ENGINE", "sql")
+    tx_cursor = fake_db.transaction.return_value.__enter__.return_value
+    tx_cursor.fetchone.return_value = (120, 2)
+
+    transformer.process_staged_batches("tracks")
+
+    tx_cursor.execute.assert_called_once_with(build_dimension_load_query("tracks"))
+    fake_db.execute_query.assert_not_called()
+    fake_logger.warning.assert_called_once_with("2 staged tracks could not be cleaned, see etl_internal.transform_errors")
+
+
+def test_process_staged_sql_invalid_item_type(transformer):
+    with pytest.raises(ValueError):
+        transformer.process_staged_sql("albums")
+
+
+@pytest.mark.parametrize("item_type", ["tracks", "artists", "podcasts", "episodes"])
+def test_build_dimension_load_query_upsert(item_type):
+    uri_column = list(DIMENSION_SPECS[item_type]["columns"])[0]
+
+    query = build_dimension_load_query(item_type, upsert=True)
+
+    assert f"ON CONFLICT ({uri_column}) DO UPDATE SET" in query
+    assert "WHERE target.content_hash IS DISTINCT FROM EXCLUDED.content_hash" in query
+    assert "md5(jsonb_build_array(" in query
+    # the upsert can't touch a row twice, only the latest staged row of a URI is loaded
+    assert "SELECT DISTINCT ON (raw_data ->> 'uri')" in query
+    assert "ON CONFLICT DO NOTHING" not in query.split("errors AS")[1]
+
+
+def test_python_upsert_hashes_the_latest_row_of_every_uri(transformer, fake_db, mocker):
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_ENGINE", "python")
+    mocker.patch("scripts.etl.transformer.settings.DIM_LOAD_MODE", "upsert")
+    fake_db.execute_query.return_value = [
+        (1, {"uri": "spotify:artist:a", "name": "Old name", "images": []}),
+        (2, {"uri": "spotify:artist:b", "name": "B", "images": []}),
+        (3, {"uri": "spotify:artist:a", "name": "New name", "images": []}),
+    ]
+    execute_values = mocker.patch("scripts.etl.transformer.execute_values")
+
+    transformer.process_staged_batches("artists")
+
+    assert "ORDER BY record_id" in fake_db.execute_query.call_args.args[0]
+    _, query, rows = execute_values.call_args.args
+    assert query.startswith("INSERT INTO core.dim_artist AS target (spotify_artist_uri, cover_art_url, artist_name, content_hash)")
+    assert "WHERE target.content_hash IS DISTINCT FROM EXCLUDED.content_hash" in query
+    assert rows == [
+        {"spotify_artist_uri": "spotify:artist:a", "cover_art_url": None, "artist_name": "New name"},
+        {"spotify_artist_uri": "spotify:artist:b", "cover_art_url": None, "artist_name": "B"},
+    ]
+    template = execute_values.call_args.kwargs["template"]
+    assert template.endswith("md5(jsonb_build_array(%(spotify_artist_uri)s, %(cover_art_url)s, %(artist_name)s)::text))")
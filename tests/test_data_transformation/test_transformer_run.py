@@ -0,0 +1,81 @@
+import threading
+import pytest
+
+
+@pytest.fixture
+def fast_steps(transformer, mocker):
+    transformer.populate_dim_reason = mocker.MagicMock(return_value=0.5)
+    transformer.insert_core_facts = mocker.MagicMock(return_value=1.0)
+    transformer.cleanup_staging = mocker.MagicMock(return_value=0.25)
+    return transformer
+
+
+def test_run_loads_dims_concurrently_before_facts(fast_steps, fake_db, mocker):
+    transformer = fast_steps
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_DIM_WORKERS", 4)
+    fake_db.pool_size = 4
+    all_started = threading.Barrier(4, timeout=5)
+    finished = []
+
+    def process(item_type):
+        # every dimension is in flight at the same time
+        all_started.wait()
+        finished.append(item_type)
+        return 2.0
+
+    transformer.process_staged_batches = mocker.MagicMock(side_effect=process)
+    transformer.populate_dim_reason.side_effect = lambda: finished.append("dim_reason") or 0.5
+
+    total_time = transformer.run()
+
+    # dim_reason is only populated after every dimension finished
+    assert sorted(finished[:4]) == ["artists", "episodes", "podcasts", "tracks"]
+    assert finished[4] == "dim_reason"
+    assert fake_db.checkout.call_count == 4
+    # the parallel stage counts with its wall time, not the sum of the dimension times
+    assert total_time < 8.0
+
+
+def test_run_concurrent_dims_propagates_errors(fast_steps, fake_db, mocker):
+    transformer = fast_steps
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_DIM_WORKERS", 4)
+    fake_db.pool_size = 4
+
+    def process(item_type):
+        if item_type == "podcasts":
+            raise RuntimeError("podcasts failed")
+        return 1.0
+
+    transformer.process_staged_batches = mocker.MagicMock(side_effect=process)
+
+    with pytest.raises(RuntimeError, match="podcasts failed"):
+        transformer.run()
+
+    assert transformer.process_staged_batches.call_count == 4
+    transformer.populate_dim_reason.assert_not_called()
+
+
+def test_run_without_pool_loads_dims_sequentially(fast_steps, fake_db, mocker):
+    transformer = fast_steps
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_DIM_WORKERS", 4)
+    fake_db.pool = None
+    transformer.process_staged_batches = mocker.MagicMock(return_value=2.0)
+
+    assert transformer.run() == 8.0 + 0.5 + 2.0 + 0.25
+    fake_db.checkout.assert_not_called()
+
+
+def test_run_caps_dim_workers_to_the_pool_when_streaming(fast_steps, fake_db, fake_logger, mocker):
+    transformer = fast_steps
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_DIM_WORKERS", 4)
+    mocker.patch("scripts.etl.transformer.settings.TRANSFORM_STREAM_STAGED", True)
+    fake_db.pool_size = 4
+    transformer.process_staged_batches = mocker.MagicMock(return_value=1.0)
+    process_dims_concurrently = mocker.spy(transformer, "process_dims_concurrently")
+
+    transformer.run()
+
+    # each worker also streams on a second connection, so only two fit in the pool
+    assert process_dims_concurrently.call_args.args[1] == 2
+    assert transformer.process_staged_batches.call_count == 4
+    assert any("using 2 workers" in call.args[0] for call in fake_logger.warning.call_args_list)